@@ -0,0 +1,160 @@
+import math
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from processamento_imagem.indice_contorno import obter_indice
+from Cal_angulo.angulo_contato import WINDOW_HEIGHT, calcular_angulo_polinomial
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+RECALCULAR_A_CADA = 256   # atualizações incrementais antes de somar tudo de novo (deriva numérica)
+_POTENCIAS = np.arange(5)[:, None]
+
+
+class _JanelaMomentos:
+    """
+    Somas de momentos (Σu^k, k=0..4; Σx·u^k, k=0..2; Σx²) dos pontos de um
+    lado cuja altura está na janela atual, com u = y - y_ref.
+
+    Os pontos ficam ordenados por y, então a janela é um intervalo [i0, i1)
+    e deslocá-la soma/subtrai apenas os pontos que entraram ou saíram.
+    """
+
+    __slots__ = ("ys", "u", "x", "i0", "i1", "S", "T", "X2", "n_updates")
+
+    def __init__(self, pts_ordenados: np.ndarray, y_ref: float):
+        self.ys = np.ascontiguousarray(pts_ordenados[:, 1], dtype=np.float64)
+        self.u = self.ys - y_ref
+        self.x = np.ascontiguousarray(pts_ordenados[:, 0], dtype=np.float64)
+        self.i0 = self.i1 = 0
+        self.S = np.zeros(5)
+        self.T = np.zeros(3)
+        self.X2 = 0.0
+        self.n_updates = 0
+
+    def _acumular(self, a: int, b: int, sinal: float) -> None:
+        if b <= a:
+            return
+        u = self.u[a:b]
+        x = self.x[a:b]
+        pot = u[None, :] ** _POTENCIAS          # 5×Δ
+        self.S += sinal * pot.sum(axis=1)
+        self.T += sinal * (pot[:3] @ x)
+        self.X2 += sinal * float(x @ x)
+
+    def mover(self, y_lo: float, y_hi: float) -> None:
+        """Posiciona a janela em y_lo < y < y_hi (extremos exclusivos)."""
+        i0 = int(np.searchsorted(self.ys, y_lo, side="right"))
+        i1 = max(i0, int(np.searchsorted(self.ys, y_hi, side="left")))
+        sobrepoe = i0 < self.i1 and self.i0 < i1
+        if not sobrepoe or self.n_updates >= RECALCULAR_A_CADA:
+            self.S[:] = 0.0
+            self.T[:] = 0.0
+            self.X2 = 0.0
+            self._acumular(i0, i1, +1.0)
+            self.n_updates = 0
+        else:
+            # borda inferior (índices menores)
+            if i0 < self.i0:
+                self._acumular(i0, self.i0, +1.0)
+            elif i0 > self.i0:
+                self._acumular(self.i0, i0, -1.0)
+            # borda superior
+            if i1 > self.i1:
+                self._acumular(self.i1, i1, +1.0)
+            elif i1 < self.i1:
+                self._acumular(i1, self.i1, -1.0)
+            self.n_updates += 1
+        self.i0, self.i1 = i0, i1
+
+    @property
+    def n(self) -> int:
+        return self.i1 - self.i0
+
+    def desvios(self) -> Tuple[float, float]:
+        """(desvio de y, desvio de x) dos pontos da janela, a partir dos momentos."""
+        n = self.S[0]
+        var_u = self.S[2] / n - (self.S[1] / n) ** 2
+        var_x = self.X2 / n - (self.T[0] / n) ** 2
+        return math.sqrt(max(var_u, 0.0)), math.sqrt(max(var_x, 0.0))
+
+    def coeficientes(self) -> Optional[np.ndarray]:
+        """(a, b, c) de x = a·u² + b·u + c pelas equações normais 3×3."""
+        S = self.S
+        M = np.array([[S[4], S[3], S[2]],
+                      [S[3], S[2], S[1]],
+                      [S[2], S[1], S[0]]])
+        try:
+            return np.linalg.solve(M, self.T[::-1])
+        except np.linalg.LinAlgError:
+            return None
+
+
+class AjusteIncremental:
+    """
+    Motor de ajuste para a edição interativa dos pontos de contato.
+
+    Equivale a calcular_angulo_polinomial, mas mantém os momentos da janela
+    de cada lado: quando a baseline se desloca poucas linhas, só os pontos
+    que entram/saem da janela são processados (O(Δ)) e o ajuste é um
+    sistema 3×3. Cada lado é atualizado apenas quando pedido.
+
+    Os lados seguem a divisão fixa do índice (média de x). Se a divisão pelo
+    centro dos pontos de contato discordar dela dentro da janela, o cálculo
+    cai para calcular_angulo_polinomial (resultado exato).
+    """
+
+    def __init__(self, gota_pts: np.ndarray, window_height: float = WINDOW_HEIGHT):
+        self.gota_pts = gota_pts
+        self.window_height = float(window_height)
+        self.idx = obter_indice(gota_pts)
+        self.y_ref = self.idx.y_max  # centra u perto da baseline (condicionamento)
+        self._lados: Dict[str, _JanelaMomentos] = {
+            lado: _JanelaMomentos(self.idx.faixa(lado=lado), self.y_ref) for lado in ("esq", "dir")
+        }
+
+    def _lado_confere(self, lado: str, center_x: float, y_lo: float, y_hi: float) -> bool:
+        esq = self.idx.faixa(y_lo, y_hi, lado="esq", incl_lo=False, incl_hi=False)
+        dir_ = self.idx.faixa(y_lo, y_hi, lado="dir", incl_lo=False, incl_hi=False)
+        if lado == "esq":
+            return (len(esq) == 0 or esq[:, 0].max() < center_x) and \
+                   (len(dir_) == 0 or dir_[:, 0].min() >= center_x)
+        return (len(dir_) == 0 or dir_[:, 0].min() > center_x) and \
+               (len(esq) == 0 or esq[:, 0].max() <= center_x)
+
+    def angulo(self,
+               p_esq: Union[list, tuple],
+               p_dir: Union[list, tuple],
+               baseline_y: float,
+               lado: str) -> float:
+        """Mesmo contrato de calcular_angulo_polinomial (graus, 0.0 se inválido)."""
+        if p_esq is None or p_dir is None or lado not in ("esq", "dir"):
+            return 0.0
+        y_lo, y_hi = baseline_y - self.window_height, baseline_y
+        if self.idx.contar(y_lo, y_hi, incl_lo=False, incl_hi=False) < 5:
+            return 0.0
+
+        center_x = (p_esq[0] + p_dir[0]) / 2
+        if not self._lado_confere(lado, center_x, y_lo, y_hi):
+            return calcular_angulo_polinomial(self.gota_pts, p_esq, p_dir, baseline_y, lado, self.window_height)
+
+        janela = self._lados[lado]
+        janela.mover(y_lo, y_hi)
+        if janela.n < 3:
+            return 0.0
+        std_y, std_x = janela.desvios()
+        if std_y < 1e-6 or std_x < 1e-6:
+            return 0.0
+
+        coef = janela.coeficientes()
+        if coef is None or not np.all(np.isfinite(coef)):
+            return calcular_angulo_polinomial(self.gota_pts, p_esq, p_dir, baseline_y, lado, self.window_height)
+        a, b, _ = coef
+
+        # Derivada dx/dy na altura da baseline (u = baseline_y - y_ref)
+        dx_dy = 2 * a * (baseline_y - self.y_ref) + b
+        if lado == "esq":
+            return math.degrees(math.atan2(1.0, -dx_dy))
+        return math.degrees(math.atan2(1.0, dx_dy))
@@ -1,13 +1,24 @@
-from typing import Union
+from typing import Dict, Optional, Tuple, Union
 import numpy as np
 import math
 
+from processamento_imagem.indice_contorno import obter_indice
+
+# Janela de análise (px acima da baseline) usada nos ajustes de ângulo
+WINDOW_HEIGHT = 50
+
+# Bootstrap: reamostragens, jitter da baseline (px) e da altura da janela (fração)
+N_BOOTSTRAP = 500
+BASELINE_JITTER_PX = 1.0
+WINDOW_JITTER_FRAC = 0.2
+
 def calcular_angulo_polinomial(
     gota_pts: np.ndarray,
     p_esq: Union[list, tuple],
     p_dir: Union[list, tuple],
     baseline_y: float,
-    lado: str
+    lado: str,
+    window_height: float = WINDOW_HEIGHT
 ) -> float:
     """
     Calcula o ângulo de contato usando ajuste polinomial de 2ª ordem.
@@ -18,6 +29,7 @@ def calcular_angulo_polinomial(
         p_dir: Ponto de contato direito [x, y]
         baseline_y: Altura da linha base em pixels
         lado: "esq" para esquerdo, "dir" para direito
+        window_height: Altura da janela de ajuste acima da baseline (px)
     
     Returns:
         Ângulo de contato em graus (0.0-180.0) ou 0.0 se inválido
@@ -30,11 +42,10 @@ def calcular_angulo_polinomial(
     if lado not in ("esq", "dir"):
         return 0.0
     # Janela de análise (pontos acima da baseline)
-    window_height = 50
-    mask = (gota_pts[:, 1] < baseline_y) & \
-           (gota_pts[:, 1] > baseline_y - window_height)
-
-    local_pts = gota_pts[mask]
+    # faixa baseline_y - window_height < y < baseline_y por busca binária (índice por y)
+    local_pts = obter_indice(gota_pts).faixa(
+        baseline_y - window_height, baseline_y, incl_lo=False, incl_hi=False
+    )
     
     if len(local_pts) < 5:
         return 0.0
@@ -65,20 +76,144 @@ def calcular_angulo_polinomial(
         # Derivada dx/dy na altura da baseline
         dx_dy = 2 * a * baseline_y + b
         
-        # Ângulo
-        theta_rad = math.atan(1 / dx_dy) if dx_dy != 0 else math.pi / 2
-        theta_deg = math.degrees(theta_rad)
-
+        # Ângulo medido por dentro do líquido (imagem com y para baixo):
+        # à esquerda a tangente sobe para a direita (dx/dy = -cot θ), à
+        # direita sobe para a esquerda (dx/dy = cot θ)
         if lado == "esq":
-            if theta_deg < 0: theta_deg += 180
-            return theta_deg
-        else:
-            if theta_deg > 0:
-                theta_deg = 180 - theta_deg
-            else:
-                theta_deg = abs(theta_deg)
-            return theta_deg
+            return math.degrees(math.atan2(1.0, -dx_dy))
+        return math.degrees(math.atan2(1.0, dx_dy))
 
     except Exception as e:
         print(f"Erro no cálculo: {e}")
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+
+def _theta_lado(dx_dy: np.ndarray, lado: str) -> np.ndarray:
+    """Versão vetorizada da conversão dx/dy → ângulo de calcular_angulo_polinomial."""
+    return np.degrees(np.arctan2(1.0, -dx_dy if lado == "esq" else dx_dy))
+
+
+def _ajustar_reamostragens(xs: np.ndarray, u: np.ndarray, W: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ajustes x = a·u² + b·u + c de B reamostragens de uma vez.
+
+    W (B×N) é o peso de cada ponto em cada reamostragem (contagem do sorteio
+    × janela); as equações normais ponderadas formam uma pilha B×3×3.
+
+    Returns:
+        (coeficientes B×3 em ordem a, b, c; máscara B das reamostragens válidas)
+    """
+    n = len(u)
+    phi = np.stack([u * u, u, np.ones_like(u)], axis=1)        # N×3
+    phi_outer = (phi[:, :, None] * phi[:, None, :]).reshape(n, 9)  # N×9
+    M = (W @ phi_outer).reshape(-1, 3, 3)
+    r = W @ (phi * xs[:, None])
+
+    # reamostragens degeneradas (poucos pontos distintos) são descartadas
+    distintos = np.count_nonzero(W, axis=1)
+    det = np.linalg.det(M)
+    validos = (distintos >= 3) & np.isfinite(det) & (np.abs(det) > 1e-9)
+    M[~validos] = np.eye(3)
+    r[~validos] = 0.0
+    return np.linalg.solve(M, r[:, :, None])[:, :, 0], validos
+
+
+def calcular_angulo_com_incerteza(
+    gota_pts: np.ndarray,
+    p_esq: Union[list, tuple],
+    p_dir: Union[list, tuple],
+    baseline_y: float,
+    lado: str,
+    n_boot: int = N_BOOTSTRAP,
+    baseline_sigma: float = BASELINE_JITTER_PX,
+    window_jitter: float = WINDOW_JITTER_FRAC,
+    confianca: float = 0.95,
+    seed: Optional[int] = None,
+    window_height: float = WINDOW_HEIGHT
+) -> Dict[str, float]:
+    """
+    Ângulo de contato com intervalo de confiança por bootstrap.
+    
+    Cada reamostragem sorteia os pontos da janela com reposição, desloca a
+    baseline (normal, desvio baseline_sigma) e varia a altura da janela
+    (±window_jitter). Todos os ajustes x = a·u² + b·u + c (u = y - baseline_y)
+    são resolvidos de uma vez: as equações normais ponderadas de todas as
+    reamostragens formam uma pilha B×3×3 resolvida com np.linalg.solve.
+    
+    Args:
+        gota_pts, p_esq, p_dir, baseline_y, lado: como em calcular_angulo_polinomial
+        n_boot: número de reamostragens
+        baseline_sigma: desvio-padrão (px) da posição da baseline
+        window_jitter: variação relativa máxima da altura da janela
+        confianca: nível do intervalo (ex.: 0.95)
+        seed: semente do gerador (reprodutibilidade)
+        window_height: altura nominal da janela (px), a mesma do ângulo exibido
+    
+    Returns:
+        Dicionário com 'angulo' (ajuste nominal), 'media', 'desvio',
+        'ic_inf', 'ic_sup', 'n_validos', 'n_pontos', 'rms' (px) e 'r_squared'.
+        Campos numéricos ficam NaN quando o ajuste é inválido.
+    """
+    nan = float("nan")
+    out = {"angulo": calcular_angulo_polinomial(gota_pts, p_esq, p_dir, baseline_y, lado, window_height),
+           "media": nan, "desvio": nan, "ic_inf": nan, "ic_sup": nan,
+           "n_validos": 0, "n_pontos": 0, "rms": nan, "r_squared": nan}
+    if gota_pts is None or len(gota_pts) < 5 or p_esq is None or p_dir is None:
+        return out
+    if lado not in ("esq", "dir"):
+        return out
+    
+    # Superconjunto de candidatos: a maior janela possível do lado pedido
+    h_max = window_height * (1.0 + window_jitter)
+    y_top = baseline_y + 3.0 * baseline_sigma
+    faixa = obter_indice(gota_pts).faixa(
+        baseline_y - h_max - 3.0 * baseline_sigma, y_top, incl_lo=False, incl_hi=False
+    ).astype(np.float64)
+    center_x = (p_esq[0] + p_dir[0]) / 2
+    cand = faixa[faixa[:, 0] < center_x] if lado == "esq" else faixa[faixa[:, 0] > center_x]
+    n = len(cand)
+    if n < 3:
+        return out
+    
+    xs = cand[:, 0]
+    u = cand[:, 1] - baseline_y                      # centrado na baseline (condicionamento)
+    
+    # --- Ajuste nominal: resíduos reais ---
+    nominal = (u < 0) & (u > -window_height)
+    out["n_pontos"] = int(nominal.sum())
+    if out["n_pontos"] >= 3:
+        phi = np.stack([u * u, u, np.ones_like(u)], axis=1)[nominal]
+        coef, *_ = np.linalg.lstsq(phi, xs[nominal], rcond=None)
+        res = xs[nominal] - phi @ coef
+        ss_tot = float(np.sum((xs[nominal] - xs[nominal].mean()) ** 2))
+        out["rms"] = float(np.sqrt(np.mean(res ** 2)))
+        out["r_squared"] = 1.0 - float(np.sum(res ** 2)) / ss_tot if ss_tot > 0 else nan
+    
+    # --- Reamostragens (B×N) ---
+    rng = np.random.default_rng(seed)
+    B = int(n_boot)
+    base_b = baseline_y + rng.normal(0.0, baseline_sigma, B) if baseline_sigma > 0 else np.full(B, baseline_y)
+    h_b = window_height * rng.uniform(1.0 - window_jitter, 1.0 + window_jitter, B)
+    contagens = rng.multinomial(n, np.full(n, 1.0 / n), size=B).astype(np.float64)
+    y = cand[:, 1][None, :]
+    janela = (y < base_b[:, None]) & (y > (base_b - h_b)[:, None])
+    coefs, validos = _ajustar_reamostragens(xs, u, contagens * janela)
+    if not np.any(validos):
+        return out
+    
+    a, b = coefs[validos, 0], coefs[validos, 1]
+    dx_dy = 2 * a * (base_b[validos] - baseline_y) + b
+    thetas = _theta_lado(dx_dy, lado)
+    thetas = thetas[np.isfinite(thetas)]
+    if len(thetas) == 0:
+        return out
+    
+    alfa = (1.0 - confianca) / 2.0
+    out.update({
+        "media": float(np.mean(thetas)),
+        "desvio": float(np.std(thetas, ddof=1)) if len(thetas) > 1 else 0.0,
+        "ic_inf": float(np.quantile(thetas, alfa)),
+        "ic_sup": float(np.quantile(thetas, 1.0 - alfa)),
+        "n_validos": int(len(thetas)),
+    })
+    return out
@@ -0,0 +1,305 @@
+import argparse
+import csv
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from pipeline.analise import analisar_imagem
+from pipeline.executor import obter_pool
+from pipeline.metricas import obter_metricas
+from pipeline.mudanca import LIMIAR_MUDANCA, AnaliseComReuso, DetectorMudanca
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+TOLERANCIA_SYNC_MS = 10.0   # diferença máxima entre quadros de um mesmo instante
+BUFFER_QUADROS = 8          # quadros guardados por câmera aguardando par
+MAX_FALHAS_LEITURA = 100
+
+
+class CameraThread:
+    """
+    Uma câmera lida numa thread própria.
+
+    O instante de cada quadro é tomado logo após o grab() (antes da
+    decodificação em retrieve()), o que aproxima o momento da exposição.
+    """
+
+    def __init__(self, camera_id, ao_quadro: Callable[[object, float, np.ndarray], None]):
+        self.camera_id = camera_id
+        self.cap = cv2.VideoCapture(camera_id)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Não foi possível abrir câmera {camera_id}")
+        self._ao_quadro = ao_quadro
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.n_quadros = 0
+        self.falhas = 0
+
+    def iniciar(self) -> None:
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._laco, name=f"camera-{self.camera_id}", daemon=True)
+        self._thread.start()
+
+    def _laco(self) -> None:
+        while not self._parar.is_set():
+            if not self.cap.grab():
+                self.falhas += 1
+                if self.falhas > MAX_FALHAS_LEITURA:
+                    break
+                continue
+            t = time.perf_counter()
+            ok, quadro = self.cap.retrieve()
+            if not ok or quadro is None:
+                self.falhas += 1
+                continue
+            self.n_quadros += 1
+            self._ao_quadro(self.camera_id, t, quadro)
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.cap.release()
+
+
+class GerenciadorMultiCamera:
+    """
+    Captura simultânea de várias câmeras com pareamento por tempo.
+
+    Cada câmera tem sua thread e um buffer curto. Um conjunto é formado
+    quando as cabeças de todos os buffers estão a até 'tolerancia_ms' umas
+    das outras; cabeças mais antigas que isso (sem par possível) são
+    descartadas. Cada quadro entra em no máximo um conjunto.
+    """
+
+    def __init__(self, camera_ids: Sequence, tolerancia_ms: float = TOLERANCIA_SYNC_MS,
+                 buffer: int = BUFFER_QUADROS):
+        if len(camera_ids) < 2:
+            raise ValueError("informe pelo menos duas câmeras")
+        self.camera_ids = list(camera_ids)
+        self.tolerancia = tolerancia_ms / 1000.0
+        self._buffers: Dict[object, deque] = {c: deque(maxlen=buffer) for c in self.camera_ids}
+        self._cond = threading.Condition()
+        self._cameras: List[CameraThread] = []
+        self.descartados = 0
+        self.n_conjuntos = 0
+
+    # ---------------- CICLO DE VIDA ----------------
+    def iniciar(self) -> None:
+        try:
+            for c in self.camera_ids:
+                self._cameras.append(CameraThread(c, self._receber))
+        except Exception:
+            self.parar()
+            raise
+        for cam in self._cameras:
+            cam.iniciar()
+
+    def parar(self) -> None:
+        for cam in self._cameras:
+            cam.parar()
+        self._cameras = []
+        with self._cond:
+            self._cond.notify_all()
+
+    def __enter__(self) -> "GerenciadorMultiCamera":
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.parar()
+
+    # ---------------- PAREAMENTO ----------------
+    def _receber(self, camera_id, t: float, quadro: np.ndarray) -> None:
+        obter_metricas().marcar(f"captura_cam{camera_id}", t)
+        with self._cond:
+            buf = self._buffers[camera_id]
+            if len(buf) == buf.maxlen:
+                self.descartados += 1
+                obter_metricas().contar("quadros_descartados")
+            buf.append((t, quadro))
+            self._cond.notify_all()
+
+    def _tentar_parear(self) -> Optional[Dict]:
+        """Chamado com o lock: retorna um conjunto ou None se faltam quadros."""
+        while all(self._buffers[c] for c in self.camera_ids):
+            cabecas = {c: self._buffers[c][0][0] for c in self.camera_ids}
+            t_max = max(cabecas.values())
+            atrasadas = [c for c, t in cabecas.items() if t < t_max - self.tolerancia]
+            if not atrasadas:
+                quadros = {c: self._buffers[c].popleft() for c in self.camera_ids}
+                ts = [t for t, _ in quadros.values()]
+                self.n_conjuntos += 1
+                return {"t": float(np.mean(ts)), "dt_sync": max(ts) - min(ts),
+                        "quadros": {c: q for c, (_, q) in quadros.items()},
+                        "tempos": {c: t for c, (t, _) in quadros.items()}}
+            for c in atrasadas:
+                self._buffers[c].popleft()  # nunca terá par: as outras já passaram dele
+                self.descartados += 1
+                obter_metricas().contar("quadros_descartados")
+        return None
+
+    def proximo_conjunto(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Bloqueia até o próximo conjunto sincronizado (None em timeout/parada)."""
+        limite = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while True:
+                conjunto = self._tentar_parear()
+                if conjunto is not None:
+                    return conjunto
+                if not self._cameras:
+                    return None
+                restante = None if limite is None else limite - time.perf_counter()
+                if restante is not None and restante <= 0:
+                    return None
+                self._cond.wait(restante)
+
+
+# =================================================================
+# ANÁLISE POR VISTA E COMBINAÇÃO
+# =================================================================
+
+def combinar_vistas(resultados: Dict[object, Dict]) -> Dict[str, float]:
+    """
+    Grandezas combinadas de um instante a partir das vistas.
+
+    Com vistas ortogonais, uma gota axissimétrica tem o mesmo diâmetro de
+    base e os mesmos ângulos em todas elas: as diferenças relativas medem o
+    afastamento da axissimetria.
+    """
+    nan = float("nan")
+    angulos, bases = [], []
+    for res in resultados.values():
+        for k in ("angulo_esq", "angulo_dir"):
+            v = res.get(k)
+            if v is not None and math.isfinite(v) and v > 0:
+                angulos.append(float(v))
+        if res.get("p_esq") is not None and res.get("p_dir") is not None:
+            bases.append(abs(float(res["p_dir"][0]) - float(res["p_esq"][0])))
+    combinado = {"angulo_medio": float(np.mean(angulos)) if angulos else nan,
+                 "angulo_desvio": float(np.std(angulos)) if len(angulos) > 1 else nan,
+                 "diametro_base_medio": float(np.mean(bases)) if bases else nan,
+                 "assimetria_base": nan}
+    if len(bases) > 1 and np.mean(bases) > 0:
+        combinado["assimetria_base"] = float((max(bases) - min(bases)) / np.mean(bases))
+    return combinado
+
+
+def analisar_conjunto(conjunto: Dict, rois: Optional[Dict] = None, pre_params: Optional[Dict] = None,
+                      analisadores: Optional[Dict[object, Callable]] = None) -> Dict:
+    """
+    Analisa as vistas de um conjunto em paralelo (pool compartilhado) e combina.
+
+    analisadores: função de análise por câmera (padrão: analisar_imagem),
+    ex.: AnaliseComReuso para pular vistas paradas.
+    """
+    rois = rois or {}
+    analisadores = analisadores or {}
+    futuros = {c: obter_pool().submit(analisadores.get(c, analisar_imagem), q, rois.get(c), pre_params)
+               for c, q in conjunto["quadros"].items()}
+    vistas = {}
+    for c, f in futuros.items():
+        try:
+            vistas[c] = f.result()
+        except Exception as e:
+            vistas[c] = {"erro": str(e)}
+    saida = {"t": conjunto["t"], "dt_sync": conjunto["dt_sync"], "vistas": vistas}
+    saida.update(combinar_vistas(vistas))
+    return saida
+
+
+class AnaliseMultiCamera:
+    """
+    Laço captura → pareamento → análise paralela por vista.
+
+    Cada conjunto sincronizado vira um resultado combinado entregue ao
+    callback (na thread do laço). Enquanto um conjunto é analisado, os
+    seguintes continuam sendo capturados e pareados; se a análise for mais
+    lenta que a captura, os quadros mais antigos saem dos buffers.
+
+    Com limiar_mudanca, cada vista só é reanalisada quando sua ROI muda em
+    relação ao último quadro analisado daquela câmera.
+    """
+
+    def __init__(self, gerenciador: GerenciadorMultiCamera, rois: Optional[Dict] = None,
+                 pre_params: Optional[Dict] = None, callback: Optional[Callable[[Dict], None]] = None,
+                 limiar_mudanca: Optional[float] = LIMIAR_MUDANCA):
+        self.gerenciador = gerenciador
+        self.rois = rois or {}
+        self.pre_params = pre_params
+        self.callback = callback
+        self.analisadores: Dict[object, AnaliseComReuso] = {}
+        if limiar_mudanca is not None:
+            for c in gerenciador.camera_ids:
+                roi = self.rois.get(c)
+                roi_det = roi if isinstance(roi, (list, tuple)) else None
+                self.analisadores[c] = AnaliseComReuso(analisar_imagem, DetectorMudanca(limiar_mudanca, roi_det))
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.t0: Optional[float] = None
+
+    def iniciar(self) -> None:
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._laco, name="analise-multicamera", daemon=True)
+        self._thread.start()
+
+    def _laco(self) -> None:
+        while not self._parar.is_set():
+            conjunto = self.gerenciador.proximo_conjunto(timeout=0.5)
+            if conjunto is None:
+                continue
+            if self.t0 is None:
+                self.t0 = conjunto["t"]
+            metricas = obter_metricas()
+            metricas.marcar("conjuntos_multicamera")
+            with metricas.medir("analise_multicamera"):
+                res = analisar_conjunto(conjunto, self.rois, self.pre_params, self.analisadores)
+            res["t"] -= self.t0
+            if self.callback is not None:
+                self.callback(res)
+
+    def parar(self) -> None:
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+CAMPOS_CSV = ("t", "dt_sync", "angulo_medio", "angulo_desvio", "diametro_base_medio", "assimetria_base")
+
+
+def _linha_csv(res: Dict, camera_ids: Sequence) -> Dict:
+    linha = {k: res.get(k) for k in CAMPOS_CSV}
+    for c in camera_ids:
+        v = res["vistas"].get(c, {})
+        linha[f"cam{c}_angulo_esq"] = v.get("angulo_esq")
+        linha[f"cam{c}_angulo_dir"] = v.get("angulo_dir")
+    return linha
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Captura e análise sincronizada de várias câmeras")
+    ap.add_argument("cameras", type=int, nargs="+", help="índices das câmeras (>= 2)")
+    ap.add_argument("--roi", type=int, nargs=5, action="append", default=[],
+                    metavar=("CAM", "X1", "Y1", "X2", "Y2"), help="ROI de uma câmera (repetível)")
+    ap.add_argument("--tolerancia-ms", type=float, default=TOLERANCIA_SYNC_MS)
+    ap.add_argument("--duracao", type=float, default=10.0, help="segundos de captura")
+    ap.add_argument("--saida", default="multicamera.csv")
+    a = ap.parse_args()
+
+    rois = {r[0]: list(r[1:]) for r in a.roi}
+    colunas = list(CAMPOS_CSV) + [f"cam{c}_angulo_{l}" for c in a.cameras for l in ("esq", "dir")]
+    with open(a.saida, "w", newline="", encoding="utf-8") as f, \
+            GerenciadorMultiCamera(a.cameras, a.tolerancia_ms) as ger:
+        escritor = csv.DictWriter(f, fieldnames=colunas)
+        escritor.writeheader()
+        analise = AnaliseMultiCamera(ger, rois, callback=lambda r: escritor.writerow(_linha_csv(r, a.cameras)))
+        analise.iniciar()
+        time.sleep(a.duracao)
+        analise.parar()
+    print(f"[MULTICAMERA] {ger.n_conjuntos} conjuntos, {ger.descartados} quadros sem par → {a.saida}")
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from pipeline.mudanca import LIMIAR_MUDANCA, AnaliseComReuso, DetectorMudanca
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+DURACAO_PADRAO_S = 2.0
+FPS_FALLBACK = 30.0            # quando a câmera não informa CAP_PROP_FPS
+MAX_BYTES_ANEL = 4 * 1024 ** 3 # teto de memória para o anel pré-alocado (4 GB)
+COMPRESSAO_PNG_RAJADA = 1      # PNG sem perdas, compressão rápida
+
+
+class CapturaRajada:
+    """
+    Captura em rajada para a RAM.
+
+    Os quadros são lidos numa thread dedicada, na taxa máxima da câmera,
+    diretamente num anel pré-alocado (N×H×W×C uint8) — sem codificação nem
+    alocação por quadro. A codificação sem perdas (PNG/TIFF) acontece
+    depois, num pool em segundo plano, e a sequência pode ir direto para a
+    análise sem passar pelo disco.
+
+    Modos:
+        gravar(): grava N quadros e para sozinha (N = fps × duração)
+        continuo=True: anel circular até parar() — guarda os N últimos
+            quadros (útil para "pré-gatilho" num impacto de gota)
+    """
+
+    def __init__(self, cap: "cv2.VideoCapture", duracao_s: float = DURACAO_PADRAO_S,
+                 fps: Optional[float] = None, continuo: bool = False):
+        if cap is None or not cap.isOpened():
+            raise ValueError("Câmera não está aberta")
+        self.cap = cap
+        fps = fps or cap.get(cv2.CAP_PROP_FPS) or FPS_FALLBACK
+        if not np.isfinite(fps) or fps <= 0:
+            fps = FPS_FALLBACK
+
+        # primeiro quadro define a geometria do anel
+        ok, primeiro = cap.read()
+        if not ok or primeiro is None:
+            raise RuntimeError("Falha ao ler quadro da câmera")
+        n = max(1, int(round(fps * duracao_s)))
+        n = min(n, max(1, MAX_BYTES_ANEL // primeiro.nbytes))
+        self.anel = np.empty((n,) + primeiro.shape, dtype=primeiro.dtype)
+        self.tempos = np.zeros(n, dtype=np.float64)
+        self.continuo = continuo
+        self.fps_nominal = float(fps)
+
+        self._escritos = 0          # total de quadros escritos (pode passar de n no modo contínuo)
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.falhas_leitura = 0
+
+    @property
+    def capacidade(self) -> int:
+        return len(self.anel)
+
+    @property
+    def n_quadros(self) -> int:
+        return min(self._escritos, self.capacidade)
+
+    @property
+    def gravando(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------------- CAPTURA ----------------
+    def _laco(self) -> None:
+        n = self.capacidade
+        t0 = time.perf_counter()
+        while not self._parar.is_set():
+            if not self.continuo and self._escritos >= n:
+                break
+            i = self._escritos % n
+            slot = self.anel[i]
+            ok, quadro = self.cap.read(slot)
+            if not ok or quadro is None:
+                self.falhas_leitura += 1
+                if self.falhas_leitura > 100:
+                    break
+                continue
+            if quadro is not slot and quadro.shape == slot.shape:
+                slot[...] = quadro  # backend não reaproveitou o buffer
+            self.tempos[i] = time.perf_counter() - t0
+            self._escritos += 1
+
+    def gravar(self, ao_terminar: Optional[Callable[["CapturaRajada"], None]] = None) -> None:
+        """Inicia a gravação numa thread; ao_terminar é chamado (nessa thread) no fim."""
+        if self.gravando:
+            return
+
+        def _executar():
+            self._laco()
+            if ao_terminar is not None:
+                ao_terminar(self)
+
+        self._parar.clear()
+        self._thread = threading.Thread(target=_executar, name="captura-rajada", daemon=True)
+        self._thread.start()
+
+    def parar(self, esperar: bool = True) -> None:
+        self._parar.set()
+        if esperar and self._thread is not None:
+            self._thread.join()
+
+    # ---------------- ACESSO ----------------
+    def _ordem(self) -> np.ndarray:
+        n = self.capacidade
+        if self._escritos <= n:
+            return np.arange(self._escritos)
+        inicio = self._escritos % n
+        return (np.arange(n) + inicio) % n
+
+    def quadros(self) -> Iterator[Tuple[float, np.ndarray]]:
+        """(t relativo ao primeiro quadro, quadro) em ordem cronológica — views do anel."""
+        ordem = self._ordem()
+        if len(ordem) == 0:
+            return
+        t_ini = self.tempos[ordem[0]]
+        for i in ordem:
+            yield float(self.tempos[i] - t_ini), self.anel[i]
+
+    def fps_medido(self) -> float:
+        ordem = self._ordem()
+        if len(ordem) < 2:
+            return float("nan")
+        dt = self.tempos[ordem[-1]] - self.tempos[ordem[0]]
+        return (len(ordem) - 1) / dt if dt > 0 else float("nan")
+
+    # ---------------- PÓS-CAPTURA ----------------
+    def codificar(self, pasta: str, formato: str = "png", n_workers: Optional[int] = None,
+                  pool: Optional[ThreadPoolExecutor] = None) -> List[Future]:
+        """
+        Codifica a sequência sem perdas (PNG ou TIFF) em segundo plano.
+
+        Também grava 'tempos.csv' (quadro, t). Retorna os futures da escrita
+        (cada um resulta no caminho do arquivo, ou None se falhar).
+        """
+        if formato not in ("png", "tiff"):
+            raise ValueError("formato deve ser 'png' ou 'tiff'")
+        os.makedirs(pasta, exist_ok=True)
+        params = [cv2.IMWRITE_PNG_COMPRESSION, COMPRESSAO_PNG_RAJADA] if formato == "png" else []
+        dono = pool is None
+        pool = pool or ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix="codifica-rajada")
+
+        def _escrever(path, quadro):
+            return path if cv2.imwrite(path, quadro, params) else None
+
+        futures = []
+        with open(os.path.join(pasta, "tempos.csv"), "w", encoding="utf-8") as f:
+            f.write("quadro,t\n")
+            for k, (t, quadro) in enumerate(self.quadros()):
+                f.write(f"{k},{t:.6f}\n")
+                path = os.path.join(pasta, f"quadro_{k:06d}.{formato}")
+                futures.append(pool.submit(_escrever, path, quadro))
+        if dono:
+            pool.shutdown(wait=False)
+        return futures
+
+    def analisar(self, roi: Optional[Sequence[int]] = None, pre_params: Optional[Dict] = None,
+                 ao_quadro: Optional[Callable[[float, Dict], None]] = None,
+                 limiar_mudanca: Optional[float] = LIMIAR_MUDANCA,
+                 escritor_debug=None) -> List[Tuple[float, Dict]]:
+        """
+        Analisa a sequência (pipeline.analise.analisar_imagem) direto da RAM.
+
+        ao_quadro(t, resultado) é chamado a cada quadro (ex.: RastreadorCinetica).
+        Quadros sem mudança visível na ROI em relação ao último analisado
+        reaproveitam o resultado ('reutilizado': True); limiar_mudanca=None
+        analisa todos.
+
+        escritor_debug: EscritorDebug opcional; recebe as imagens de cada
+        quadro analisado (os reaproveitados não geram artefato), marcadas
+        como fallback quando a cascata de segmentação subiu de nível.
+        """
+        from pipeline.analise import CHAVES_IMAGENS, analisar_imagem, enviar_debug
+
+        analisar = analisar_imagem
+        if limiar_mudanca is not None:
+            roi_det = roi if isinstance(roi, (list, tuple)) else None
+            # sem reanálise forçada por tempo: numa rajada curta a deriva lenta já cruza o limiar
+            analisar = AnaliseComReuso(analisar_imagem, DetectorMudanca(limiar_mudanca, roi_det,
+                                                                        forcar_a_cada_s=None))
+        kwargs = {"incluir_imagens": True} if escritor_debug is not None else {}
+        resultados = []
+        for k, (t, quadro) in enumerate(self.quadros()):
+            try:
+                res = analisar(quadro, roi=roi, pre_params=pre_params, **kwargs)
+            except Exception as e:
+                res = {"erro": str(e)}
+            if escritor_debug is not None:
+                if res.get("reutilizado"):
+                    # cópia do último analisado: as imagens dele já foram enviadas
+                    res = {c: v for c, v in res.items() if c not in CHAVES_IMAGENS}
+                else:
+                    enviar_debug(escritor_debug, res, f"quadro_{k:06d}")
+            resultados.append((t, res))
+            if ao_quadro is not None:
+                ao_quadro(t, res)
+        return resultados
@@ -0,0 +1,352 @@
+import argparse
+import csv
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+MAGICO = b"ANGSES01"
+CODECS = ("png", "raw")            # png: sem perdas, compressão rápida; raw: bytes crus (leitura zero-cópia)
+COMPRESSAO_PNG_SESSAO = 1
+MAX_FILA_GRAVACAO = 64             # quadros aguardando codificação antes de descartar
+
+# Registro: tipo (4 bytes), altura, largura, canais, t (perf_counter), tamanho do payload
+_CABECALHO = struct.Struct("<4sIIIdQ")
+TIPO_QUADRO = b"QDRO"
+TIPO_META = b"META"
+_FIM = object()
+
+
+def _params_de_json(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON não tem tuplas: restaura clahe_grid como em pipeline.autotune.carregar_perfil."""
+    params = meta.get("pre_params")
+    if isinstance(params, dict) and params.get("clahe_grid") is not None:
+        params["clahe_grid"] = tuple(params["clahe_grid"])
+    return meta
+
+
+class GravadorSessao:
+    """
+    Grava uma sessão de câmera num único arquivo só de acréscimo.
+
+    O arquivo é MAGICO seguido de registros [cabeçalho | payload]:
+        META  JSON com ROI, parâmetros do pipeline etc. (vale para os
+              quadros seguintes; o primeiro traz codec e versão)
+        QDRO  um quadro bruto (uint8) com o instante de captura
+
+    Nada é reescrito: uma gravação interrompida perde no máximo o último
+    registro, e o leitor mapeia o arquivo em memória sem índice separado.
+    A codificação (PNG sem perdas, nível rápido) roda numa thread própria;
+    com a fila cheia o quadro é descartado (contado em 'descartados') para
+    não travar o laço de captura.
+    """
+
+    def __init__(self, caminho: str, codec: str = "png", metadados: Optional[Dict[str, Any]] = None,
+                 max_fila: int = MAX_FILA_GRAVACAO):
+        if codec not in CODECS:
+            raise ValueError(f"codec deve ser um de {CODECS}")
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.codec = codec
+        self._params_png = [cv2.IMWRITE_PNG_COMPRESSION, COMPRESSAO_PNG_SESSAO]
+        self._arquivo = open(caminho, "wb")
+        self._arquivo.write(MAGICO)
+        self._fila: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_fila)))
+        self.n_quadros = 0
+        self.descartados = 0
+        self.bytes_escritos = len(MAGICO)
+        self._thread = threading.Thread(target=self._trabalhar, name="gravador-sessao", daemon=True)
+        self._thread.start()
+        inicial = {"versao": 1, "codec": codec, "criado": datetime.now().isoformat(timespec="seconds")}
+        inicial.update(metadados or {})
+        self.gravar_metadados(**inicial)
+
+    # ---------------- PRODUTOR ----------------
+    def gravar_quadro(self, quadro: np.ndarray, t: Optional[float] = None) -> bool:
+        """Enfileira um quadro (copiado) sem bloquear; False se descartado."""
+        t = time.perf_counter() if t is None else t
+        try:
+            self._fila.put_nowait((TIPO_QUADRO, t, np.ascontiguousarray(quadro).copy()))
+        except queue.Full:
+            self.descartados += 1
+            return False
+        return True
+
+    def gravar_metadados(self, **meta) -> None:
+        """Registra ROI/parâmetros vigentes a partir deste ponto (nunca descartado)."""
+        self._fila.put((TIPO_META, time.perf_counter(), meta))
+
+    # ---------------- CONSUMIDOR ----------------
+    def _trabalhar(self) -> None:
+        while True:
+            item = self._fila.get()
+            try:
+                if item is _FIM:
+                    return
+                self._escrever(*item)
+            except Exception as e:
+                print(f"[SESSAO] Erro ao gravar registro: {e}")
+            finally:
+                self._fila.task_done()
+
+    def _escrever(self, tipo: bytes, t: float, dados) -> None:
+        if tipo == TIPO_META:
+            payload = json.dumps(dados, default=_json_padrao, ensure_ascii=False).encode("utf-8")
+            h = w = c = 0
+        else:
+            if dados.dtype != np.uint8:
+                raise ValueError("apenas quadros uint8 são gravados")
+            h, w = dados.shape[:2]
+            c = 1 if dados.ndim == 2 else dados.shape[2]
+            if self.codec == "png":
+                ok, buf = cv2.imencode(".png", dados, self._params_png)
+                if not ok:
+                    raise IOError("falha ao codificar quadro")
+                payload = buf.tobytes()
+            else:
+                payload = dados.tobytes()
+        self._arquivo.write(_CABECALHO.pack(tipo, h, w, c, t, len(payload)))
+        self._arquivo.write(payload)
+        self.bytes_escritos += _CABECALHO.size + len(payload)
+        if tipo == TIPO_QUADRO:
+            self.n_quadros += 1
+
+    # ---------------- CONTROLE ----------------
+    def fechar(self) -> None:
+        """Grava o que está na fila e fecha o arquivo."""
+        if self._arquivo.closed:
+            return
+        if self.descartados:
+            self.gravar_metadados(descartados=self.descartados)
+        self._fila.put(_FIM)
+        self._thread.join()
+        self._arquivo.close()
+
+    def __enter__(self) -> "GravadorSessao":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+def _json_padrao(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if callable(obj):
+        return getattr(obj, "__qualname__", repr(obj))
+    raise TypeError(f"tipo não serializável: {type(obj).__name__}")
+
+
+class LeitorSessao:
+    """
+    Leitura de uma sessão gravada por GravadorSessao via mmap.
+
+    Só os cabeçalhos são percorridos na abertura; cada quadro é decodificado
+    sob demanda (com codec "raw" o quadro é uma visão do mapa, sem cópia).
+    Um último registro truncado (gravação interrompida) é ignorado.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "rb")
+        tamanho = os.fstat(self._arquivo.fileno()).st_size
+        if tamanho < len(MAGICO):
+            self._arquivo.close()
+            raise ValueError(f"arquivo de sessão inválido: {caminho}")
+        self._mm = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGICO)] != MAGICO:
+            self.fechar()
+            raise ValueError(f"arquivo de sessão inválido: {caminho}")
+        self._quadros: List[Tuple[int, int, int, int, int]] = []   # (offset, tamanho, h, w, c)
+        tempos: List[float] = []
+        self._versao_meta: List[int] = []   # índice em self._metas vigente em cada quadro
+        self._metas: List[Dict[str, Any]] = [{}]
+        self.truncado = False
+        pos = len(MAGICO)
+        while pos + _CABECALHO.size <= tamanho:
+            tipo, h, w, c, t, n = _CABECALHO.unpack_from(self._mm, pos)
+            inicio = pos + _CABECALHO.size
+            if inicio + n > tamanho:
+                break
+            if tipo == TIPO_QUADRO:
+                self._quadros.append((inicio, n, h, w, c))
+                tempos.append(t)
+                self._versao_meta.append(len(self._metas) - 1)
+            elif tipo == TIPO_META:
+                meta = dict(self._metas[-1])
+                meta.update(json.loads(bytes(self._mm[inicio:inicio + n]).decode("utf-8")))
+                self._metas.append(_params_de_json(meta))
+            pos = inicio + n
+        self.truncado = pos != tamanho
+        self.tempos = np.asarray(tempos, dtype=np.float64)
+        self.codec = self._metas[-1].get("codec", "png")
+
+    @property
+    def metadados(self) -> Dict[str, Any]:
+        """Metadados acumulados ao fim da sessão."""
+        return dict(self._metas[-1])
+
+    def metadados_quadro(self, i: int) -> Dict[str, Any]:
+        """ROI/parâmetros vigentes quando o quadro i foi capturado."""
+        return self._metas[self._versao_meta[i]]
+
+    def __len__(self) -> int:
+        return len(self._quadros)
+
+    def quadro(self, i: int) -> np.ndarray:
+        off, n, h, w, c = self._quadros[i]
+        buf = np.frombuffer(self._mm, dtype=np.uint8, count=n, offset=off)
+        if self.codec == "raw":
+            return buf.reshape((h, w) if c == 1 else (h, w, c))
+        img = cv2.imdecode(buf, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise IOError(f"quadro {i} corrompido")
+        return img
+
+    def __iter__(self) -> Iterator[Tuple[float, np.ndarray]]:
+        for i in range(len(self)):
+            yield float(self.tempos[i]), self.quadro(i)
+
+    def fechar(self) -> None:
+        try:
+            self._mm.close()
+        except (BufferError, ValueError):
+            pass  # visões "raw" ainda vivas seguram o mapa até serem coletadas
+        self._arquivo.close()
+
+    def __enter__(self) -> "LeitorSessao":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+# =================================================================
+# REPRODUÇÃO
+# =================================================================
+
+def _analisar_quadro(leitor: LeitorSessao, i: int, analisar: Callable) -> Dict[str, Any]:
+    meta = leitor.metadados_quadro(i)
+    try:
+        return analisar(leitor.quadro(i), roi=meta.get("roi"), pre_params=meta.get("pre_params"))
+    except Exception as e:
+        return {"erro": str(e)}
+
+
+def reproduzir(caminho: str,
+               analisar: Optional[Callable] = None,
+               tempo_real: bool = False,
+               velocidade: float = 1.0,
+               inicio: int = 0,
+               fim: Optional[int] = None) -> Iterator[Tuple[int, float, Dict[str, Any]]]:
+    """
+    Passa a sessão gravada de novo pelo pipeline, em ordem.
+
+    Cada quadro é analisado com a ROI e os parâmetros vigentes na gravação.
+    tempo_real=False: o mais rápido possível (decodificação + análise no pool
+    compartilhado, com uma janela limitada de quadros em voo);
+    tempo_real=True: respeita os intervalos originais (÷ velocidade).
+
+    Yields:
+        (índice, t relativo ao primeiro quadro em s, resultado)
+    """
+    from pipeline.analise import analisar_imagem
+    from pipeline.executor import MAX_WORKERS_PADRAO, obter_pool
+
+    analisar = analisar or analisar_imagem
+    with LeitorSessao(caminho) as leitor:
+        fim = len(leitor) if fim is None else min(fim, len(leitor))
+        if fim <= inicio:
+            return
+        t0 = float(leitor.tempos[inicio])
+        if tempo_real:
+            relogio0 = time.perf_counter()
+            for i in range(inicio, fim):
+                t = float(leitor.tempos[i]) - t0
+                espera = relogio0 + t / velocidade - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                yield i, t, _analisar_quadro(leitor, i, analisar)
+            return
+        pool = obter_pool()
+        em_voo: deque = deque()
+        proximo = inicio
+        try:
+            while proximo < fim or em_voo:
+                while proximo < fim and len(em_voo) < 2 * MAX_WORKERS_PADRAO:
+                    em_voo.append((proximo, pool.submit(_analisar_quadro, leitor, proximo, analisar)))
+                    proximo += 1
+                i, fut = em_voo.popleft()
+                yield i, float(leitor.tempos[i]) - t0, fut.result()
+        finally:
+            # consumidor parou antes do fim: o mapa só fecha depois dos trabalhadores
+            for _, fut in em_voo:
+                fut.cancel()
+            for _, fut in em_voo:
+                if not fut.cancelled():
+                    fut.exception()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Reanalisa uma sessão gravada (.angs)")
+    ap.add_argument("sessao")
+    ap.add_argument("--tempo-real", action="store_true", help="respeita os intervalos originais")
+    ap.add_argument("--velocidade", type=float, default=1.0)
+    ap.add_argument("--saida", default=None, help="CSV com os ângulos por quadro")
+    ap.add_argument("--contornos", default=None,
+                    help="pasta onde guardar o contorno de cada quadro (processamento_imagem/arquivo_contornos.py)")
+    ap.add_argument("--linha-contato", default=None,
+                    help="CSV com os eventos de avanço/recuo da linha de contato (cinetica/linha_contato.py)")
+    a = ap.parse_args()
+
+    with LeitorSessao(a.sessao) as l:
+        print(f"[SESSAO] {len(l)} quadros, metadados: {l.metadados}" + (" (truncada)" if l.truncado else ""))
+    t_ini = time.perf_counter()
+    f = open(a.saida, "w", newline="", encoding="utf-8") if a.saida else None
+    escritor = csv.writer(f) if f else None
+    if escritor:
+        escritor.writerow(["quadro", "t", "angulo_esq", "angulo_dir", "angulo_medio", "erro"])
+    arquivo = None
+    if a.contornos:
+        from processamento_imagem.arquivo_contornos import GravadorContornos
+        arquivo = GravadorContornos(a.contornos, metadados={"sessao": os.path.abspath(a.sessao)})
+    f_linha = linha = None
+    if a.linha_contato:
+        from cinetica.linha_contato import DetectorLinhaContato
+        f_linha = open(a.linha_contato, "w", newline="", encoding="utf-8")
+        linha = DetectorLinhaContato(saida_csv=f_linha)
+    n = 0
+    for i, t, res in reproduzir(a.sessao, tempo_real=a.tempo_real, velocidade=a.velocidade):
+        n += 1
+        if arquivo is not None:
+            arquivo.append(res.get("gota_pts"), quadro=i, t=t)
+        if linha is not None:
+            linha.atualizar_resultado(t, res)
+        if escritor:
+            escritor.writerow([i, f"{t:.6f}", res.get("angulo_esq"), res.get("angulo_dir"),
+                               res.get("angulo_medio"), res.get("erro", "")])
+    if f:
+        f.close()
+    if arquivo is not None:
+        arquivo.fechar()
+    if linha is not None:
+        f_linha.close()
+        print(f"[SESSAO] {len(linha.eventos)} eventos de linha de contato → {a.linha_contato}")
+    dur = time.perf_counter() - t_ini
+    print(f"[SESSAO] {n} quadros reanalisados em {dur:.2f}s ({n / max(dur, 1e-9):.1f} quadros/s)")
@@ -0,0 +1,275 @@
+import csv
+import math
+from typing import Callable, Dict, Optional, Sequence, TextIO
+
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+# Ruído do filtro de Kalman (modelo de velocidade constante) por grandeza,
+# relativo à escala do sinal (|primeira medida|): ângulos em graus, tamanhos
+# em px·escala e volumes em px³·escala³ variam por ordens de grandeza, e um
+# mesmo valor absoluto não serve a todos.
+# Processo: variância da aceleração por s², em fração² da escala.
+RUIDO_PROCESSO_PADRAO = {
+    "angulo_esq": 1e-4, "angulo_dir": 1e-4, "angulo_medio": 1e-4,
+    "diametro_base": 1e-4, "altura": 1e-4, "volume": 1e-4, "area": 1e-4,
+}
+# Medição: desvio-padrão em fração da escala (contorno com ~1 px de erro:
+# volume e área, que somam o erro de todas as linhas, são os mais ruidosos)
+RUIDO_MEDICAO_PADRAO = {
+    "angulo_esq": 0.01, "angulo_dir": 0.01, "angulo_medio": 0.01,
+    "diametro_base": 0.005, "altura": 0.01, "volume": 0.02, "area": 0.01,
+}
+
+
+# =================================================================
+# BLOCO 1: GEOMETRIA (sólido de revolução)
+# =================================================================
+
+def perfil_radial(gota_pts: np.ndarray, baseline_y: float, eixo_x: float) -> Optional[np.ndarray]:
+    """
+    Raio da gota por linha (y inteiro) acima da baseline.
+
+    O raio de cada linha é metade da largura do contorno naquela linha
+    (média dos dois lados em torno do eixo: hipótese de axissimetria).
+
+    Returns:
+        Array Kx2 (y, raio) ordenado por y, ou None se não houver linhas válidas
+    """
+    pts = np.asarray(gota_pts, dtype=np.float64).reshape(-1, 2)
+    pts = pts[pts[:, 1] <= baseline_y]
+    if len(pts) < 3:
+        return None
+    linhas = np.round(pts[:, 1]).astype(np.int64)
+    y0 = int(linhas.min())
+    n = int(linhas.max()) - y0 + 1
+    x_min = np.full(n, np.inf)
+    x_max = np.full(n, -np.inf)
+    np.minimum.at(x_min, linhas - y0, pts[:, 0])
+    np.maximum.at(x_max, linhas - y0, pts[:, 0])
+    # linhas com pontos dos dois lados do eixo
+    validas = (x_min <= eixo_x) & (x_max >= eixo_x) & (x_max > x_min)
+    if not np.any(validas):
+        return None
+    ys = np.nonzero(validas)[0] + y0
+    raio = (x_max[validas] - x_min[validas]) / 2.0
+    return np.column_stack([ys.astype(np.float64), raio])
+
+
+def volume_area_revolucao(gota_pts: np.ndarray, baseline_y: float, eixo_x: float,
+                          escala: float = 1.0) -> Dict[str, float]:
+    """
+    Volume e área lateral do sólido de revolução do perfil em torno do eixo.
+
+    Integração trapezoidal vetorizada: V = ∫ π r² dy, A = ∫ 2π r ds, com
+    ds = √(dr² + dy²). O trecho entre a última linha detectada e a baseline
+    é incluído com o raio da última linha.
+
+    Args:
+        escala: unidades físicas por pixel (ex.: mm/px); volume em escala³
+
+    Returns:
+        {'volume', 'area', 'raio_base'} (NaN se o perfil for inválido)
+    """
+    perfil = perfil_radial(gota_pts, baseline_y, eixo_x)
+    if perfil is None or len(perfil) < 2:
+        return {"volume": float("nan"), "area": float("nan"), "raio_base": float("nan")}
+    y, r = perfil[:, 0], perfil[:, 1]
+    if y[-1] < baseline_y:
+        y = np.append(y, baseline_y)
+        r = np.append(r, r[-1])
+    dy = np.diff(y)
+    dr = np.diff(r)
+    volume = float(np.sum(math.pi * (r[:-1] ** 2 + r[1:] ** 2) / 2.0 * dy))
+    area = float(np.sum(math.pi * (r[:-1] + r[1:]) * np.hypot(dr, dy)))
+    return {"volume": volume * escala ** 3, "area": area * escala ** 2, "raio_base": float(r[-1]) * escala}
+
+
+# =================================================================
+# BLOCO 2: FILTROS ONLINE (memória constante)
+# =================================================================
+
+class FiltroExponencial:
+    """Média móvel exponencial com constante de tempo tau (s), robusta a dt variável."""
+
+    __slots__ = ("tau", "valor", "_t")
+
+    def __init__(self, tau: float = 1.0):
+        self.tau = float(tau)
+        self.valor: Optional[float] = None
+        self._t: Optional[float] = None
+
+    def atualizar(self, t: float, medida: float) -> float:
+        if not np.isfinite(medida):
+            return self.valor if self.valor is not None else float("nan")
+        if self.valor is None:
+            self.valor = float(medida)
+        else:
+            alfa = 1.0 - math.exp(-max(t - self._t, 0.0) / self.tau) if self.tau > 0 else 1.0
+            self.valor += alfa * (float(medida) - self.valor)
+        self._t = t
+        return self.valor
+
+
+class FiltroKalman1D:
+    """
+    Kalman de velocidade constante: estado (valor, taxa), medida = valor.
+
+    Além do valor suavizado fornece a taxa (ex.: dV/dt na evaporação).
+    Medidas não finitas são tratadas como ausentes (só a predição avança).
+
+    Com relativo=True os ruídos são frações da escala do sinal, fixada pela
+    primeira medida finita (q × escala², (r × escala)²).
+    """
+
+    __slots__ = ("q", "r", "relativo", "x", "P", "_t")
+
+    def __init__(self, ruido_processo: float = 1.0, ruido_medicao: float = 1.0, relativo: bool = False):
+        self.q = float(ruido_processo)
+        self.r = float(ruido_medicao) ** 2
+        self.relativo = bool(relativo)
+        self.x: Optional[np.ndarray] = None
+        self.P = np.eye(2) * 1e3
+        self._t: Optional[float] = None
+
+    def atualizar(self, t: float, medida: float):
+        if self.x is None:
+            if not np.isfinite(medida):
+                return float("nan"), float("nan")
+            escala = (abs(float(medida)) or 1.0) if self.relativo else 1.0
+            self.q *= escala ** 2
+            self.r *= escala ** 2
+            self.x = np.array([float(medida), 0.0])
+            self.P = np.diag([self.r, 1e3 * escala ** 2])
+            self._t = t
+            return float(self.x[0]), 0.0
+
+        dt = max(t - self._t, 0.0)
+        self._t = t
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        # ruído de aceleração branca (modelo discreto padrão)
+        Q = self.q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+
+        if np.isfinite(medida):
+            s = self.P[0, 0] + self.r
+            k = self.P[:, 0] / s
+            self.x = self.x + k * (float(medida) - self.x[0])
+            self.P = self.P - np.outer(k, self.P[0, :])
+        return float(self.x[0]), float(self.x[1])
+
+
+# =================================================================
+# BLOCO 3: RASTREADOR DE CINÉTICA
+# =================================================================
+
+CAMPOS = ("angulo_esq", "angulo_dir", "angulo_medio", "diametro_base", "altura", "volume", "area")
+
+
+class RastreadorCinetica:
+    """
+    Consome resultados por quadro (contorno, baseline, pontos de contato,
+    ângulos) e produz as curvas derivadas suavizadas online.
+
+    Nenhum contorno é retido: cada quadro vira uma amostra (dicionário) que
+    é entregue ao callback e/ou escrita numa linha de CSV, e o estado dos
+    filtros tem tamanho fixo — adequado a experimentos com 10^5+ quadros.
+    """
+
+    def __init__(self,
+                 escala: float = 1.0,
+                 filtro: str = "kalman",
+                 tau: float = 1.0,
+                 ruido_processo: Optional[Dict[str, float]] = None,
+                 ruido_medicao: Optional[Dict[str, float]] = None,
+                 saida_csv: Optional[TextIO] = None,
+                 callback: Optional[Callable[[Dict[str, float]], None]] = None):
+        """
+        Args:
+            escala: unidades físicas por pixel (volume/área/diâmetro/altura)
+            filtro: "kalman" (valor + taxa) ou "exponencial"
+            tau: constante de tempo (s) do filtro exponencial
+            ruido_processo: ruído de processo por campo (Kalman), relativo
+                à escala do sinal; sobrepõe RUIDO_PROCESSO_PADRAO
+            ruido_medicao: desvio da medição por campo (Kalman), relativo à
+                escala do sinal; sobrepõe RUIDO_MEDICAO_PADRAO
+            saida_csv: arquivo texto aberto para gravar uma linha por quadro
+            callback: recebe cada amostra processada
+        """
+        if filtro not in ("kalman", "exponencial"):
+            raise ValueError("filtro deve ser 'kalman' ou 'exponencial'")
+        self.escala = float(escala)
+        self.filtro = filtro
+        q = dict(RUIDO_PROCESSO_PADRAO, **(ruido_processo or {}))
+        r = dict(RUIDO_MEDICAO_PADRAO, **(ruido_medicao or {}))
+        if filtro == "kalman":
+            self._filtros = {c: FiltroKalman1D(q[c], r[c], relativo=True) for c in CAMPOS}
+        else:
+            self._filtros = {c: FiltroExponencial(tau) for c in CAMPOS}
+        self.callback = callback
+        self._csv = None
+        if saida_csv is not None:
+            colunas = ["t", "quadro"] + [c for c in CAMPOS] + [f"{c}_suave" for c in CAMPOS]
+            if filtro == "kalman":
+                colunas += [f"{c}_taxa" for c in CAMPOS]
+            self._csv = csv.DictWriter(saida_csv, fieldnames=colunas, extrasaction="ignore")
+            self._csv.writeheader()
+        self.n_quadros = 0
+        self.ultima: Optional[Dict[str, float]] = None
+
+    def medir(self,
+              gota_pts: Optional[np.ndarray],
+              baseline_y: Optional[float],
+              p_esq: Optional[Sequence[float]],
+              p_dir: Optional[Sequence[float]],
+              angulo_esq: float = float("nan"),
+              angulo_dir: float = float("nan")) -> Dict[str, float]:
+        """Grandezas brutas de um quadro (NaN quando não mensuráveis)."""
+        nan = float("nan")
+        m = {c: nan for c in CAMPOS}
+        m["angulo_esq"] = float(angulo_esq)
+        m["angulo_dir"] = float(angulo_dir)
+        if np.isfinite(angulo_esq) and np.isfinite(angulo_dir):
+            m["angulo_medio"] = (float(angulo_esq) + float(angulo_dir)) / 2.0
+        if gota_pts is None or baseline_y is None or p_esq is None or p_dir is None:
+            return m
+        m["diametro_base"] = abs(float(p_dir[0]) - float(p_esq[0])) * self.escala
+        y_apice = float(np.min(np.asarray(gota_pts)[:, 1]))
+        m["altura"] = (float(baseline_y) - y_apice) * self.escala
+        eixo_x = (float(p_esq[0]) + float(p_dir[0])) / 2.0
+        va = volume_area_revolucao(gota_pts, float(baseline_y), eixo_x, self.escala)
+        m["volume"] = va["volume"]
+        m["area"] = va["area"]
+        return m
+
+    def atualizar(self, t: float, gota_pts=None, baseline_y=None, p_esq=None, p_dir=None,
+                  angulo_esq: float = float("nan"), angulo_dir: float = float("nan")) -> Dict[str, float]:
+        """Processa um quadro no instante t (s) e retorna a amostra bruta + suavizada."""
+        bruto = self.medir(gota_pts, baseline_y, p_esq, p_dir, angulo_esq, angulo_dir)
+        amostra: Dict[str, float] = {"t": float(t), "quadro": self.n_quadros}
+        amostra.update(bruto)
+        for c in CAMPOS:
+            saida = self._filtros[c].atualizar(float(t), bruto[c])
+            if self.filtro == "kalman":
+                amostra[f"{c}_suave"], amostra[f"{c}_taxa"] = saida
+            else:
+                amostra[f"{c}_suave"] = saida
+        self.n_quadros += 1
+        self.ultima = amostra
+        if self._csv is not None:
+            self._csv.writerow(amostra)
+        if self.callback is not None:
+            self.callback(amostra)
+        return amostra
+
+    def atualizar_resultado(self, t: float, resultado: Dict) -> Dict[str, float]:
+        """Atalho para os dicionários de pipeline.analise.analisar_imagem."""
+        nan = float("nan")
+        return self.atualizar(
+            t, resultado.get("gota_pts"), resultado.get("baseline_y"),
+            resultado.get("p_esq"), resultado.get("p_dir"),
+            resultado.get("angulo_esq", nan), resultado.get("angulo_dir", nan),
+        )
@@ -0,0 +1,166 @@
+import csv
+import math
+from typing import Callable, Dict, List, Optional, Sequence, TextIO
+
+# =================================================================
+# CONFIGURAÇÕES DO DETECTOR (CUSUM sobre a velocidade da linha de contato)
+# =================================================================
+CUSUM_K = 0.5            # folga (em desvios) antes de acumular evidência
+CUSUM_H = 8.0            # limiar de alarme (em desvios acumulados)
+AQUECIMENTO_QUADROS = 10 # quadros iniciais usados só para estimar o ruído
+ALFA_RUIDO = 0.02        # taxa de atualização da variância do ruído (estado fixado)
+SIGMA_MIN = 0.05         # piso do desvio da velocidade (px/s)
+
+COLUNAS_EVENTOS = ("lado", "tipo", "t", "quadro", "t_inicio", "quadro_inicio", "angulo",
+                   "velocidade", "movimento", "deslocamento")
+
+FIXADO = "fixado"
+AVANCANDO = "avancando"
+RECUANDO = "recuando"
+
+
+class _CusumLado:
+    """
+    Estado de um lado da linha de contato.
+
+    Velocidade para fora da gota (v > 0 = avanço) normalizada pelo ruído
+    estimado enquanto a linha está fixada. Page-CUSUM bilateral detecta o
+    descolamento; um terceiro CUSUM sobre |v| detecta a nova fixação.
+    Tudo O(1) por quadro.
+    """
+
+    def __init__(self, sinal: float):
+        self.sinal = sinal           # -1 (esquerda: para fora = x diminui), +1 (direita)
+        self.estado = FIXADO
+        self.x_ant: Optional[float] = None
+        self.t_ant: Optional[float] = None
+        self.n = 0
+        self.var = 0.0
+        self.g_pos = self.g_neg = self.g_fix = 0.0
+        # candidato a instante de mudança: último quadro em que cada CUSUM zerou
+        self.ref_pos = self.ref_neg = self.ref_fix = None
+        # média online do ângulo durante o movimento
+        self.soma_ang = 0.0
+        self.n_ang = 0
+        self.inicio = None
+
+    @property
+    def sigma(self) -> float:
+        return max(math.sqrt(self.var), SIGMA_MIN)
+
+    def atualizar(self, t: float, x: float, angulo: float, quadro: int) -> Optional[Dict]:
+        ponto = {"t": t, "quadro": quadro, "x": x, "angulo": angulo}
+        if self.x_ant is None or t <= self.t_ant:
+            self.x_ant, self.t_ant = x, t
+            self.ref_pos = self.ref_neg = self.ref_fix = ponto
+            return None
+        v = self.sinal * (x - self.x_ant) / (t - self.t_ant)
+        self.x_ant, self.t_ant = x, t
+        self.n += 1
+
+        if self.n <= AQUECIMENTO_QUADROS:
+            # média de v² como estimativa inicial do ruído (linha supostamente fixada)
+            self.var += (v * v - self.var) / self.n
+            return None
+
+        z = v / self.sigma
+        if self.estado == FIXADO:
+            self.var += ALFA_RUIDO * (v * v - self.var)
+            self.g_pos = max(0.0, self.g_pos + z - CUSUM_K)
+            self.g_neg = max(0.0, self.g_neg - z - CUSUM_K)
+            if self.g_pos == 0.0:
+                self.ref_pos = ponto
+            if self.g_neg == 0.0:
+                self.ref_neg = ponto
+            if self.g_pos > CUSUM_H or self.g_neg > CUSUM_H:
+                avanco = self.g_pos > CUSUM_H
+                self.estado = AVANCANDO if avanco else RECUANDO
+                self.inicio = self.ref_pos if avanco else self.ref_neg
+                self.g_pos = self.g_neg = self.g_fix = 0.0
+                self.ref_fix = ponto
+                self.soma_ang, self.n_ang = 0.0, 0
+                return {"tipo": self.estado, "t": t, "quadro": quadro, "velocidade": v,
+                        "t_inicio": self.inicio["t"], "quadro_inicio": self.inicio["quadro"],
+                        "angulo": self.inicio["angulo"]}
+            return None
+
+        # em movimento: acumula o ângulo e procura a nova fixação (|v| ~ 0)
+        if math.isfinite(angulo):
+            self.soma_ang += angulo
+            self.n_ang += 1
+        self.g_fix = max(0.0, self.g_fix + (CUSUM_K - abs(z)))
+        if self.g_fix == 0.0:
+            self.ref_fix = ponto
+        if self.g_fix > CUSUM_H:
+            evento = {"tipo": FIXADO, "t": t, "quadro": quadro, "velocidade": v,
+                      "t_inicio": self.ref_fix["t"], "quadro_inicio": self.ref_fix["quadro"],
+                      "movimento": self.estado,
+                      "angulo": self.soma_ang / self.n_ang if self.n_ang else float("nan"),
+                      "deslocamento": abs(x - self.inicio["x"]) if self.inicio else float("nan")}
+            self.estado = FIXADO
+            self.g_pos = self.g_neg = self.g_fix = 0.0
+            self.ref_pos = self.ref_neg = ponto
+            return evento
+        return None
+
+
+class DetectorLinhaContato:
+    """
+    Detector online de movimento da linha de contato (p_esq/p_dir ao longo
+    do tempo) para medir ângulos de avanço e recuo numa única passada.
+
+    Eventos emitidos por lado:
+        'avancando' / 'recuando': descolamento detectado. 't_inicio' é a
+            estimativa do instante da mudança (último zero do CUSUM) e
+            'angulo' o ângulo nesse instante (ângulo de avanço/recuo).
+        'fixado': a linha parou. 'angulo' é o ângulo médio durante o
+            movimento e 'deslocamento' o quanto a linha andou (px).
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None,
+                 saida_csv: Optional[TextIO] = None):
+        """
+        Args:
+            callback: recebe cada evento
+            saida_csv: arquivo texto aberto para gravar uma linha por evento
+        """
+        self.callback = callback
+        self.lados = {"esq": _CusumLado(-1.0), "dir": _CusumLado(+1.0)}
+        self.n_quadros = 0
+        self.eventos: List[Dict] = []
+        self._csv = None
+        if saida_csv is not None:
+            self._csv = csv.DictWriter(saida_csv, fieldnames=COLUNAS_EVENTOS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def estado(self, lado: str) -> str:
+        return self.lados[lado].estado
+
+    def atualizar(self,
+                  t: float,
+                  p_esq: Optional[Sequence[float]],
+                  p_dir: Optional[Sequence[float]],
+                  angulo_esq: float = float("nan"),
+                  angulo_dir: float = float("nan")) -> List[Dict]:
+        """Processa um quadro (t em segundos); retorna os eventos gerados."""
+        eventos = []
+        for lado, p, ang in (("esq", p_esq, angulo_esq), ("dir", p_dir, angulo_dir)):
+            if p is None or not math.isfinite(p[0]):
+                continue
+            ev = self.lados[lado].atualizar(float(t), float(p[0]), float(ang), self.n_quadros)
+            if ev is not None:
+                ev["lado"] = lado
+                eventos.append(ev)
+                if self._csv is not None:
+                    self._csv.writerow(ev)
+                if self.callback is not None:
+                    self.callback(ev)
+        self.n_quadros += 1
+        self.eventos.extend(eventos)
+        return eventos
+
+    def atualizar_resultado(self, t: float, resultado: Dict) -> List[Dict]:
+        """Atalho para os dicionários de pipeline.analise.analisar_imagem."""
+        nan = float("nan")
+        return self.atualizar(t, resultado.get("p_esq"), resultado.get("p_dir"),
+                              resultado.get("angulo_esq", nan), resultado.get("angulo_dir", nan))
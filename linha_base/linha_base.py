@@ -2,6 +2,8 @@ import cv2
 import numpy as np
 from typing import Tuple, Optional, Dict, List
 
+from processamento_imagem.indice_contorno import obter_indice
+
 # =================================================================
 # CONFIGURAÇÕES CIENTÍFICAS (baseado em ADSA e DropSnake)
 # =================================================================
@@ -30,18 +32,20 @@ def detect_baseline_tls(gota_pts: np.ndarray, bottom_fraction: float = 0.30, deb
         return 0.0, None
     
     # PASSO 1: Pega o piso REAL (máximo Y = ponto mais baixo)
-    y_max = float(np.max(gota_pts[:, 1]))
-    y_min = float(np.min(gota_pts[:, 1]))
+    idx = obter_indice(gota_pts)
+    y_max = idx.y_max
+    y_min = idx.y_min
     
     # PASSO 2: Encontra todos os pontos PRÓXIMOS ao piso (±5 pixels de contato)
+    # (nenhum ponto está abaixo de y_max: basta a faixa y >= y_max - tolerance)
     tolerance = 5.0
-    floor_pts = gota_pts[np.abs(gota_pts[:, 1] - y_max) <= tolerance]
+    floor_pts = idx.faixa(y_max - tolerance, None)
     
     if len(floor_pts) < 2:
         # Fallback: nenhum ponto encontrado? Use extremos
         if debug:
             print(f"[FLOOR-SEEKER] AVISO: Nenhum ponto no piso, usando extremos!")
-        x0 = float(np.mean(gota_pts[:, 0]))
+        x0 = idx.x_media
         return y_max, (1.0, 0.0, x0, y_max)
     
     # PASSO 3: Centro horizontal dos pontos de contato
@@ -61,6 +65,35 @@ def detect_baseline_tls(gota_pts: np.ndarray, bottom_fraction: float = 0.30, deb
 # BLOCO 2: EXTRAPOLAÇÃO POLINOMIAL (Método Científico)
 # =================================================================
 
+def _roi_lados(
+    gota_pts: np.ndarray,
+    roi_bottom: float = ROI_BOTTOM_EXCLUDE,
+    roi_top: float = ROI_TOP_EXCLUDE
+) -> Optional[Tuple[np.ndarray, np.ndarray, float, float, float]]:
+    """Separa os pontos da ROI de curvatura em (esquerda, direita, x_center, y_roi_top, y_roi_bottom)."""
+    idx = obter_indice(gota_pts)
+    y_min, y_max = idx.y_min, idx.y_max
+    height = y_max - y_min
+    
+    if height < 1:
+        return None
+    
+    # Define região de interesse (ROI): exclui extremos e foca na curvatura
+    y_roi_bottom = y_max - roi_bottom * height
+    y_roi_top = y_min + roi_top * height
+    
+    # Separa em esquerda e direita (o índice já guarda os lados ordenados por y)
+    left_pts = idx.faixa(y_roi_top, y_roi_bottom, lado="esq")
+    right_pts = idx.faixa(y_roi_top, y_roi_bottom, lado="dir")
+    
+    if len(left_pts) + len(right_pts) < MIN_POINTS_FOR_FIT:
+        return None
+    
+    x_center = idx.x_media
+    
+    return left_pts, right_pts, x_center, y_roi_top, y_roi_bottom
+
+
 def find_contact_points_by_extrapolation(
     gota_pts: np.ndarray,
     baseline_y: float,
@@ -75,31 +108,13 @@ def find_contact_points_by_extrapolation(
     if gota_pts is None or len(gota_pts) < MIN_POINTS_FOR_FIT:
         return None, None
     
-    y_vals = gota_pts[:, 1]
-    y_min, y_max = float(np.min(y_vals)), float(np.max(y_vals))
-    height = y_max - y_min
-    
-    if height < 1:
+    lados = _roi_lados(gota_pts, roi_bottom, roi_top)
+    if lados is None:
         return None, None
-    
-    # Define região de interesse (ROI): exclui extremos e foca na curvatura
-    y_roi_bottom = y_max - roi_bottom * height
-    y_roi_top = y_min + roi_top * height
-    
-    roi_mask = (y_vals >= y_roi_top) & (y_vals <= y_roi_bottom)
-    roi_pts = gota_pts[roi_mask]
-    
-    if len(roi_pts) < MIN_POINTS_FOR_FIT:
-        return None, None
-    
-    x_center = float(np.mean(gota_pts[:, 0]))
+    left_pts, right_pts, x_center, y_roi_top, y_roi_bottom = lados
     
     if debug:
-        print(f"[EXTRAPOLAÇÃO] ROI: {len(roi_pts)} pontos entre Y={y_roi_top:.1f} e Y={y_roi_bottom:.1f}")
-    
-    # Separa em esquerda e direita
-    left_pts = roi_pts[roi_pts[:, 0] < x_center]
-    right_pts = roi_pts[roi_pts[:, 0] >= x_center]
+        print(f"[EXTRAPOLAÇÃO] ROI: {len(left_pts) + len(right_pts)} pontos entre Y={y_roi_top:.1f} e Y={y_roi_bottom:.1f}")
     
     def extrapolate_side(pts, side_name):
         if len(pts) < MIN_POINTS_FOR_FIT:
@@ -150,22 +165,64 @@ def find_contact_points_by_extrapolation(
     return p_esq, p_dir
 
 
+def estatisticas_extrapolacao(
+    gota_pts: np.ndarray,
+    roi_bottom: float = ROI_BOTTOM_EXCLUDE,
+    roi_top: float = ROI_TOP_EXCLUDE,
+    degree: int = POLYFIT_DEGREE
+) -> Dict:
+    """
+    Estatísticas dos ajustes x = P(y) usados na extrapolação (por lado).
+
+    Returns:
+        {'esq': {...}, 'dir': {...}, 'r_squared': média dos lados válidos},
+        com 'n', 'rms' (px) e 'r_squared' por lado (None se o lado não ajustou)
+    """
+    vazio = {'n': 0, 'rms': None, 'r_squared': None}
+    out = {'esq': dict(vazio), 'dir': dict(vazio), 'r_squared': None}
+    if gota_pts is None or len(gota_pts) < MIN_POINTS_FOR_FIT:
+        return out
+    lados = _roi_lados(gota_pts, roi_bottom, roi_top)
+    if lados is None:
+        return out
+    
+    r2_validos = []
+    for nome, pts in (('esq', lados[0]), ('dir', lados[1])):
+        if len(pts) < MIN_POINTS_FOR_FIT:
+            continue
+        ys = pts[:, 1].astype(np.float64)
+        xs = pts[:, 0].astype(np.float64)
+        try:
+            coeffs = np.polyfit(ys, xs, degree)
+        except Exception:
+            continue
+        res = xs - np.polyval(coeffs, ys)
+        ss_res = float(np.sum(res ** 2))
+        ss_tot = float(np.sum((xs - xs.mean()) ** 2))
+        r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0
+        out[nome] = {'n': int(len(pts)), 'rms': float(np.sqrt(ss_res / len(pts))), 'r_squared': r2}
+        r2_validos.append(r2)
+    
+    if r2_validos:
+        out['r_squared'] = float(np.mean(r2_validos))
+    return out
+
+
 def fallback_geometric(gota_pts: np.ndarray, baseline_y: float, debug: bool = False) -> Tuple[Optional[List[float]], Optional[List[float]]]:
 
     if debug:
         print("[FALLBACK] Usando detecção geométrica simples")
     
     tolerance = 5
-    near_baseline = gota_pts[np.abs(gota_pts[:, 1] - baseline_y) < tolerance]
+    idx = obter_indice(gota_pts)
+    near_baseline = idx.faixa(baseline_y - tolerance, baseline_y + tolerance, incl_lo=False, incl_hi=False)
     
     if len(near_baseline) >= 2:
         x_min = float(np.min(near_baseline[:, 0]))
         x_max = float(np.max(near_baseline[:, 0]))
         return [x_min, baseline_y], [x_max, baseline_y]
     
-    x_min = float(np.min(gota_pts[:, 0]))
-    x_max = float(np.max(gota_pts[:, 0]))
-    return [x_min, baseline_y], [x_max, baseline_y]
+    return [idx.x_min, baseline_y], [idx.x_max, baseline_y]
 
 
 # =================================================================
@@ -200,6 +257,9 @@ def detectar_baseline_hibrida(gota_pts: np.ndarray, debug: bool = False) -> Dict
     # 2. Encontrar pontos de contato via extrapolação polinomial
     p_esq, p_dir = find_contact_points_by_extrapolation(gota_pts, baseline_y, debug=debug)
     
+    # 2b. Qualidade real dos ajustes de extrapolação (R² e RMS por lado)
+    stats = estatisticas_extrapolacao(gota_pts)
+    
     # 3. Refinar line_params baseado nos pontos finais
     # ⚠️ MAS NÃO SOBRESCREVER baseline_y! Já temos o valor correto (Y_max)
     if p_esq is not None and p_dir is not None:
@@ -224,7 +284,8 @@ def detectar_baseline_hibrida(gota_pts: np.ndarray, debug: bool = False) -> Dict
         'p_dir': _norm_pt(p_dir),
         'method': 'floor_seeker_hybrid',
         'contact_method': 'polynomial_extrapolation',
-        'r_squared': 1.0
+        'r_squared': stats['r_squared'],
+        'fit_stats': {'esq': stats['esq'], 'dir': stats['dir']}
     }
 
 
@@ -237,14 +298,13 @@ def encontrar_pontos_contato_base(gota_pts: np.ndarray, band_px: int = 2) -> Tup
     if gota_pts is None or len(gota_pts) == 0:
         return 0.0, [0.0, 0.0], [0.0, 0.0]
     
-    y_max = float(np.max(gota_pts[:, 1]))
-    band_pts = gota_pts[gota_pts[:, 1] >= (y_max - band_px)]
+    idx = obter_indice(gota_pts)
+    y_max = idx.y_max
+    band_pts = idx.faixa(y_max - band_px, None)
     
     if len(band_pts) >= 2:
         x_min = float(np.min(band_pts[:, 0]))
         x_max = float(np.max(band_pts[:, 0]))
         return y_max, [x_min, y_max], [x_max, y_max]
     
-    x_min = float(np.min(gota_pts[:, 0]))
-    x_max = float(np.max(gota_pts[:, 0]))
-    return y_max, [x_min, y_max], [x_max, y_max]
+    return y_max, [idx.x_min, y_max], [idx.x_max, y_max]
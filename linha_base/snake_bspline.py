@@ -0,0 +1,274 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES DO SNAKE (refinamento local estilo DropSnake)
+# =================================================================
+ALTURA_JANELA_SNAKE = 60.0   # px acima da baseline refinados em cada lado
+EXCLUI_BASE_PX = 1.5         # faixa junto à baseline ignorada (borda inferior da máscara)
+PONTOS_POR_CONTROLE = 4      # amostras do contorno por ponto de controle da B-spline
+MIN_PONTOS_SNAKE = 12
+RIGIDEZ = 0.1                # peso da energia de flexão (2ª diferença dos controles)
+PASSO_PX = 0.25              # deslocamento máximo por iteração devido à força externa
+SIGMA_GRADIENTE = 1.5        # suavização antes do gradiente (px)
+MARGEM_CAMPO_PX = 10         # folga da caixa onde o campo de forças é calculado
+MAX_ITER_SNAKE = 200
+TOL_SNAKE_PX = 0.005         # parada: maior deslocamento de uma amostra por iteração
+MAX_DESVIO_CONTATO_PX = 10.0 # refinamento que move o contato mais que isso é descartado
+
+
+# =================================================================
+# BLOCO 1: B-SPLINE CÚBICA UNIFORME (base esparsa: 4 pesos por amostra)
+# =================================================================
+
+def _base(u: np.ndarray, n_ctrl: int, derivada: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Índices (N×4) e pesos (N×4) dos controles que afetam cada parâmetro u."""
+    k = np.clip(np.floor(u).astype(np.intp), 0, n_ctrl - 4)
+    t = u - k
+    t2 = t * t
+    if derivada:
+        w = np.stack([-3 * (1 - t) ** 2, 9 * t2 - 12 * t, -9 * t2 + 6 * t + 3, 3 * t2], axis=1) / 6.0
+    else:
+        t3 = t2 * t
+        w = np.stack([(1 - t) ** 3, 3 * t3 - 6 * t2 + 4, -3 * t3 + 3 * t2 + 3 * t + 1, t3], axis=1) / 6.0
+    return k[:, None] + np.arange(4), w
+
+
+def _avaliar(idx: np.ndarray, w: np.ndarray, ctrl: np.ndarray) -> np.ndarray:
+    """B·c em O(N)."""
+    return np.einsum("nk,nkd->nd", w, ctrl[idx])
+
+
+def _transpor(idx: np.ndarray, w: np.ndarray, f: np.ndarray, n_ctrl: int) -> np.ndarray:
+    """Bᵀ·f em O(N)."""
+    out = np.empty((n_ctrl, f.shape[1]))
+    for d in range(f.shape[1]):
+        out[:, d] = np.bincount(idx.ravel(), weights=(w * f[:, d:d + 1]).ravel(), minlength=n_ctrl)
+    return out
+
+
+# =================================================================
+# BLOCO 2: SISTEMA EM BANDA (largura 3) — fatoração única, O(M) por solve
+# =================================================================
+# band[o, j] = S[j, j + o] (parte superior da matriz simétrica)
+
+def _banda_gram(idx: np.ndarray, w: np.ndarray, n_ctrl: int) -> np.ndarray:
+    band = np.zeros((4, n_ctrl))
+    for a in range(4):
+        for b in range(a, 4):
+            band[b - a] += np.bincount(idx[:, a], weights=w[:, a] * w[:, b], minlength=n_ctrl)
+    return band
+
+
+def _banda_flexao(n_ctrl: int) -> np.ndarray:
+    """DᵀD para a 2ª diferença c[r] - 2c[r+1] + c[r+2]."""
+    band = np.zeros((4, n_ctrl))
+    for r in range(n_ctrl - 2):
+        band[0, r] += 1.0
+        band[0, r + 1] += 4.0
+        band[0, r + 2] += 1.0
+        band[1, r] += -2.0
+        band[1, r + 1] += -2.0
+        band[2, r] += 1.0
+    return band
+
+
+def _cholesky_banda(band: np.ndarray) -> np.ndarray:
+    """Fator L (S = L·Lᵀ) em banda: L[o, j] = L[j + o, j]."""
+    nb, m = band.shape
+    b = nb - 1
+    L = np.zeros_like(band)
+    for j in range(m):
+        for i in range(j, min(m, j + nb)):
+            s = band[i - j, j]
+            for k in range(max(0, i - b), j):
+                s -= L[i - k, k] * L[j - k, k]
+            if i == j:
+                if s <= 0:
+                    raise np.linalg.LinAlgError("matriz do snake não é definida positiva")
+                L[0, j] = math.sqrt(s)
+            else:
+                L[i - j, j] = s / L[0, j]
+    return L
+
+
+def _resolver_banda(L: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    nb, m = L.shape
+    b = nb - 1
+    y = np.array(rhs, dtype=np.float64)
+    for i in range(m):
+        for k in range(max(0, i - b), i):
+            y[i] -= L[i - k, k] * y[k]
+        y[i] /= L[0, i]
+    for i in range(m - 1, -1, -1):
+        for k in range(i + 1, min(m, i + nb)):
+            y[i] -= L[k - i, i] * y[k]
+        y[i] /= L[0, i]
+    return y
+
+
+# =================================================================
+# BLOCO 3: ENERGIA EXTERNA (gradiente da imagem)
+# =================================================================
+
+def _campo_forcas(gray: np.ndarray, caixa: Tuple[int, int, int, int], sigma: float):
+    """
+    Força = ∇(|∇I|²) na caixa, normalizada para módulo máximo 1.
+
+    Aponta para o máximo do gradiente (a borda real da gota) dos dois lados.
+    """
+    x0, y0, x1, y1 = caixa
+    sub = gray[y0:y1, x0:x1].astype(np.float32)
+    if sigma > 0:
+        sub = cv2.GaussianBlur(sub, (0, 0), sigma)
+    gx = cv2.Sobel(sub, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(sub, cv2.CV_32F, 0, 1, ksize=3)
+    energia = gx * gx + gy * gy
+    fx = cv2.Sobel(energia, cv2.CV_32F, 1, 0, ksize=3)
+    fy = cv2.Sobel(energia, cv2.CV_32F, 0, 1, ksize=3)
+    escala = float(np.sqrt(fx * fx + fy * fy).max())
+    if escala > 0:
+        fx /= escala
+        fy /= escala
+    return fx, fy
+
+
+def _amostrar(campo: np.ndarray, pts: np.ndarray, origem: Tuple[int, int]) -> np.ndarray:
+    """Interpolação bilinear vetorizada (remap) do campo nos pontos."""
+    mx = (pts[:, 0] - origem[0]).astype(np.float32).reshape(-1, 1)
+    my = (pts[:, 1] - origem[1]).astype(np.float32).reshape(-1, 1)
+    return cv2.remap(campo, mx, my, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0).ravel()
+
+
+# =================================================================
+# BLOCO 4: SNAKE POR LADO
+# =================================================================
+
+def _trecho_lado(gota_pts: np.ndarray, baseline_y: float, center_x: float, lado: str,
+                 altura: float, exclui_base: float) -> Optional[np.ndarray]:
+    """Maior trecho contíguo do contorno do lado, na janela acima da baseline, começando embaixo."""
+    pts = np.asarray(gota_pts, dtype=np.float64).reshape(-1, 2)
+    no_lado = pts[:, 0] < center_x if lado == "esq" else pts[:, 0] > center_x
+    mask = no_lado & (pts[:, 1] >= baseline_y - altura) & (pts[:, 1] <= baseline_y - exclui_base)
+    if not mask.any():
+        return None
+    if not mask.all():
+        # o contorno é fechado: gira para começar num ponto fora da janela
+        k = int(np.argmin(mask))
+        mask = np.roll(mask, -k)
+        pts = np.roll(pts, -k, axis=0)
+        d = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+        ini, fim = np.nonzero(d == 1)[0], np.nonzero(d == -1)[0]
+        j = int(np.argmax(fim - ini))
+        pts = pts[ini[j]:fim[j]]
+    if len(pts) < MIN_PONTOS_SNAKE:
+        return None
+    return pts[::-1] if pts[0, 1] < pts[-1, 1] else pts
+
+
+def refinar_lado(gray: np.ndarray, trecho: np.ndarray, baseline_y: float, lado: str,
+                 rigidez: float = RIGIDEZ, passo_px: float = PASSO_PX, sigma: float = SIGMA_GRADIENTE,
+                 max_iter: int = MAX_ITER_SNAKE, tol_px: float = TOL_SNAKE_PX) -> Optional[Dict]:
+    """
+    Ajusta uma B-spline ao trecho e a deixa evoluir no campo de gradiente.
+
+    Passo semi-implícito: (G + β·K)·c' = G·c + Bᵀ·f(B·c), com G = BᵀB e K
+    a flexão; a matriz é constante e em banda, fatorada uma vez. Cada
+    iteração custa O(N) (amostragem, força, Bᵀf) + O(M) (solve em banda).
+    """
+    n = len(trecho)
+    n_ctrl = max(6, n // PONTOS_POR_CONTROLE)
+    seg = np.hypot(*np.diff(trecho, axis=0).T)
+    s = np.concatenate([[0.0], np.cumsum(seg)])
+    if s[-1] <= 0:
+        return None
+    u = s / s[-1] * (n_ctrl - 3) * (1 - 1e-9)
+    idx, w = _base(u, n_ctrl)
+    G = _banda_gram(idx, w, n_ctrl)
+    K = _banda_flexao(n_ctrl)
+    beta = rigidez * PONTOS_POR_CONTROLE
+    try:
+        # inicialização: mínimos quadrados (com um pouco de flexão) ao contorno atual
+        ctrl = _resolver_banda(_cholesky_banda(G + 1e-3 * K), _transpor(idx, w, trecho, n_ctrl))
+        L = _cholesky_banda(G + beta * K)
+    except np.linalg.LinAlgError:
+        return None
+
+    h, wd = gray.shape[:2]
+    x0 = int(max(0, np.floor(trecho[:, 0].min()) - MARGEM_CAMPO_PX))
+    x1 = int(min(wd, np.ceil(trecho[:, 0].max()) + MARGEM_CAMPO_PX + 1))
+    y0 = int(max(0, np.floor(trecho[:, 1].min()) - MARGEM_CAMPO_PX))
+    y1 = int(min(h, np.ceil(trecho[:, 1].max()) + MARGEM_CAMPO_PX + 1))
+    if x1 - x0 < 8 or y1 - y0 < 8:
+        return None
+    fx, fy = _campo_forcas(gray, (x0, y0, x1, y1), sigma)
+
+    pts = _avaliar(idx, w, ctrl)
+    inicial = pts.copy()
+    it = 0
+    for it in range(1, max_iter + 1):
+        f = np.column_stack([_amostrar(fx, pts, (x0, y0)), _amostrar(fy, pts, (x0, y0))]) * passo_px
+        rhs = _transpor(idx, w, pts + f, n_ctrl)   # G·c + Bᵀf = Bᵀ(B·c + f)
+        ctrl = _resolver_banda(L, rhs)
+        novos = _avaliar(idx, w, ctrl)
+        mov = float(np.max(np.hypot(*(novos - pts).T)))
+        pts = novos
+        if mov < tol_px:
+            break
+
+    # Ponto de contato: extrapola a tangente da extremidade inferior até a baseline
+    i0, w0 = _base(np.array([0.0]), n_ctrl)
+    di, dw = _base(np.array([0.0]), n_ctrl, derivada=True)
+    p0 = _avaliar(i0, w0, ctrl)[0]
+    d = _avaliar(di, dw, ctrl)[0]
+    if d[1] >= -1e-9:
+        return None  # tangente não sobe a partir da base: extrapolação indefinida
+    lam = (p0[1] - baseline_y) / d[1]
+    contato = p0 - lam * d
+    sobe = -d[1]
+    theta = math.degrees(math.atan2(sobe, d[0] if lado == "esq" else -d[0]))
+    return {"ponto": [float(contato[0]), float(baseline_y)], "angulo": float(theta),
+            "iteracoes": it, "deslocamento_medio": float(np.mean(np.hypot(*(pts - inicial).T))),
+            "curva": pts}
+
+
+def refinar_contato_snake(imagem: np.ndarray,
+                          gota_pts: np.ndarray,
+                          baseline_y: float,
+                          p_esq: Optional[List[float]],
+                          p_dir: Optional[List[float]],
+                          altura: float = ALTURA_JANELA_SNAKE,
+                          **kwargs) -> Dict:
+    """
+    Refina os pontos de contato com um snake B-spline em cada lado.
+
+    O snake parte do contorno atual perto da linha de contato e evolui contra
+    a energia de gradiente da imagem (mesmas coordenadas do contorno). O ponto
+    de contato é a extrapolação da tangente da curva refinada até a baseline;
+    o ângulo dessa tangente é devolvido também. Lado que falha mantém o ponto
+    de entrada.
+
+    Returns:
+        {'p_esq', 'p_dir', 'angulo_esq', 'angulo_dir', 'lados': {lado: info}}
+    """
+    saida = {"p_esq": p_esq, "p_dir": p_dir, "angulo_esq": float("nan"),
+             "angulo_dir": float("nan"), "lados": {}}
+    if imagem is None or gota_pts is None or p_esq is None or p_dir is None:
+        return saida
+    gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY) if imagem.ndim == 3 else imagem
+    center_x = (p_esq[0] + p_dir[0]) / 2.0
+    for lado in ("esq", "dir"):
+        trecho = _trecho_lado(gota_pts, baseline_y, center_x, lado, altura, EXCLUI_BASE_PX)
+        if trecho is None:
+            continue
+        info = refinar_lado(gray, trecho, baseline_y, lado, **kwargs)
+        original = p_esq if lado == "esq" else p_dir
+        if info is None or abs(info["ponto"][0] - original[0]) > MAX_DESVIO_CONTATO_PX:
+            continue
+        saida["p_" + lado] = info["ponto"]
+        saida["angulo_" + lado] = info["angulo"]
+        saida["lados"][lado] = info
+    return saida
@@ -5,50 +5,8 @@ import customtkinter as ctk
 from PIL import Image, ImageTk
 from tkinter import filedialog, messagebox
 import os
+import time
 from datetime import datetime
-# tenta importar módulo de pré-processamento robusto; fallback para filtros se faltar
-try:
-    from processamento_imagem.preprocess import preprocess_image_for_contact_angle, save_debug_imgs
-    HAVE_PREPROCESS = True
-except Exception: 
-    HAVE_PREPROCESS = False
-    def preprocess_image_for_contact_angle(img_bgr):
-        # fallback: usa filtros.aplicar_pre_processamento que retorna (vis, bin)
-        try: 
-            res = filtros.aplicar_pre_processamento(img_bgr)
-            if isinstance(res, dict):
-                # suporta dicionário retornado
-                bin_img = res.get('binary') or res.get('bin')
-                enhanced = res.get('enhanced_gray') or res.get('gray')
-                if enhanced is not None and enhanced.ndim == 2:
-                    vis = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
-                else:
-                    vis = img_bgr
-            else:
-                # espera tuple (gray, bin) ou (vis, bin)
-                first, bin_img = res[0], res[1]
-                if first is None:
-                    vis = img_bgr
-                    enhanced = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-                elif first.ndim == 2:
-                    enhanced = first
-                    vis = cv2.cvtColor(first, cv2.COLOR_GRAY2BGR)
-                else:
-                    vis = first
-                    enhanced = cv2.cvtColor(first, cv2.COLOR_BGR2GRAY)
-        except Exception:
-            # última alternativa: converte para gray e faz threshold simples
-            gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-            _, bin_img = cv2.threshold(gray, 128, 255, cv2.THRESH_BINARY_INV+cv2.THRESH_OTSU)
-            vis = img_bgr
-        # garante tipos e formatos
-        if bin_img is None:
-            _, bin_img = cv2.threshold(enhanced, 128, 255, cv2.THRESH_BINARY_INV+cv2.THRESH_OTSU)
-        if bin_img.dtype != np.uint8:
-            bin_img = (bin_img.astype(np.uint8))
-        return {"binary": bin_img, "corrected_bgr": vis, "enhanced_gray": enhanced, "debug_imgs": {}}
-    def save_debug_imgs(debug_dict, out_dir, prefix="dbg"):
-        return None
 
 # Modifique o método toggle_camera para chamar select_camera
 def toggle_camera(self):
@@ -57,10 +15,49 @@ def toggle_camera(self):
     else:
         self.stop_camera()
 # ================= IMPORTS MODULARES =================
-from processamento_imagem import filtros, contorno
 from linha_base import linha_base
 from Cal_angulo import angulo_contato
+from Cal_angulo.ajuste_incremental import AjusteIncremental
+from linha_base.snake_bspline import refinar_contato_snake
 from visualizacao import desenho
+from pipeline import analise
+from pipeline.cache import digest_imagem, obter_cache_padrao
+from pipeline.autotune import carregar_perfil
+from pipeline.executor import ExecutorAnalise, obter_pool
+from pipeline.metricas import formatar_hud, obter_metricas
+from processamento_imagem.escritor_debug import EscritorDebug
+from captura.rajada import CapturaRajada
+from captura.sessao import GravadorSessao
+from processamento_imagem.roi_automatica import detectar_roi
+from pipeline.mudanca import DetectorMudanca
+from pipeline.segmentacao import usou_fallback
+from pipeline import progressivo
+from cinetica.cinetica import RastreadorCinetica
+from cinetica.linha_contato import DetectorLinhaContato
+
+DURACAO_RAJADA_S = 2.0   # duração da captura em rajada (botão "Rajada")
+FORMATO_RAJADA = "png"   # codificação sem perdas da rajada ("png" ou "tiff")
+HUD_INTERVALO_MS = 500   # atualização do HUD de desempenho (F3 liga/desliga)
+# Controles da janela de análise: (parâmetro, rótulo, mínimo, máximo, passos)
+CONTROLES_AJUSTE = [
+    ("clahe_clip", "CLAHE (clip)", 0.5, 6.0, 22),
+    ("adapt_C", "Limiar adaptativo (C)", -10, 15, 25),
+    ("fechamento_px", "Fechamento (px)", 0, 15, 15),
+    ("window_height", "Janela do ajuste (px)", 10, 150, 28),
+]
+PARAMS_PRE_AJUSTE = ("clahe_clip", "adapt_C")   # vão para pre_params (preprocess.py)
+
+_escritor_debug = None
+
+
+def obter_escritor_debug():
+    """Escritor assíncrono das imagens de debug (criado no primeiro uso)."""
+    global _escritor_debug
+    if _escritor_debug is None:
+        out_dir = os.path.join(os.path.expanduser("~"), "Pictures", "capturas_Angle", "debug")
+        _escritor_debug = EscritorDebug(out_dir)
+        obter_metricas().registrar_fila("debug", lambda: _escritor_debug.pendentes)
+    return _escritor_debug
 
 # ================= CONFIGURAÇÃO CTK =================
 ctk.set_appearance_mode("dark")
@@ -85,10 +82,23 @@ class SelectionWindow(ctk.CTk):
         self.raw_image = None
         self.cap = None
         self.camera_running = False
+        self.camera_id = None  # câmera de origem da imagem atual (perfil de parâmetros)
+        self.rajada = None     # última captura em rajada (sequência na RAM)
+        self.pasta_rajada = None
+        self.sessao = None     # GravadorSessao ativo (quadros ao vivo + ROI/parâmetros)
 
         self.roi_start = None
         self.roi_rect = None
         self.current_roi = None
+        self.roi_auto = False  # current_roi veio da detecção automática (arrastar substitui)
+        self.detector_mudanca = DetectorMudanca()  # ao vivo: só redetecta a ROI se a cena mudou
+
+        # HUD de desempenho (captura, desenho, análise)
+        self.metricas = obter_metricas()
+        self.hud_visivel = False
+        self.hud_texto = ""
+        self._t_ultimo_quadro = None
+        self._fps_camera = 0.0
 
         self.ratio = 1.0
         self.offset_x = 0
@@ -115,6 +125,16 @@ class SelectionWindow(ctk.CTk):
             fg_color="#4CAF50",
             command=self.capture_image
         )
+        self.btn_rajada = ctk.CTkButton(
+            top, text=f"Rajada {DURACAO_RAJADA_S:g}s",
+            fg_color="#FF8C00",
+            command=self.capture_burst
+        )
+        self.btn_sessao = ctk.CTkButton(
+            top, text="Gravar Sessão",
+            fg_color="#8B0000",
+            command=self.toggle_sessao
+        )
         # Não adiciona ao layout inicialmente (será feito quando câmera ligar)
         self.btn_capture_visible = False
 
@@ -126,6 +146,12 @@ class SelectionWindow(ctk.CTk):
         )
         self.btn_next.pack(side="right", padx=10)
 
+        # Indicador de progresso (visível só durante a análise em segundo plano)
+        self.progress = ctk.CTkProgressBar(top, mode="indeterminate", width=160)
+        self.progress_visible = False
+        self.executor = ExecutorAnalise(self)
+        self.executor_rajada = ExecutorAnalise(self)  # cinética da rajada (uma análise por vez)
+
         self.display_frame = ctk.CTkFrame(self, fg_color="#121212")
         self.display_frame.grid(row=1, column=0, padx=20, pady=(0, 20), sticky="nsew")
 
@@ -137,6 +163,7 @@ class SelectionWindow(ctk.CTk):
         self.canvas.bind("<Button-1>", self.start_roi)
         self.canvas.bind("<B1-Motion>", self.draw_roi)
         self.canvas.bind("<ButtonRelease-1>", self.end_roi)
+        self.bind("<F3>", lambda e: self.toggle_hud())
 
         # handler de fechamento
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -148,9 +175,12 @@ class SelectionWindow(ctk.CTk):
         )
         if path:
             self.stop_camera()
+            self.camera_id = None
+            self.rajada = None
             self.raw_image = cv2.imread(path)
             self.current_roi = None
             self.render_frame()
+            self._roi_automatica()
 
     def detect_cameras(self):
         """Detecta todas as câmeras disponíveis no sistema"""
@@ -214,9 +244,16 @@ class SelectionWindow(ctk.CTk):
             messagebox.showerror("Erro", f"Não foi possível abrir câmera {camera_id}")
             return
         self.camera_running = True
-        # Mostra o botão de capturar
+        self.camera_id = camera_id
+        self.rajada = None
+        self.detector_mudanca.reiniciar()
+        self._fps_camera = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self._t_ultimo_quadro = None
+        # Mostra os botões de capturar
         if not self.btn_capture_visible:
             self.btn_capture.pack(side="left", padx=10, after=self.master.winfo_children()[0] if self.master else None)
+            self.btn_rajada.pack(side="left", padx=10)
+            self.btn_sessao.pack(side="left", padx=10)
             self.btn_capture_visible = True
         self.update_camera()
 
@@ -269,22 +306,111 @@ class SelectionWindow(ctk.CTk):
 
     def stop_camera(self):
         self.camera_running = False
+        if self.rajada is not None and self.rajada.gravando:
+            self.rajada.parar()
+        self._parar_sessao()
         if self.cap:
             self.cap.release()
             self.cap = None
-        # Oculta o botão de capturar
+        # Oculta os botões de capturar
         if self.btn_capture_visible:
             self.btn_capture.pack_forget()
+            self.btn_rajada.pack_forget()
+            self.btn_sessao.pack_forget()
             self.btn_capture_visible = False
 
+    # ---------------- SESSÃO ----------------
+    def toggle_sessao(self):
+        """Liga/desliga a gravação da sessão ao vivo (reproduzível com captura/sessao.py)."""
+        if self.sessao is not None:
+            self._parar_sessao()
+            return
+        pasta = os.path.join(os.path.expanduser("~"), "Pictures", "capturas_Angle", "sessoes")
+        caminho = os.path.join(pasta, f"sessao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.angs")
+        try:
+            self.sessao = GravadorSessao(caminho, metadados={
+                "camera_id": self.camera_id,
+                "fps_camera": self._fps_camera,
+                "roi": self.current_roi,
+                "roi_auto": self.roi_auto,
+                "pre_params": carregar_perfil(self.camera_id) if self.camera_id is not None else None,
+            })
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível iniciar a gravação:\n{e}")
+            return
+        self.btn_sessao.configure(text="Parar Gravação")
+
+    def _parar_sessao(self):
+        if self.sessao is None:
+            return
+        sessao, self.sessao = self.sessao, None
+        self.btn_sessao.configure(text="Gravar Sessão")
+        # o fechamento espera a fila de codificação: fora da thread do Tk
+        # (quadros descartados ficam registrados nos metadados da sessão)
+        obter_pool().submit(sessao.fechar)
+
+    def _registrar_roi_sessao(self):
+        if self.sessao is not None:
+            self.sessao.gravar_metadados(roi=self.current_roi, roi_auto=self.roi_auto)
+
     def update_camera(self):
         if self.camera_running:
             ret, frame = self.cap.read()
             if ret:
+                self._medir_quadro()
                 self.raw_image = frame
+                if self.sessao is not None:
+                    self.sessao.gravar_quadro(frame)
                 self.render_frame()
+                # ROI automática acompanha a gota ao vivo até o usuário desenhar uma
+                if (self.roi_auto or self.current_roi is None) and self.detector_mudanca.mudou(frame):
+                    self._roi_automatica()
+                else:
+                    self._desenhar_roi()
+            else:
+                self.metricas.contar("falhas_leitura")
             self.after(15, self.update_camera)
 
+    def _medir_quadro(self):
+        """FPS de captura, intervalo entre quadros e estimativa de quadros perdidos."""
+        t = time.perf_counter()
+        self.metricas.marcar("captura", t)
+        if self._t_ultimo_quadro is not None:
+            dt = t - self._t_ultimo_quadro
+            self.metricas.registrar("intervalo_quadro", dt)
+            # a câmera entrega a ~fps nominal: um intervalo de k períodos no laço
+            # do Tk significa que o driver descartou ~k-1 quadros
+            if self._fps_camera > 0 and dt * self._fps_camera > 1.5:
+                self.metricas.contar("quadros_perdidos", int(round(dt * self._fps_camera)) - 1)
+        self._t_ultimo_quadro = t
+
+    # ---------------- HUD ----------------
+    def toggle_hud(self):
+        self.hud_visivel = not self.hud_visivel
+        if self.hud_visivel:
+            self._atualizar_hud()
+        else:
+            self.canvas.delete("hud")
+
+    def _atualizar_hud(self):
+        """Relê o retrato das métricas em baixa frequência (não a cada quadro)."""
+        if not self.hud_visivel:
+            return
+        self.hud_texto = formatar_hud(self.metricas.instantaneo()) or "sem medições"
+        self._desenhar_hud()
+        self.after(HUD_INTERVALO_MS, self._atualizar_hud)
+
+    def _desenhar_hud(self):
+        self.canvas.delete("hud")
+        if not self.hud_visivel:
+            return
+        texto = self.canvas.create_text(12, 12, text=self.hud_texto, anchor="nw", fill="#00FF7F",
+                                        font=("Consolas", 10), justify="left", tags="hud")
+        x1, y1, x2, y2 = self.canvas.bbox(texto)
+        fundo = self.canvas.create_rectangle(x1 - 4, y1 - 4, x2 + 4, y2 + 4, fill="#000000",
+                                             outline="", stipple="gray50", tags="hud")
+        self.canvas.tag_lower(fundo, texto)
+
     def capture_image(self):
         """Captura a imagem atual da câmera e salva em pasta"""
         if self.raw_image is None:
@@ -310,15 +436,80 @@ class SelectionWindow(ctk.CTk):
             # Liberar o botão "Analisar Seleção"
             self.current_roi = None
             self.btn_next.configure(state="normal")
+            self._roi_automatica()
             
             messagebox.showinfo("Sucesso", f"Imagem capturada e salva!\nCaminho: {filepath}\n\nVocê pode fazer a seleção agora.")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar a imagem: {str(e)}")
 
+    def capture_burst(self):
+        """Grava DURACAO_RAJADA_S segundos na RAM, na taxa máxima da câmera"""
+        if not self.camera_running or self.cap is None:
+            return
+        # pausa a pré-visualização: só a thread da rajada lê a câmera
+        self.camera_running = False
+        try:
+            self.rajada = CapturaRajada(self.cap, DURACAO_RAJADA_S)
+        except Exception as e:
+            self.rajada = None
+            messagebox.showerror("Erro", f"Falha ao iniciar a rajada: {e}")
+            self.camera_running = True
+            self.update_camera()
+            return
+        self.btn_capture.configure(state="disabled")
+        self.btn_rajada.configure(state="disabled")
+        self._inicio_progresso()
+        self.rajada.gravar()
+        self.after(50, self._aguardar_rajada)
+
+    def _aguardar_rajada(self):
+        if self.rajada is None:
+            return
+        if self.rajada.gravando:
+            self.after(50, self._aguardar_rajada)
+            return
+        self._fim_progresso()
+        self.btn_capture.configure(state="normal")
+        self.btn_rajada.configure(state="normal")
+        rajada = self.rajada
+        if rajada.n_quadros == 0:
+            self.rajada = None
+            messagebox.showerror("Erro", "Nenhum quadro capturado na rajada.")
+            return
+
+        # Congela a câmera e mostra o último quadro (estado final da gota)
+        self.stop_camera()
+        *_, (_, ultimo) = rajada.quadros()
+        self.raw_image = ultimo.copy()
+        self.current_roi = None
+        self.render_frame()
+        self._roi_automatica()
+        self.btn_next.configure(state="normal")
+
+        # Codificação sem perdas em segundo plano (a sequência continua na RAM)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.pasta_rajada = os.path.join(os.path.expanduser("~"), "Pictures", "capturas_Angle",
+                                         f"rajada_{timestamp}")
+        try:
+            rajada.codificar(self.pasta_rajada, FORMATO_RAJADA)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao salvar a rajada: {str(e)}")
+            return
+        messagebox.showinfo(
+            "Sucesso",
+            f"Rajada de {rajada.n_quadros} quadros ({rajada.fps_medido():.0f} fps) capturada!\n"
+            f"Gravando em segundo plano em: {self.pasta_rajada}\n\n"
+            "Selecione a gota: a sequência inteira será analisada com a mesma ROI."
+        )
+
     def render_frame(self):
         if self.raw_image is None:
             return
+        with self.metricas.medir("render"):
+            self._render_frame()
+        self._desenhar_hud()
 
+    def _render_frame(self):
         cw, ch = self.canvas.winfo_width(), self.canvas.winfo_height()
         if cw < 10:
             cw, ch = 800, 600
@@ -339,6 +530,10 @@ class SelectionWindow(ctk.CTk):
 
     # ---------------- ROI ----------------
     def start_roi(self, e):
+        # nova seleção invalida qualquer análise em andamento
+        if self.executor.ocupado:
+            self.executor.cancelar()
+            self._fim_progresso()
         self.roi_start = (e.x, e.y)
         if self.roi_rect:
             self.canvas.delete(self.roi_rect)
@@ -363,7 +558,35 @@ class SelectionWindow(ctk.CTk):
             min(ix1, ix2), min(iy1, iy2),
             max(ix1, ix2), max(iy1, iy2)
         ]
+        self.roi_auto = False  # seleção manual substitui a automática
         self.btn_next.configure(state="normal")
+        self._registrar_roi_sessao()
+
+    def _roi_automatica(self):
+        """Propõe a ROI detectada automaticamente (arrastar um retângulo substitui)."""
+        roi = detectar_roi(self.raw_image) if self.raw_image is not None else None
+        mudou = roi != self.current_roi
+        self.current_roi = roi
+        self.roi_auto = roi is not None
+        self._desenhar_roi()
+        if mudou:
+            self._registrar_roi_sessao()
+        if roi is not None:
+            self.btn_next.configure(state="normal")
+
+    def _desenhar_roi(self):
+        if self.roi_rect:
+            self.canvas.delete(self.roi_rect)
+            self.roi_rect = None
+        if self.current_roi is None:
+            return
+        x1, y1, x2, y2 = self.current_roi
+        self.roi_rect = self.canvas.create_rectangle(
+            self.offset_x + x1 * self.ratio, self.offset_y + y1 * self.ratio,
+            self.offset_x + x2 * self.ratio, self.offset_y + y2 * self.ratio,
+            outline="cyan" if self.roi_auto else "yellow", width=2,
+            dash=(6, 4) if self.roi_auto else None
+        )
 
     def canvas_to_img(self, x, y):
         ix = (x - self.offset_x) / self.ratio
@@ -375,48 +598,110 @@ class SelectionWindow(ctk.CTk):
         r = self.current_roi
         if self.raw_image is None or r is None:
             return
-        cropped = self.raw_image[r[1]:r[3], r[0]:r[2]]
-        if cropped.size == 0:
+        if self.raw_image[r[1]:r[3], r[0]:r[2]].size == 0:
             return
 
-        # === PRÉ-PROCESSAMENTO: PRIORIZAR FILTROS.PY (OTSU SIMPLES E RÁPIDO) ===
-        try:
-            # Tenta usar filtros.py primeiro (método simples, robusto e rápido)
-            gray_vis, bin_img = filtros.aplicar_pre_processamento(cropped)
-            bgr_vis = cropped  # Usa imagem original para visualização
-            debug_imgs = None
-        except Exception as e:
-            # Fallback para preprocess.py se disponível
-            if HAVE_PREPROCESS:
-                try:
-                    pre = preprocess_image_for_contact_angle(cropped)
-                    bin_img = pre.get("binary")
-                    bgr_vis = pre.get("corrected_bgr", cropped)
-                    debug_imgs = pre.get("debug_imgs")
-                except Exception:
-                    # Última alternativa: grayscale + Otsu manual
-                    gray_vis = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-                    blur = cv2.GaussianBlur(gray_vis, (5, 5), 0)
-                    _, bin_img = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-                    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-                    bin_img = cv2.morphologyEx(bin_img, cv2.MORPH_CLOSE, kernel, iterations=1)
-                    bgr_vis = cropped
-                    debug_imgs = None
-            else:
-                # Última alternativa: grayscale + Otsu manual
-                gray_vis = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-                blur = cv2.GaussianBlur(gray_vis, (5, 5), 0)
-                _, bin_img = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-                kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-                bin_img = cv2.morphologyEx(bin_img, cv2.MORPH_CLOSE, kernel, iterations=1)
-                bgr_vis = cropped
-                debug_imgs = None
+        # Perfil ajustado (pipeline/autotune.py) da câmera, se existir
+        pre_params = carregar_perfil(self.camera_id) if self.camera_id is not None else None
+
+        # Pré-processamento roda no pool de trabalho; a janela continua responsiva
+        self.btn_next.configure(state="disabled")
+        self._inicio_progresso()
+        self.executor.submeter(
+            self._tarefa_pre_processamento, self.raw_image, list(r), pre_params,
+            on_done=self._abrir_analise,
+            on_error=self._erro_analise,
+        )
+
+        # Rajada: a sequência vai direto da RAM para a análise, em segundo plano,
+        # gerando a cinética (ângulos, base, altura, volume) por quadro em CSV e
+        # os eventos de avanço/recuo da linha de contato (linha_contato.csv)
+        if self.rajada is not None and self.pasta_rajada is not None:
+            # duas análises da mesma rajada truncariam o mesmo cinetica.csv
+            if self.executor_rajada.ocupado:
+                obter_metricas().contar("rajadas_ignoradas")
+                return
+            caminho_csv = os.path.join(self.pasta_rajada, "cinetica.csv")
+            self.executor_rajada.submeter(
+                self._analisar_rajada, self.rajada, list(r), pre_params, caminho_csv,
+                on_done=lambda n: obter_metricas().contar("rajada_quadros", n),
+                on_error=lambda e: messagebox.showerror("Erro", f"Falha na análise da rajada: {e}"),
+            )
+
+    @staticmethod
+    def _analisar_rajada(token, rajada, r, pre_params, caminho_csv):
+        """Executa no trabalhador: não toca em widgets."""
+        pasta = os.path.dirname(caminho_csv)
+        os.makedirs(pasta, exist_ok=True)
+        with open(caminho_csv, "w", newline="", encoding="utf-8") as f, \
+                open(os.path.join(pasta, "linha_contato.csv"), "w", newline="", encoding="utf-8") as f_linha:
+            rastreador = RastreadorCinetica(saida_csv=f)
+            linha = DetectorLinhaContato(saida_csv=f_linha)
+
+            def _ao_quadro(t, res):
+                token.verificar()  # fechar a janela interrompe a análise entre quadros
+                rastreador.atualizar_resultado(t, res)
+                linha.atualizar_resultado(t, res)
+
+            # imagens de debug só dos quadros que a cascata não resolveu no Otsu
+            with EscritorDebug(os.path.join(pasta, "debug"), apenas_fallback=True) as escritor:
+                n = len(rajada.analisar(r, pre_params, ao_quadro=_ao_quadro, escritor_debug=escritor))
+        metricas = obter_metricas()
+        metricas.contar("rajada_eventos_linha", len(linha.eventos))
+        metricas.contar("rajada_debug_fallback", escritor.aceitos)
+        return n
+
+    @staticmethod
+    def _tarefa_pre_processamento(token, raw_image, r, pre_params):
+        """Executa no trabalhador: não toca em widgets."""
+        # === PRÉ-PROCESSAMENTO: CASCATA PONTUADA (OTSU → PREPROCESS → BORDAS) ===
+        # Nós do grafo de estágios (pipeline/analise.py), cacheados pelo
+        # digest da imagem + ROI + parâmetros: reabrir a mesma captura não
+        # repete pré-processamento, contorno nem baseline.
+        token.progresso(0.1, "Calculando digest")
+        ex = analise.GRAFO_ANALISE.executar(
+            {"imagem": (digest_imagem(raw_image), raw_image)},
+            {"roi": r, "pre_params": pre_params},
+            obter_cache_padrao(),
+        )
+        token.progresso(0.4, "Pré-processando")
+        pre = ex.valor("pre")
+        token.verificar()
+        # a janela de análise retoma o grafo a partir da binária; o recorte
+        # (com a sua chave) serve aos controles de ajuste de parâmetros
+        return ex.chave("binaria"), pre, (ex.chave("recorte"), ex.valor("recorte"), pre_params)
+
+    def _inicio_progresso(self):
+        if not self.progress_visible:
+            self.progress.pack(side="right", padx=10)
+            self.progress_visible = True
+        self.progress.start()
+
+    def _fim_progresso(self):
+        self.progress.stop()
+        if self.progress_visible:
+            self.progress.pack_forget()
+            self.progress_visible = False
+
+    def _erro_analise(self, e):
+        self._fim_progresso()
+        self.btn_next.configure(state="normal")
+        messagebox.showerror("Erro", f"Falha no pré-processamento: {e}")
+
+    def _abrir_analise(self, resultado):
+        chave_cache, pre, (chave_recorte, recorte, pre_params) = resultado
+        self._fim_progresso()
+        self.btn_next.configure(state="normal")
+        bin_img = pre.get("binary")
+        bgr_vis = pre.get("corrected_bgr")
+        # só o nível preprocess gera debug_imgs; dos outros vão a binária e a imagem
+        debug_imgs = pre.get("debug_imgs") or {"binary": bin_img, "corrected_bgr": bgr_vis}
 
         # sanity checks
         if bin_img is None:
             messagebox.showerror("Erro", "Pré-processamento não retornou imagem binária.")
             return
-        if bgr_vis.shape[:2] != bin_img.shape[:2]:
+        if bgr_vis is None or bgr_vis.shape[:2] != bin_img.shape[:2]:
             messagebox.showerror("Erro", "Dimensões da imagem visível e da binária não coincidem.")
             return
 
@@ -428,11 +713,17 @@ class SelectionWindow(ctk.CTk):
         self.withdraw()
 
         # Abrir janela de análise passando imagem BGR (vis) e BIN (processamento)
-        new_win = ContactAngleApp(bgr_vis, bin_img, master=self, debug_imgs=debug_imgs)
+        segmentacao = {"metodo": pre.get("metodo"), "qualidade": pre.get("qualidade")}
+        # grava as imagens de debug quando a cascata precisou subir de nível
+        new_win = ContactAngleApp(bgr_vis, bin_img, master=self, debug=usou_fallback(pre), debug_imgs=debug_imgs,
+                                  chave_cache=chave_cache, segmentacao=segmentacao,
+                                  recorte=recorte, chave_recorte=chave_recorte, pre_params=pre_params)
         new_win.lift()
 
     def _on_close(self):
-        # parar camera e sair
+        # parar camera/análise e sair
+        self.executor.cancelar()
+        self.executor_rajada.cancelar()
         try:
             self.stop_camera()
         except Exception:
@@ -448,7 +739,8 @@ class SelectionWindow(ctk.CTk):
 # ====================================================
 class ContactAngleApp(ctk.CTkToplevel):
 
-    def __init__(self, img_bgr, img_bin, master=None, debug=False, debug_imgs=None):
+    def __init__(self, img_bgr, img_bin, master=None, debug=False, debug_imgs=None, chave_cache=None,
+                 segmentacao=None, recorte=None, chave_recorte=None, pre_params=None):
         super().__init__(master=master)
         self.title("Ângulo de Contato")
         self.geometry("1100x700")
@@ -466,6 +758,14 @@ class ContactAngleApp(ctk.CTkToplevel):
         # img_bin: máscara binária para processamento (2D uint8, 0/255)
         self.raw_image = img_bgr
         self.bin_image = img_bin
+        # chave (digest + ROI) usada para cachear contorno e baseline
+        self.chave_cache = chave_cache
+        self.segmentacao = segmentacao
+        # recorte original (BGR) e parâmetros de partida dos controles de ajuste
+        self.recorte = recorte
+        self.chave_recorte = chave_recorte
+        self.pre_params = pre_params
+        self._pre_ajustado = False  # só envia pre_params após mexer num controle do preprocess
 
         # checagens de sanidade
         try:
@@ -481,11 +781,10 @@ class ContactAngleApp(ctk.CTkToplevel):
             return
 
         # salvar debug images se solicitado
+        # (escrita assíncrona: a análise não espera o disco)
         if debug and debug_imgs is not None:
             try:
-                out_dir = os.path.join(os.path.expanduser("~"), "Pictures", "capturas_Angle", "debug")
-                os.makedirs(out_dir, exist_ok=True)
-                save_debug_imgs(debug_imgs, out_dir)
+                obter_escritor_debug().enviar(debug_imgs, prefix=datetime.now().strftime("dbg_%Y%m%d_%H%M%S"))
             except Exception:
                 pass
         self.gota_pts = None
@@ -496,6 +795,11 @@ class ContactAngleApp(ctk.CTkToplevel):
         self.p_esq = None
         self.p_dir = None
         self.contact_method = None
+        self.angulo_esq = 0.0
+        self.angulo_dir = 0.0
+        self.ajuste = None  # AjusteIncremental do contorno atual (arraste de pontos)
+        self.angulos_snake = {}  # lado → ângulo da tangente do snake (vale até mover os pontos)
+        self.window_height = angulo_contato.WINDOW_HEIGHT
 
         self.zoom_scale = 1.0
         self.pan_offset_x = 0
@@ -514,9 +818,28 @@ class ContactAngleApp(ctk.CTkToplevel):
         self.sidebar.grid(row=0, column=0, sticky="ns", padx=10, pady=10)
 
         self.res_e = self.res_box("Ângulo Esq.")
+        self.ic_e = self.ic_label(self.res_e)
         self.res_d = self.res_box("Ângulo Dir.")
+        self.ic_d = self.ic_label(self.res_d)
         self.res_m = self.res_box("Média", True)
 
+        # Estado da análise em segundo plano
+        self.status = ctk.CTkLabel(self.sidebar, text="", font=("Arial", 12))
+        self.status.pack(fill="x", padx=20)
+        self.progress = ctk.CTkProgressBar(self.sidebar, mode="determinate")
+        self.progress.set(0.0)
+        self.progress.pack(fill="x", padx=20, pady=(0, 10))
+        self.executor = ExecutorAnalise(self)
+        # bootstrap dos ICs à parte: não cancela um refinamento em andamento
+        self.executor_ic = ExecutorAnalise(self)
+
+        # Ajuste de parâmetros com prévia progressiva (só com o recorte original)
+        if self.recorte is not None:
+            self.setup_ajuste()
+
+        # Refinamento local dos pontos de contato (snake B-spline sobre o gradiente)
+        ctk.CTkButton(self.sidebar, text="Refinar Contato (Snake)", command=self.refinar_snake).pack(fill="x", padx=20, pady=(10,0))
+
         # Botão para iniciar novo teste (voltar à seleção)
         ctk.CTkButton(self.sidebar, text="Novo Teste", fg_color="#a52a2a", command=self._novo_teste).pack(fill="x", padx=20, pady=(10,0))
 
@@ -547,6 +870,39 @@ class ContactAngleApp(ctk.CTkToplevel):
         v = ctk.CTkLabel(f, text="0.00°", font=("Arial", 26, "bold"))
         v.pack()
         return v
+
+    def ic_label(self, res_label):
+        """Rótulo do intervalo de confiança (bootstrap) abaixo de um resultado."""
+        ic = ctk.CTkLabel(res_label.master, text="", font=("Arial", 12))
+        ic.pack()
+        return ic
+
+    def setup_ajuste(self):
+        """
+        Controles de pré-processamento e ajuste. Enquanto um controle se move,
+        a análise roda sobre o recorte reduzido (prévia); ao soltar, refina em
+        resolução cheia. Cada submissão ao executor cancela a anterior.
+        """
+        iniciais = dict(self.pre_params or {})
+        iniciais.setdefault("clahe_clip", 2.0)
+        iniciais.setdefault("adapt_C", 2)
+        iniciais.update({"fechamento_px": 0, "window_height": self.window_height})
+
+        frame = ctk.CTkFrame(self.sidebar)
+        frame.pack(fill="x", padx=20, pady=(0, 10))
+        ctk.CTkLabel(frame, text="Ajuste de parâmetros").pack()
+        self.vars_ajuste = {}
+        for nome, rotulo, minimo, maximo, passos in CONTROLES_AJUSTE:
+            var = ctk.DoubleVar(value=iniciais[nome])
+            lbl = ctk.CTkLabel(frame, text=f"{rotulo}: {var.get():g}", font=("Arial", 12))
+            lbl.pack(anchor="w", padx=10)
+            slider = ctk.CTkSlider(
+                frame, from_=minimo, to=maximo, number_of_steps=passos, variable=var,
+                command=lambda v, n=nome, r=rotulo, l=lbl: self._on_ajuste(n, r, l, v),
+            )
+            slider.pack(fill="x", padx=10, pady=(0, 6))
+            slider.bind("<ButtonRelease-1>", lambda e: self._refinar_ajuste())
+            self.vars_ajuste[nome] = var
     # ---------------- ANÁLISE ----------------
     def initial_analysis(self):
         """
@@ -554,14 +910,46 @@ class ContactAngleApp(ctk.CTkToplevel):
         Prioridade 1: Transição Física (Joelhos da gota)
         Prioridade 2: Fallback Estatístico (apenas se a física falhar)
         """
+        # Contorno e baseline rodam no pool de trabalho; o resultado volta
+        # para a thread do Tk em _aplicar_deteccao.
+        self.status.configure(text="Analisando…")
+        self.progress.set(0.0)
+        self.executor.submeter(
+            self._tarefa_deteccao, self.bin_image, self.chave_cache,
+            on_done=self._aplicar_deteccao,
+            on_error=lambda e: self._aplicar_deteccao((None, None)),
+            on_progress=lambda frac, msg: [self.progress.set(frac), self.status.configure(text=msg)],
+        )
+
+    @staticmethod
+    def _tarefa_deteccao(token, bin_image, chave_cache):
+        """Executa no trabalhador: não toca em widgets."""
+        ex = analise.GRAFO_ANALISE.executar({"binaria": (chave_cache, bin_image)}, cache=obter_cache_padrao())
         # 1. Obtém o contorno da gota através do módulo especializado
-        self.gota_pts = contorno.encontrar_contorno_gota(self.bin_image)
+        token.progresso(0.2, "Extraindo contorno")
+        gota_pts = ex.valor("contorno")
+        if gota_pts is None:
+            return None, None
+
+        # 2. Executa o pipeline híbrido (Apenas UMA vez)
+        token.progresso(0.6, "Detectando baseline")
+        res = ex.valor("baseline")
+        token.verificar()
+        return gota_pts, res
+
+    def _aplicar_deteccao(self, resultado):
+        """Aplica (na thread do Tk) o contorno e a baseline vindos do trabalhador."""
+        self.gota_pts, res = resultado
+        self.progress.set(1.0)
+        # nível da cascata de segmentação que produziu a binária
+        seg = self.segmentacao or {}
+        self.status.configure(text=f"Segmentação: {seg['metodo']} (nota {seg.get('qualidade') or 0:.2f})"
+                              if seg.get("metodo") else "")
         if self.gota_pts is None:
             messagebox.showerror("Erro", "Não foi possível detectar a silhueta da gota.")
             return
-
-        # 2. Executa o pipeline híbrido (Apenas UMA vez)
-        res = linha_base.detectar_baseline_hibrida(self.gota_pts)
+        self.ajuste = AjusteIncremental(self.gota_pts, self.window_height)
+        self.angulos_snake = {}
         
         # 3. Extrai os parâmetros fundamentais da baseline
         self.baseline_y = res['baseline_y']
@@ -639,23 +1027,178 @@ class ContactAngleApp(ctk.CTkToplevel):
                 self.baseline_method = 'fallback_estatistico'
         self.calculate()
 
+    # ---------------- AJUSTE PROGRESSIVO ----------------
+    def _params_ajuste(self):
+        v = {nome: var.get() for nome, var in self.vars_ajuste.items()}
+        pre_params = dict(self.pre_params or {})
+        if self._pre_ajustado:
+            pre_params.update(clahe_clip=float(v["clahe_clip"]), adapt_C=int(round(v["adapt_C"])))
+        return {"pre_params": pre_params or None,
+                "fechamento_px": int(round(v["fechamento_px"])),
+                "window_height": float(v["window_height"])}
+
+    def _on_ajuste(self, nome, rotulo, lbl, valor):
+        """Controle em movimento: prévia em escala reduzida."""
+        lbl.configure(text=f"{rotulo}: {valor:g}")
+        if nome in PARAMS_PRE_AJUSTE:
+            self._pre_ajustado = True
+        escala = progressivo.escala_previa(self.recorte.shape)
+        self.executor.submeter(
+            lambda token, *a: progressivo.avaliar(*a, token=token),
+            self.recorte, self._params_ajuste(), escala,
+            on_done=self._aplicar_previa,
+            on_error=lambda e: self.status.configure(text=f"Prévia falhou: {e}"),
+        )
+
+    def _refinar_ajuste(self):
+        """Controle solto: refina em resolução cheia (cacheado por recorte + parâmetros)."""
+        params = self._params_ajuste()
+        self.status.configure(text="Refinando em resolução cheia…")
+        self.progress.set(0.0)
+        self.executor.submeter(
+            lambda token, *a: progressivo.avaliar(*a, token=token),
+            self.recorte, params, 1.0, self.chave_recorte, obter_cache_padrao(),
+            on_done=lambda res: self._aplicar_refinamento(res, params),
+            on_error=lambda e: self.status.configure(text=f"Refinamento falhou: {e}"),
+        )
+
+    def _aplicar_previa(self, res):
+        """Contorno e ângulos aproximados; o IC e o arraste incremental esperam o refinamento."""
+        if res.get("gota_pts") is None:
+            self.status.configure(text="Prévia: gota não encontrada")
+            return
+        self.gota_pts = res["gota_pts"]
+        self.ajuste = None
+        self.angulos_snake = {}
+        self.baseline_y = res["baseline_y"]
+        self.baseline_line_params = res.get("line_params")
+        self.baseline_method = res.get("method")
+        self.p_esq, self.p_dir = res.get("p_esq"), res.get("p_dir")
+        self.contact_method = res.get("contact_method")
+        self.angulo_esq, self.angulo_dir = res["angulo_esq"], res["angulo_dir"]
+        self.res_e.configure(text=f"{self.angulo_esq:.2f}°")
+        self.res_d.configure(text=f"{self.angulo_dir:.2f}°")
+        self.res_m.configure(text=f"{(self.angulo_esq + self.angulo_dir) / 2:.2f}°")
+        self.executor_ic.cancelar()
+        self.ic_e.configure(text="")
+        self.ic_d.configure(text="")
+        self.status.configure(text=f"Prévia a {res['escala']:.0%} — solte para refinar")
+        self.render()
+
+    def _aplicar_refinamento(self, res, params):
+        pre = res["pre"]
+        if res.get("gota_pts") is None or pre.get("binary") is None:
+            self.progress.set(1.0)
+            self.status.configure(text="Nenhum contorno com estes parâmetros")
+            return
+        self.raw_image = pre.get("corrected_bgr", self.recorte)
+        self.bin_image = pre["binary"]
+        self.chave_cache = res.get("chave_binaria")
+        self.segmentacao = res.get("segmentacao")
+        self.window_height = params["window_height"]
+        obter_metricas().contar("ajuste_nos_recalculados", len(res.get("tempos", {})))
+        self._aplicar_deteccao((res["gota_pts"], res))
+
     def calculate(self):
         if self.p_esq is None:
             return
 
-        ae = angulo_contato.calcular_angulo_polinomial(
-            self.gota_pts, self.p_esq, self.p_dir, self.baseline_y, "esq"
-        )
-        ad = angulo_contato.calcular_angulo_polinomial(
-            self.gota_pts, self.p_esq, self.p_dir, self.baseline_y, "dir"
-        )
+        # Durante o arraste só o lado arrastado é reajustado, de forma
+        # incremental; ao soltar, os dois lados são recalculados do zero.
+        if self.dragging_point is not None and self.ajuste is not None:
+            ang = self.ajuste.angulo(self.p_esq, self.p_dir, self.baseline_y, self.dragging_point)
+            if self.dragging_point == 'esq':
+                self.angulo_esq = ang
+            else:
+                self.angulo_dir = ang
+        else:
+            self.angulo_esq = angulo_contato.calcular_angulo_polinomial(
+                self.gota_pts, self.p_esq, self.p_dir, self.baseline_y, "esq", self.window_height
+            )
+            self.angulo_dir = angulo_contato.calcular_angulo_polinomial(
+                self.gota_pts, self.p_esq, self.p_dir, self.baseline_y, "dir", self.window_height
+            )
+            # lados refinados pelo snake: ângulo da tangente da curva refinada,
+            # não o polinômio reajustado sobre o contorno original
+            self.angulo_esq = self.angulos_snake.get("esq", self.angulo_esq)
+            self.angulo_dir = self.angulos_snake.get("dir", self.angulo_dir)
+        ae, ad = self.angulo_esq, self.angulo_dir
 
         self.res_e.configure(text=f"{ae:.2f}°")
         self.res_d.configure(text=f"{ad:.2f}°")
         self.res_m.configure(text=f"{(ae+ad)/2:.2f}°")
 
+        # bootstrap só fora do arraste (recalculado ao soltar o ponto)
+        if self.dragging_point is None:
+            self.atualizar_incerteza()
+
         self.render()
 
+    def refinar_snake(self):
+        if self.gota_pts is None or self.p_esq is None or self.p_dir is None:
+            return
+        self.status.configure(text="Refinando contato…")
+        self.executor.submeter(
+            lambda token, *a: refinar_contato_snake(*a),
+            self.raw_image, self.gota_pts, self.baseline_y, self.p_esq, self.p_dir,
+            on_done=self._aplicar_snake,
+            on_error=lambda e: self.status.configure(text=f"Snake falhou: {e}"),
+        )
+
+    def _aplicar_snake(self, ref):
+        if not ref['lados']:
+            self.status.configure(text="Snake não convergiu; contatos mantidos")
+            return
+        self.p_esq, self.p_dir = ref['p_esq'], ref['p_dir']
+        self.angulos_snake = {lado: ref[f'angulo_{lado}'] for lado in ref['lados']}
+        self.contact_method = f"{self.contact_method}+snake"
+        # mantém a linha desenhada coerente com os novos pontos
+        if self.baseline_line_params is not None:
+            vx, vy = linha_base.safe_normalize(self.p_dir[0] - self.p_esq[0], self.p_dir[1] - self.p_esq[1])
+            x0 = (self.p_esq[0] + self.p_dir[0]) / 2.0
+            self.baseline_line_params = (float(vx), float(vy), float(x0), float(self.baseline_y))
+        lados = ", ".join(sorted(ref['lados']))
+        self.status.configure(text=f"Snake refinou: {lados}")
+        self.calculate()
+
+    def atualizar_incerteza(self):
+        """Recalcula em segundo plano os intervalos de confiança (95%) dos dois ângulos."""
+        chave = (id(self.gota_pts), tuple(self.p_esq), tuple(self.p_dir),
+                 self.baseline_y, self.window_height)
+        self.ic_e.configure(text="IC95% calculando…")
+        self.ic_d.configure(text="IC95% calculando…")
+
+        def _bootstrap(token, gota_pts, p_esq, p_dir, baseline_y, window_height):
+            incertezas = {}
+            for lado in ("esq", "dir"):
+                token.verificar()
+                incertezas[lado] = angulo_contato.calcular_angulo_com_incerteza(
+                    gota_pts, p_esq, p_dir, baseline_y, lado, window_height=window_height
+                )
+            return incertezas
+
+        def _aplicar(incertezas):
+            # pontos movidos depois da submissão: o resultado já não vale
+            atual = (id(self.gota_pts), tuple(self.p_esq), tuple(self.p_dir),
+                     self.baseline_y, self.window_height)
+            if atual != chave:
+                return
+            for lado, label in (("esq", self.ic_e), ("dir", self.ic_d)):
+                inc = incertezas[lado]
+                if inc["n_validos"] > 0:
+                    label.configure(text=f"IC95% [{inc['ic_inf']:.2f}°, {inc['ic_sup']:.2f}°]  σ={inc['desvio']:.2f}°")
+                else:
+                    label.configure(text="IC95% indisponível")
+
+        def _falhou(e):
+            self.ic_e.configure(text="IC95% indisponível")
+            self.ic_d.configure(text="IC95% indisponível")
+
+        self.executor_ic.submeter(
+            _bootstrap, self.gota_pts, self.p_esq, self.p_dir, self.baseline_y, self.window_height,
+            on_done=_aplicar, on_error=_falhou,
+        )
+
     # ---------------- RENDER ----------------
     def zoom(self, e):
         self.zoom_scale *= 1.1 if e.delta > 0 else 0.9
@@ -801,13 +1344,17 @@ class ContactAngleApp(ctk.CTkToplevel):
         
         # Atualizar baseline_y como a média entre os dois pontos
         self.baseline_y = (self.p_esq[1] + self.p_dir[1]) / 2.0
+        # a baseline mudou: as tangentes do snake não valem mais
+        self.angulos_snake = {}
         
         # Recalcular ângulos e renderizar em tempo real
         self.calculate()
 
     def on_canvas_release(self, e):
         """Solta o ponto quando mouse é liberado."""
-        self.dragging_point = None
+        if self.dragging_point is not None:
+            self.dragging_point = None
+            self.calculate()  # recalcula os dois lados e o IC
 
     def on_pan_start(self, e):
         """Inicia pan (arrastar imagem) com botão direito."""
@@ -833,6 +1380,8 @@ class ContactAngleApp(ctk.CTkToplevel):
         self.pan_start_pos = None
 
     def _on_close(self):
+        self.executor.cancelar()
+        self.executor_ic.cancelar()
         try:
             if self.master is not None:
                 self.master.destroy()
@@ -844,6 +1393,8 @@ class ContactAngleApp(ctk.CTkToplevel):
             pass
 
     def _novo_teste(self):
+        self.executor.cancelar()
+        self.executor_ic.cancelar()
         # Volta para a janela de seleção (se existir)
         try:
             if self.master is not None:
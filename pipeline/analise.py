@@ -0,0 +1,369 @@
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from processamento_imagem import contorno
+from processamento_imagem.contorno_compacto import compactar_contorno
+from processamento_imagem.roi_automatica import detectar_roi
+from linha_base import linha_base
+from linha_base.snake_bspline import refinar_contato_snake
+from Cal_angulo import angulo_contato
+from pipeline.cache import CacheResultados, digest_arquivo, digest_imagem
+from pipeline.grafo import Estagio, GrafoEstagios
+from pipeline.segmentacao import segmentar_cascata, usou_fallback
+
+ROI_AUTO = "auto"
+# Chaves que incluir_imagens=True acrescenta ao resultado
+CHAVES_IMAGENS = ("binary", "corrected_bgr", "debug_imgs", "metodo_pre")
+
+
+# =================================================================
+# BLOCO 1: PRÉ-PROCESSAMENTO (cascata pontuada, pipeline/segmentacao.py)
+# =================================================================
+
+def recortar_roi(img_bgr: np.ndarray, roi: Union[Sequence[int], str, None] = None) -> np.ndarray:
+    """
+    Recorta [x1, y1, x2, y2] da imagem (ROI None = imagem inteira).
+
+    roi="auto" localiza a gota (processamento_imagem.roi_automatica); se nada
+    for encontrado, usa a imagem inteira.
+    """
+    if isinstance(roi, str) and roi == ROI_AUTO:
+        roi = detectar_roi(img_bgr)
+    if roi is None:
+        return img_bgr
+    x1, y1, x2, y2 = [int(v) for v in roi]
+    return img_bgr[y1:y2, x1:x2]
+
+
+def pre_processar(cropped: np.ndarray, pre_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Pré-processa o recorte com a cascata de segmentação: Otsu → preprocess.py
+    → bordas, subindo de nível só quando a nota do contorno é baixa.
+
+    Args:
+        cropped: recorte BGR da gota
+        pre_params: parâmetros de preprocess_image_for_contact_angle; quando
+            informados, esse nível vai para o início da cascata
+
+    Returns:
+        Dicionário com 'binary', 'corrected_bgr', 'debug_imgs', 'metodo'
+        (nível que venceu), 'qualidade' e 'tentativas'
+    """
+    return segmentar_cascata(cropped, pre_params)
+
+
+# =================================================================
+# BLOCO 2: CONTATOS E ÂNGULOS (mesma lógica da janela de análise)
+# =================================================================
+
+def resolver_baseline(gota_pts: np.ndarray, res: Dict) -> Dict:
+    """Aplica as garantias de segurança da análise inicial sobre o resultado da baseline."""
+    out = dict(res)
+    baseline_y = out.get('baseline_y')
+    try:
+        baseline_ok = baseline_y is not None and np.isfinite(baseline_y)
+    except Exception:
+        baseline_ok = False
+    if not baseline_ok or out.get('p_esq') is None or out.get('p_dir') is None:
+        base_y, base_p_esq, base_p_dir = linha_base.encontrar_pontos_contato_base(gota_pts)
+        if not baseline_ok:
+            out['baseline_y'] = base_y
+        if out.get('p_esq') is None:
+            out['p_esq'] = base_p_esq
+        if out.get('p_dir') is None:
+            out['p_dir'] = base_p_dir
+    return out
+
+
+def calcular_angulos(gota_pts: np.ndarray, p_esq, p_dir, baseline_y: float,
+                     funcao_angulo: Callable = angulo_contato.calcular_angulo_polinomial,
+                     **kwargs) -> Tuple[float, float]:
+    """Calcula (ângulo esquerdo, ângulo direito) com a função de ângulo escolhida."""
+    ae = funcao_angulo(gota_pts, p_esq, p_dir, baseline_y, "esq", **kwargs)
+    ad = funcao_angulo(gota_pts, p_esq, p_dir, baseline_y, "dir", **kwargs)
+    return float(ae), float(ad)
+
+
+# =================================================================
+# BLOCO 3: GRAFO DE ESTÁGIOS
+# =================================================================
+# imagem → recorte → pre → binaria → contorno → baseline → contato → angulos
+#                        ↘ segmentacao (nível da cascata)          ↘ incerteza
+# Ramo opcional (snake=True): contato + pre → contato_snake → angulos_snake, incerteza_snake
+# Cada nó só é recalculado quando mudam as suas entradas ou os parâmetros
+# que consome (ex.: window_height refaz apenas 'angulos').
+
+def binarizar(pre: Dict[str, Any], fechamento_px: int = 0) -> Optional[np.ndarray]:
+    """Binária do pré-processamento; fechamento_px > 0 aplica um fechamento elíptico extra."""
+    bin_img = pre.get("binary")
+    if bin_img is None or fechamento_px <= 0:
+        return bin_img
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * fechamento_px + 1, 2 * fechamento_px + 1))
+    return cv2.morphologyEx(bin_img, cv2.MORPH_CLOSE, kernel)
+
+
+def extrair_contorno(binaria: Optional[np.ndarray], passo_arco: Optional[float] = None):
+    """Contorno da gota; com passo_arco vira um ContornoCompacto reamostrado."""
+    if binaria is None:
+        return None
+    # sem o fallback por Canny: as bordas já são um nível pontuado da cascata
+    gota_pts = contorno.encontrar_contorno_gota(binaria, permitir_canny=False)
+    return gota_pts if passo_arco is None else compactar_contorno(gota_pts, passo_arco)
+
+
+def _no_segmentacao(pre: Dict[str, Any]) -> Dict[str, Any]:
+    """Resumo da cascata (nó pequeno, cacheado à parte das imagens do 'pre')."""
+    return {"metodo": pre.get("metodo"), "qualidade": pre.get("qualidade"),
+            "tentativas": pre.get("tentativas", [])}
+
+
+def _no_baseline(gota_pts) -> Optional[Dict]:
+    return None if gota_pts is None else linha_base.detectar_baseline_hibrida(gota_pts)
+
+
+def _no_contato(gota_pts, res: Optional[Dict]) -> Optional[Dict]:
+    return None if gota_pts is None or res is None else resolver_baseline(gota_pts, res)
+
+
+def _no_snake(pre: Dict[str, Any], gota_pts, res: Optional[Dict]) -> Optional[Dict]:
+    """Contatos refinados pelo snake B-spline sobre a imagem corrigida."""
+    if res is None:
+        return None
+    ref = refinar_contato_snake(pre.get("corrected_bgr"), gota_pts, res['baseline_y'], res['p_esq'], res['p_dir'])
+    out = dict(res)
+    out.update({'p_esq': ref['p_esq'], 'p_dir': ref['p_dir'],
+                'snake': {'angulo_esq': ref['angulo_esq'], 'angulo_dir': ref['angulo_dir'],
+                          'lados_refinados': sorted(ref['lados'])}})
+    if ref['lados']:
+        out['contact_method'] = f"{res.get('contact_method')}+snake"
+    return out
+
+
+def _no_angulos(gota_pts, res: Optional[Dict],
+                funcao_angulo: Callable = angulo_contato.calcular_angulo_polinomial,
+                window_height: Optional[float] = None) -> Optional[Dict[str, float]]:
+    if res is None:
+        return None
+    kwargs = {} if window_height is None else {"window_height": window_height}
+    ae, ad = calcular_angulos(gota_pts, res['p_esq'], res['p_dir'], res['baseline_y'], funcao_angulo, **kwargs)
+    return {"angulo_esq": ae, "angulo_dir": ad, "angulo_medio": (ae + ad) / 2.0}
+
+
+def _no_angulos_snake(gota_pts, res: Optional[Dict],
+                      funcao_angulo: Callable = angulo_contato.calcular_angulo_polinomial,
+                      window_height: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """Nos lados refinados, o ângulo é o da tangente do snake; nos demais, o da funcao_angulo."""
+    out = _no_angulos(gota_pts, res, funcao_angulo, window_height)
+    if out is None:
+        return None
+    snake = res.get('snake') or {}
+    for lado in snake.get('lados_refinados', []):
+        out[f"angulo_{lado}"] = snake[f"angulo_{lado}"]
+    out["angulo_medio"] = (out["angulo_esq"] + out["angulo_dir"]) / 2.0
+    return out
+
+
+def _no_incerteza(gota_pts, res: Optional[Dict],
+                  window_height: Optional[float] = None) -> Optional[Dict[str, Dict]]:
+    if res is None:
+        return None
+    kwargs = {} if window_height is None else {"window_height": window_height}
+    return {
+        lado: angulo_contato.calcular_angulo_com_incerteza(
+            gota_pts, res['p_esq'], res['p_dir'], res['baseline_y'], lado, **kwargs)
+        for lado in ("esq", "dir")
+    }
+
+
+GRAFO_ANALISE = GrafoEstagios([
+    Estagio("recorte", recortar_roi, ["imagem"], ["roi"], cachear=False),
+    # imagens em resolução cheia: só na memória; o resumo da cascata vai ao disco
+    Estagio("pre", pre_processar, ["recorte"], ["pre_params"], versao="2", persistir=False),
+    Estagio("segmentacao", _no_segmentacao, ["pre"]),
+    Estagio("binaria", binarizar, ["pre"], ["fechamento_px"], cachear=False),
+    Estagio("contorno", extrair_contorno, ["binaria"], ["passo_arco"]),
+    Estagio("baseline", _no_baseline, ["contorno"]),
+    Estagio("contato", _no_contato, ["contorno", "baseline"], cachear=False),
+    Estagio("angulos", _no_angulos, ["contorno", "contato"], ["funcao_angulo", "window_height"]),
+    Estagio("incerteza", _no_incerteza, ["contorno", "contato"], ["window_height"]),
+    # ramo opcional: contatos refinados por snake (precisa da imagem, não só da binária)
+    Estagio("contato_snake", _no_snake, ["pre", "contorno", "contato"]),
+    Estagio("angulos_snake", _no_angulos_snake, ["contorno", "contato_snake"], ["funcao_angulo", "window_height"],
+            versao="2"),
+    Estagio("incerteza_snake", _no_incerteza, ["contorno", "contato_snake"], ["window_height"]),
+])
+
+
+# =================================================================
+# BLOCO 4: PIPELINE COMPLETO
+# =================================================================
+
+def _executar(obter_imagem: Callable[[], np.ndarray],
+              chave: Optional[str],
+              roi: Optional[Sequence[int]],
+              pre_params: Optional[Dict[str, Any]],
+              cache: Optional[CacheResultados],
+              funcao_angulo: Callable,
+              incluir_imagens: bool,
+              incerteza: bool = False,
+              passo_arco: Optional[float] = None,
+              window_height: Optional[float] = None,
+              snake: bool = False) -> Dict[str, Any]:
+    # Os nós são avaliados sob demanda: se o contorno e a baseline estão no
+    # cache, a imagem nem chega a ser decodificada/pré-processada.
+    ex = GRAFO_ANALISE.executar(
+        {"imagem": (chave, obter_imagem)},
+        {"roi": roi, "pre_params": pre_params, "passo_arco": passo_arco,
+         "funcao_angulo": funcao_angulo, "window_height": window_height},
+        cache,
+    )
+    gota_pts = ex.valor("contorno")
+    resultado: Dict[str, Any] = {"gota_pts": gota_pts, "segmentacao": ex.valor("segmentacao"),
+                                 "tempos": ex.tempos}
+    if incluir_imagens:
+        pre = ex.valor("pre")
+        resultado.update({"binary": pre["binary"], "corrected_bgr": pre["corrected_bgr"],
+                          "debug_imgs": pre.get("debug_imgs"), "metodo_pre": pre.get("metodo")})
+    if gota_pts is None:
+        resultado["erro"] = "contorno_nao_encontrado"
+        return resultado
+
+    res = ex.valor("contato_snake" if snake else "contato")
+    resultado.update({
+        'baseline_y': res['baseline_y'],
+        'line_params': res.get('line_params'),
+        'p_esq': res.get('p_esq'),
+        'p_dir': res.get('p_dir'),
+        'method': res.get('method'),
+        'contact_method': res.get('contact_method'),
+        'r_squared': res.get('r_squared'),
+    })
+    if snake:
+        resultado['snake'] = res.get('snake')
+    resultado.update(ex.valor("angulos_snake" if snake else "angulos"))
+    if incerteza:
+        # IC nos mesmos contatos dos ângulos (refinados, no ramo snake)
+        resultado['incerteza'] = ex.valor("incerteza_snake" if snake else "incerteza")
+    resultado["recalculados"] = list(ex.recalculados)
+    return resultado
+
+
+def analisar_imagem(img_bgr: np.ndarray,
+                    roi: Optional[Sequence[int]] = None,
+                    pre_params: Optional[Dict[str, Any]] = None,
+                    cache: Optional[CacheResultados] = None,
+                    funcao_angulo: Callable = angulo_contato.calcular_angulo_polinomial,
+                    incluir_imagens: bool = False,
+                    incerteza: bool = False,
+                    passo_arco: Optional[float] = None,
+                    window_height: Optional[float] = None,
+                    snake: bool = False) -> Dict[str, Any]:
+    """
+    Executa pré-processamento → contorno → baseline → ângulos sobre uma imagem.
+
+    Args:
+        img_bgr: imagem BGR completa
+        roi: [x1, y1, x2, y2] (None = imagem inteira; "auto" = ROI automática)
+        pre_params: parâmetros de pré-processamento (fazem parte da chave do cache)
+        cache: CacheResultados opcional; sem cache tudo é recalculado
+        funcao_angulo: função com a assinatura de calcular_angulo_polinomial
+        incluir_imagens: inclui 'binary'/'corrected_bgr' no resultado
+        incerteza: inclui 'incerteza' (IC por bootstrap de cada lado)
+        passo_arco: se informado, o contorno vira um ContornoCompacto
+            reamostrado com esse espaçamento (px) de comprimento de arco
+        window_height: altura da janela de ajuste do ângulo (px); só o nó
+            'angulos' depende dela
+        snake: refina os pontos de contato com o snake B-spline
+            (linha_base/snake_bspline.py); nos lados refinados o ângulo é
+            o da tangente da curva refinada
+
+    Returns:
+        Dicionário com contorno, baseline, pontos de contato, ângulos, tempos
+        e 'recalculados' (nós que não vieram do cache)
+    """
+    chave = digest_imagem(img_bgr) if cache is not None else None
+    return _executar(lambda: img_bgr, chave, roi, pre_params, cache, funcao_angulo, incluir_imagens,
+                     incerteza, passo_arco, window_height, snake)
+
+
+def analisar_contorno(gota_pts,
+                      funcao_angulo: Callable = angulo_contato.calcular_angulo_polinomial,
+                      window_height: Optional[float] = None,
+                      incerteza: bool = False) -> Dict[str, Any]:
+    """
+    Baseline → contato → ângulos a partir de um contorno já extraído (ex.:
+    guardado num ArquivoContornos), sem imagem nem segmentação.
+    """
+    ex = GRAFO_ANALISE.executar({"contorno": (None, gota_pts)},
+                                {"funcao_angulo": funcao_angulo, "window_height": window_height})
+    if gota_pts is None or len(gota_pts) == 0:
+        return {"erro": "contorno_nao_encontrado", "tempos": ex.tempos}
+    res = ex.valor("contato")
+    resultado: Dict[str, Any] = {
+        'baseline_y': res['baseline_y'],
+        'line_params': res.get('line_params'),
+        'p_esq': res.get('p_esq'),
+        'p_dir': res.get('p_dir'),
+        'method': res.get('method'),
+        'contact_method': res.get('contact_method'),
+    }
+    resultado.update(ex.valor("angulos"))
+    if incerteza:
+        resultado['incerteza'] = ex.valor("incerteza")
+    resultado["tempos"] = ex.tempos
+    return resultado
+
+
+def enviar_debug(escritor, resultado: Dict[str, Any], prefix: str) -> bool:
+    """
+    Tira do resultado (analisado com incluir_imagens=True) as imagens e as
+    entrega ao EscritorDebug, marcando como fallback quando a cascata subiu
+    de nível. O resultado fica leve para ser acumulado (lotes, rajadas).
+    """
+    imagens = {k: resultado.pop(k, None) for k in CHAVES_IMAGENS}
+    # só o nível preprocess gera debug_imgs; dos outros vão a binária e a imagem
+    debug = imagens["debug_imgs"] or {k: imagens[k] for k in ("binary", "corrected_bgr") if imagens[k] is not None}
+    return escritor.enviar(debug, prefix=prefix, fallback=usou_fallback(resultado.get("segmentacao")))
+
+
+def analisar_lote(caminhos: Iterable[str],
+                  roi: Optional[Sequence[int]] = None,
+                  pre_params: Optional[Dict[str, Any]] = None,
+                  cache: Optional[CacheResultados] = None,
+                  funcao_angulo: Callable = angulo_contato.calcular_angulo_polinomial,
+                  incerteza: bool = False,
+                  passo_arco: Optional[float] = None,
+                  window_height: Optional[float] = None,
+                  escritor_debug=None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Analisa uma sequência de arquivos de imagem.
+
+    Com cache, a chave usa o digest dos bytes do arquivo: numa reanálise em
+    que só o método de ângulo mudou, nenhuma imagem é decodificada.
+
+    escritor_debug: EscritorDebug opcional; recebe as imagens de cada
+    arquivo com o nome do arquivo como prefixo (com apenas_fallback=True,
+    só as que a cascata não resolveu no primeiro nível). Exige o
+    pré-processamento mesmo com o contorno no cache.
+    """
+    for path in caminhos:
+        chave = digest_arquivo(path) if cache is not None else None
+
+        def _ler(p=path):
+            img = cv2.imread(p)
+            if img is None:
+                raise IOError(f"Não foi possível ler a imagem: {p}")
+            return img
+
+        try:
+            resultado = _executar(_ler, chave, roi, pre_params, cache, funcao_angulo, escritor_debug is not None,
+                                  incerteza, passo_arco, window_height)
+        except Exception as e:
+            yield path, {"erro": str(e)}
+            continue
+        if escritor_debug is not None:
+            enviar_debug(escritor_debug, resultado, os.path.splitext(os.path.basename(path))[0])
+        yield path, resultado
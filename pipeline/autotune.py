@@ -0,0 +1,216 @@
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+from processamento_imagem import contorno
+from processamento_imagem.preprocess import preprocess_image_for_contact_angle
+from pipeline.analise import recortar_roi
+from pipeline.qualidade import pontuar_contorno
+
+# =================================================================
+# ESPAÇO DE BUSCA E PERFIS
+# =================================================================
+ESPACO_PADRAO: Dict[str, List[Any]] = {
+    "nm_gauss": [0, 3, 5, 7],
+    "bg_ksize": [None, 51, 101, 151],
+    "clahe_clip": [1.0, 2.0, 3.0, 4.0],
+    "clahe_grid": [None, (4, 4), (8, 8)],
+    "adapt_blocksize": [None, 31, 51, 71],
+    "adapt_C": [0, 2, 4, 6],
+}
+DIR_PERFIS = os.path.join(os.path.expanduser("~"), "Pictures", "capturas_Angle", "perfis")
+
+ImagemRef = Union[str, np.ndarray]
+
+
+# =================================================================
+# BLOCO 1: AVALIAÇÃO DE UM CANDIDATO
+# =================================================================
+
+@lru_cache(maxsize=32)
+def _ler_imagem(path: str) -> np.ndarray:
+    # cada processo trabalhador mantém sua própria pequena cópia das amostras
+    img = cv2.imread(path)
+    if img is None:
+        raise IOError(f"Não foi possível ler a imagem: {path}")
+    return img
+
+
+def avaliar_candidato(params: Dict[str, Any], imagem: ImagemRef,
+                      roi: Optional[Sequence[int]] = None) -> float:
+    """
+    Nota de qualidade (0-1) do contorno obtido com os parâmetros dados.
+
+    Função de módulo (e não closure) para poder ser enviada a um ProcessPool.
+    """
+    img = _ler_imagem(imagem) if isinstance(imagem, str) else imagem
+    try:
+        pre = preprocess_image_for_contact_angle(recortar_roi(img, roi), **params)
+        binary = pre["binary"]
+        pts = contorno.encontrar_contorno_gota(binary)
+    except Exception:
+        return 0.0
+    return pontuar_contorno(pts, shape=binary.shape)["score"]
+
+
+def _avaliar_tarefa(args) -> float:
+    params, imagem, roi = args
+    return avaliar_candidato(params, imagem, roi)
+
+
+# =================================================================
+# BLOCO 2: BUSCA COM SUCCESSIVE HALVING
+# =================================================================
+
+def amostrar_candidatos(espaco: Dict[str, List[Any]], n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Sorteia n combinações distintas do espaço (a primeira é sempre o padrão)."""
+    rng = random.Random(seed)
+    total = math.prod(len(v) for v in espaco.values())
+    candidatos: List[Dict[str, Any]] = [{}]  # {} = defaults de preprocess_image_for_contact_angle
+    vistos = set()
+    while len(candidatos) < min(n, total + 1):
+        c = {k: rng.choice(v) for k, v in espaco.items()}
+        assinatura = tuple(sorted((k, str(v)) for k, v in c.items()))
+        if assinatura in vistos:
+            continue
+        vistos.add(assinatura)
+        candidatos.append(c)
+    return candidatos
+
+
+def ajustar_parametros(imagens: Sequence[ImagemRef],
+                       espaco: Optional[Dict[str, List[Any]]] = None,
+                       n_candidatos: int = 64,
+                       eta: int = 3,
+                       roi: Optional[Sequence[int]] = None,
+                       n_workers: Optional[int] = None,
+                       usar_processos: bool = False,
+                       seed: int = 0,
+                       callback: Optional[Callable[[int, int, float], None]] = None) -> Dict[str, Any]:
+    """
+    Procura os parâmetros de preprocess_image_for_contact_angle que geram
+    os melhores contornos numa amostra de imagens.
+
+    Successive halving: todos os candidatos começam avaliados em poucas
+    imagens; a cada rodada só o melhor 1/eta sobrevive e o número de
+    imagens é multiplicado por eta. Notas já calculadas são reaproveitadas.
+
+    Args:
+        imagens: caminhos (preferível com processos) ou arrays BGR
+        espaco: valores possíveis por parâmetro (padrão ESPACO_PADRAO)
+        n_candidatos: combinações sorteadas na primeira rodada
+        eta: fator de corte/crescimento por rodada
+        roi: [x1, y1, x2, y2] aplicado a todas as imagens
+        n_workers: tamanho do pool (padrão: os.cpu_count())
+        usar_processos: ProcessPool em vez de ThreadPool
+        seed: semente do sorteio
+        callback: chamado como callback(rodada, n_vivos, melhor_nota)
+
+    Returns:
+        Dicionário com 'params', 'score', 'n_imagens' e 'historico'
+    """
+    if not imagens:
+        raise ValueError("É necessária ao menos uma imagem de amostra")
+    eta = max(2, int(eta))
+    candidatos = amostrar_candidatos(espaco or ESPACO_PADRAO, n_candidatos, seed)
+    n_rodadas = max(0, int(math.floor(math.log(len(candidatos), eta))))
+    orcamento = max(1, len(imagens) // (eta ** n_rodadas))
+
+    notas: Dict[tuple, float] = {}
+    vivos = list(range(len(candidatos)))
+    historico = []
+    medias: Dict[int, float] = {}
+    Pool = ProcessPoolExecutor if usar_processos else ThreadPoolExecutor
+
+    with Pool(max_workers=n_workers) as pool:
+        rodada = 0
+        while True:
+            pendentes = [(c, i) for c in vivos for i in range(orcamento) if (c, i) not in notas]
+            tarefas = [(candidatos[c], imagens[i], roi) for c, i in pendentes]
+            for chave, nota in zip(pendentes, pool.map(_avaliar_tarefa, tarefas)):
+                notas[chave] = nota
+
+            medias = {c: float(np.mean([notas[(c, i)] for i in range(orcamento)])) for c in vivos}
+            vivos.sort(key=lambda c: medias[c], reverse=True)
+            historico.append({"rodada": rodada, "n_candidatos": len(vivos),
+                              "n_imagens": orcamento, "melhor": medias[vivos[0]]})
+            if callback is not None:
+                callback(rodada, len(vivos), medias[vivos[0]])
+
+            if len(vivos) == 1:
+                break
+            vivos = vivos[:max(1, len(vivos) // eta)]
+            orcamento = min(len(imagens), orcamento * eta)
+            rodada += 1
+
+    melhor = vivos[0]
+    return {"params": candidatos[melhor], "score": medias[melhor],
+            "n_imagens": orcamento, "historico": historico}
+
+
+# =================================================================
+# BLOCO 3: PERFIS POR CÂMERA
+# =================================================================
+
+def _path_perfil(camera_id: Union[int, str], diretorio: str) -> str:
+    return os.path.join(diretorio, f"camera_{camera_id}.json")
+
+
+def salvar_perfil(camera_id: Union[int, str], resultado: Dict[str, Any], diretorio: str = DIR_PERFIS) -> str:
+    """Grava o perfil vencedor (params + nota) da câmera em JSON."""
+    os.makedirs(diretorio, exist_ok=True)
+    path = _path_perfil(camera_id, diretorio)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"camera_id": camera_id, "params": resultado["params"],
+                   "score": resultado.get("score")}, f, indent=2)
+    return path
+
+
+def carregar_perfil(camera_id: Union[int, str], diretorio: str = DIR_PERFIS) -> Optional[Dict[str, Any]]:
+    """Parâmetros salvos para a câmera, ou None se não houver perfil."""
+    path = _path_perfil(camera_id, diretorio)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            params = json.load(f).get("params") or {}
+    except (OSError, ValueError):
+        return None
+    # JSON não tem tuplas: clahe_grid volta como lista
+    if params.get("clahe_grid") is not None:
+        params["clahe_grid"] = tuple(params["clahe_grid"])
+    return params
+
+
+# =================================================================
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Ajuste automático dos parâmetros de pré-processamento")
+    ap.add_argument("imagens", nargs="+", help="imagens de amostra da câmera")
+    ap.add_argument("--camera", required=True, help="identificador da câmera (nome do perfil)")
+    ap.add_argument("--roi", type=int, nargs=4, metavar=("X1", "Y1", "X2", "Y2"))
+    ap.add_argument("--amostra", type=int, default=24, help="máximo de imagens usadas")
+    ap.add_argument("--candidatos", type=int, default=64)
+    ap.add_argument("--eta", type=int, default=3)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+
+    amostra = list(a.imagens)
+    random.Random(a.seed).shuffle(amostra)
+    amostra = amostra[:a.amostra]
+
+    res = ajustar_parametros(
+        amostra, n_candidatos=a.candidatos, eta=a.eta, roi=a.roi,
+        n_workers=a.workers, usar_processos=True, seed=a.seed,
+        callback=lambda r, n, s: print(f"[AUTOTUNE] rodada {r}: {n} candidatos, melhor nota {s:.3f}")
+    )
+    print(f"[AUTOTUNE] Vencedor: {res['params']} (nota {res['score']:.3f})")
+    print(f"[AUTOTUNE] Perfil salvo em {salvar_perfil(a.camera, res)}")
@@ -0,0 +1,304 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES DO CACHE
+# =================================================================
+CACHE_MEM_MAX_ITENS = 256                    # entradas no nível em memória (LRU)
+CACHE_MEM_MAX_BYTES = 512 * 1024 ** 2        # e bytes (arrays NumPy contados por nbytes)
+CACHE_DISCO_MAX_BYTES = 2 * 1024 ** 3        # limite do nível em disco (2 GB)
+CACHE_DISCO_FRACAO_ALVO = 0.9                # após despejo, fica em 90% do limite
+CACHE_DIR_PADRAO = os.path.join(os.path.expanduser("~"), "Pictures", "capturas_Angle", "cache")
+
+_AUSENTE = object()  # sentinela: distingue "não está no cache" de um resultado None
+
+
+# =================================================================
+# BLOCO 1: DIGESTS (as chaves dos estágios vêm de pipeline.grafo)
+# =================================================================
+
+def digest_imagem(img: np.ndarray) -> str:
+    """
+    Digest rápido (BLAKE2b, 128 bits) do conteúdo de uma imagem.
+
+    Inclui shape e dtype para que imagens com os mesmos bytes mas
+    geometria diferente não colidam.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.shape}|{img.dtype}".encode())
+    h.update(memoryview(np.ascontiguousarray(img)).cast("B"))
+    return h.hexdigest()
+
+
+def digest_arquivo(path: str, bloco: int = 1 << 20) -> str:
+    """Digest dos bytes do arquivo (evita decodificar a imagem quando tudo está em cache)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+# =================================================================
+# BLOCO 2: NÍVEL EM MEMÓRIA (LRU)
+# =================================================================
+
+def _atributos(valor: Any):
+    """Atributos de um objeto comum (__dict__ e __slots__ de toda a hierarquia)."""
+    attrs = list(getattr(valor, "__dict__", {}).values())
+    for cls in type(valor).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for nome in ((slots,) if isinstance(slots, str) else slots):
+            if nome not in ("__dict__", "__weakref__") and hasattr(valor, nome):
+                attrs.append(getattr(valor, nome))
+    return attrs
+
+
+def tamanho_bytes(valor: Any, _vistos: Optional[set] = None) -> int:
+    """
+    Estimativa do tamanho de um resultado: arrays pelo nbytes, contêineres
+    e objetos (ex.: ContornoCompacto) pela soma do que carregam.
+
+    Cada objeto entra uma vez só; views contam o array dono dos dados.
+    """
+    vistos = set() if _vistos is None else _vistos
+    if isinstance(valor, np.ndarray):
+        while isinstance(valor.base, np.ndarray):
+            valor = valor.base
+        if id(valor) in vistos:
+            return 0
+        vistos.add(id(valor))
+        return int(valor.nbytes)
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_bytes(v, vistos) for v in valor.values())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamanho_bytes(v, vistos) for v in valor)
+    if isinstance(valor, (str, bytes, int, float, complex, bool, type(None), type)) or callable(valor):
+        return sys.getsizeof(valor)
+    return sys.getsizeof(valor) + sum(tamanho_bytes(v, vistos) for v in _atributos(valor))
+
+
+class CacheMemoria:
+    """
+    LRU em memória, thread-safe, limitado pelo número de entradas e pelo
+    total de bytes (um único 'pre' de uma imagem grande pode ter centenas
+    de MB). Entradas maiores que o limite inteiro não são guardadas.
+    """
+
+    def __init__(self, max_itens: int = CACHE_MEM_MAX_ITENS, max_bytes: int = CACHE_MEM_MAX_BYTES):
+        self.max_itens = max(1, int(max_itens))
+        self.max_bytes = int(max_bytes)
+        self._dados: "OrderedDict[str, Any]" = OrderedDict()
+        self._tamanhos: Dict[str, int] = {}
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, chave: str) -> Any:
+        with self._lock:
+            if chave not in self._dados:
+                return _AUSENTE
+            self._dados.move_to_end(chave)
+            return self._dados[chave]
+
+    def put(self, chave: str, valor: Any) -> None:
+        tam = tamanho_bytes(valor)
+        with self._lock:
+            self.total_bytes -= self._tamanhos.pop(chave, 0)
+            self._dados.pop(chave, None)
+            if tam > self.max_bytes:
+                return
+            self._dados[chave] = valor
+            self._tamanhos[chave] = tam
+            self.total_bytes += tam
+            while len(self._dados) > self.max_itens or self.total_bytes > self.max_bytes:
+                antiga, _ = self._dados.popitem(last=False)
+                self.total_bytes -= self._tamanhos.pop(antiga)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._dados.clear()
+            self._tamanhos.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+
+# =================================================================
+# BLOCO 3: NÍVEL EM DISCO (despejo por tamanho)
+# =================================================================
+
+class CacheDisco:
+    """
+    Cache em disco: um arquivo pickle por entrada.
+
+    O mtime de cada arquivo é atualizado a cada acerto, e o despejo remove
+    os arquivos menos recentes até o total ficar abaixo do limite.
+    """
+
+    def __init__(self, diretorio: str = CACHE_DIR_PADRAO, max_bytes: int = CACHE_DISCO_MAX_BYTES):
+        self.diretorio = diretorio
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._total = sum(os.path.getsize(p) for p in self._arquivos())
+
+    def _arquivos(self):
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".pkl"):
+                yield os.path.join(self.diretorio, nome)
+
+    def _path(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.pkl")
+
+    def get(self, chave: str) -> Any:
+        path = self._path(chave)
+        try:
+            with open(path, "rb") as f:
+                valor = pickle.load(f)
+            os.utime(path, None)
+            return valor
+        except FileNotFoundError:
+            return _AUSENTE
+        except Exception:
+            # arquivo corrompido/truncado: descarta e trata como ausência
+            self._remover(path)
+            return _AUSENTE
+
+    def put(self, chave: str, valor: Any) -> None:
+        path = self._path(chave)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            antigo = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)  # escrita atômica
+            with self._lock:
+                self._total += os.path.getsize(path) - antigo
+        except Exception:
+            # o cache nunca deve interromper a análise
+            self._remover(tmp)
+            return
+        if self._total > self.max_bytes:
+            self._despejar()
+
+    def _remover(self, path: str) -> int:
+        try:
+            tam = os.path.getsize(path)
+            os.remove(path)
+            return tam
+        except OSError:
+            return 0
+
+    def _despejar(self) -> None:
+        alvo = int(self.max_bytes * CACHE_DISCO_FRACAO_ALVO)
+        with self._lock:
+            entradas = []
+            for p in self._arquivos():
+                try:
+                    st = os.stat(p)
+                    entradas.append((st.st_mtime, st.st_size, p))
+                except OSError:
+                    continue
+            entradas.sort()
+            total = sum(e[1] for e in entradas)
+            for _, _, p in entradas:
+                if total <= alvo:
+                    break
+                total -= self._remover(p)
+            self._total = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for p in list(self._arquivos()):
+                self._remover(p)
+            self._total = 0
+
+
+# =================================================================
+# BLOCO 4: CACHE EM DOIS NÍVEIS
+# =================================================================
+
+class CacheResultados:
+    """
+    Cache de resultados por estágio (memória → disco).
+
+    Cada estágio (ex.: "pre", "contorno", "baseline") é gravado sob a chave
+    da entrada (digest + ROI + parâmetros), de modo que mudar apenas o
+    método de ângulo reaproveita todos os estágios anteriores.
+
+    persistir=False mantém o estágio só na memória: imagens em resolução
+    cheia encheriam o disco e empurrariam para fora as entradas pequenas
+    (contorno, baseline) que valem a pena guardar entre execuções.
+    """
+
+    def __init__(self, memoria: Optional[CacheMemoria] = None, disco: Optional[CacheDisco] = None):
+        self.memoria = memoria if memoria is not None else CacheMemoria()
+        self.disco = disco
+        self.acertos = 0
+        self.falhas = 0
+
+    def get(self, estagio: str, chave: str, persistir: bool = True) -> Any:
+        k = f"{estagio}-{chave}"
+        valor = self.memoria.get(k)
+        if valor is not _AUSENTE:
+            return valor
+        if self.disco is not None and persistir:
+            valor = self.disco.get(k)
+            if valor is not _AUSENTE:
+                self.memoria.put(k, valor)  # promove ao nível em memória
+        return valor
+
+    def put(self, estagio: str, chave: str, valor: Any, persistir: bool = True) -> None:
+        k = f"{estagio}-{chave}"
+        self.memoria.put(k, valor)
+        if self.disco is not None and persistir:
+            self.disco.put(k, valor)
+
+    def obter_ou_calcular(self, estagio: str, chave: Optional[str], func: Callable, *args,
+                          persistir: bool = True, **kwargs) -> Any:
+        """Retorna o valor cacheado do estágio ou calcula func(*args, **kwargs) e grava."""
+        if chave is None:
+            return func(*args, **kwargs)
+        valor = self.get(estagio, chave, persistir)
+        if valor is not _AUSENTE:
+            self.acertos += 1
+            return valor
+        self.falhas += 1
+        valor = func(*args, **kwargs)
+        self.put(estagio, chave, valor, persistir)
+        return valor
+
+    def clear(self) -> None:
+        self.memoria.clear()
+        if self.disco is not None:
+            self.disco.clear()
+
+
+_cache_padrao: Optional[CacheResultados] = None
+_cache_padrao_lock = threading.Lock()
+
+
+def obter_cache_padrao(usar_disco: bool = True) -> CacheResultados:
+    """Cache compartilhado do processo (criado sob demanda)."""
+    global _cache_padrao
+    with _cache_padrao_lock:
+        if _cache_padrao is None:
+            disco = None
+            if usar_disco:
+                try:
+                    disco = CacheDisco()
+                except OSError:
+                    disco = None  # sem permissão de escrita: apenas memória
+            _cache_padrao = CacheResultados(disco=disco)
+        return _cache_padrao
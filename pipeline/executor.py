@@ -0,0 +1,169 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from pipeline.metricas import obter_metricas
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+POLL_MS = 30                                    # intervalo de verificação no loop do Tk
+MAX_WORKERS_PADRAO = max(2, min(4, (os.cpu_count() or 2) // 2))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> ThreadPoolExecutor:
+    """Pool de threads compartilhado pelas janelas (OpenCV libera o GIL)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS_PADRAO, thread_name_prefix="analise")
+            obter_metricas().registrar_fila("pool", profundidade_pool)
+        return _pool
+
+
+def profundidade_pool() -> int:
+    """Tarefas aguardando um trabalhador livre no pool compartilhado."""
+    pool = _pool
+    fila = getattr(pool, "_work_queue", None)
+    return fila.qsize() if fila is not None else 0
+
+
+class AnaliseCancelada(Exception):
+    """Levantada dentro do trabalhador quando a requisição foi substituída/cancelada."""
+
+
+class TokenCancelamento:
+    """
+    Passado à função de trabalho: permite reportar progresso e interromper
+    cedo (entre estágios) quando a requisição deixou de ser a atual.
+    """
+
+    def __init__(self, geracao: int, fila: "queue.Queue"):
+        self.geracao = geracao
+        self._fila = fila
+        self._evento = threading.Event()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+    def cancelar(self) -> None:
+        self._evento.set()
+
+    def verificar(self) -> None:
+        if self._evento.is_set():
+            raise AnaliseCancelada()
+
+    def progresso(self, fracao: float, mensagem: str = "") -> None:
+        """Reporta progresso (0-1) e é também um ponto de cancelamento."""
+        self.verificar()
+        self._fila.put(("progresso", self.geracao, (float(fracao), mensagem)))
+
+
+class ExecutorAnalise:
+    """
+    Executa análises fora da thread do Tk e entrega os resultados de volta
+    via widget.after.
+
+    Cada submissão recebe uma geração; submeter de novo (ou cancelar)
+    invalida a anterior, e resultados de gerações antigas são descartados.
+    """
+
+    def __init__(self, widget, pool: Optional[ThreadPoolExecutor] = None):
+        self.widget = widget
+        self.pool = pool if pool is not None else obter_pool()
+        self._fila: "queue.Queue" = queue.Queue()
+        self._geracao = 0
+        self._token: Optional[TokenCancelamento] = None
+        self._future: Optional[Future] = None
+        self._callbacks = {}
+        self._poll_agendado = False
+
+    @property
+    def ocupado(self) -> bool:
+        return self._token is not None
+
+    def submeter(self,
+                 func: Callable[..., Any],
+                 *args,
+                 on_done: Callable[[Any], None],
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 on_progress: Optional[Callable[[float, str], None]] = None,
+                 **kwargs) -> Future:
+        """
+        Agenda func(token, *args, **kwargs) no pool.
+
+        Os callbacks rodam na thread do Tk; on_done/on_error só são chamados
+        se esta ainda for a requisição mais recente.
+        """
+        self.cancelar()
+        self._geracao += 1
+        geracao = self._geracao
+        token = TokenCancelamento(geracao, self._fila)
+        self._token = token
+        self._callbacks = {"done": on_done, "error": on_error, "progress": on_progress}
+        t_submissao = time.perf_counter()
+
+        def _tarefa():
+            try:
+                valor = func(token, *args, **kwargs)
+                # latência percebida: inclui a espera na fila do pool
+                obter_metricas().registrar("analise", time.perf_counter() - t_submissao)
+                self._fila.put(("ok", geracao, valor))
+            except AnaliseCancelada:
+                obter_metricas().contar("analises_canceladas")
+                self._fila.put(("cancelado", geracao, None))
+            except Exception as e:
+                self._fila.put(("erro", geracao, e))
+
+        self._future = self.pool.submit(_tarefa)
+        self._agendar_poll()
+        return self._future
+
+    def cancelar(self) -> None:
+        """Cancela a requisição atual (se ainda não começou, nem chega a rodar)."""
+        if self._token is not None:
+            self._token.cancelar()
+        if self._future is not None:
+            self._future.cancel()
+        self._token = None
+        self._future = None
+
+    def _agendar_poll(self) -> None:
+        if not self._poll_agendado:
+            self._poll_agendado = True
+            self.widget.after(POLL_MS, self._poll)
+
+    def _poll(self) -> None:
+        self._poll_agendado = False
+        try:
+            while True:
+                tipo, geracao, valor = self._fila.get_nowait()
+                if geracao != self._geracao or self._token is None:
+                    continue  # resultado obsoleto: requisição substituída
+                if tipo == "progresso":
+                    cb = self._callbacks.get("progress")
+                    if cb is not None:
+                        cb(*valor)
+                    continue
+                cbs = self._callbacks
+                self._token = None
+                self._future = None
+                if tipo == "ok":
+                    cbs["done"](valor)
+                elif tipo == "erro" and cbs.get("error") is not None:
+                    cbs["error"](valor)
+        except queue.Empty:
+            pass
+        except Exception as e:
+            # widget destruído entre a submissão e a entrega
+            print(f"[EXECUTOR] Erro ao entregar resultado: {e}")
+            return
+        if self._token is not None:
+            self._agendar_poll()
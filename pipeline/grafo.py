@@ -0,0 +1,185 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pipeline.cache import CacheResultados
+
+
+# =================================================================
+# BLOCO 1: DEFINIÇÃO DO GRAFO
+# =================================================================
+
+class Estagio:
+    """
+    Nó do grafo: func(*valores das entradas, **parâmetros do nó).
+
+    Args:
+        nome: identificador do nó (também o nome do estágio no cache)
+        func: função do estágio
+        entradas: nomes dos nós cujas saídas são os argumentos posicionais
+        params: nomes dos parâmetros da execução que o nó consome; só os
+            informados entram na chamada (os demais ficam no default da func)
+        versao: mude quando a implementação mudar para invalidar o cache
+        cachear: False para nós baratos (recortes, extrações de campos)
+        persistir: False mantém o nó só no nível em memória (saídas com
+            imagens em resolução cheia)
+    """
+
+    __slots__ = ("nome", "func", "entradas", "params", "versao", "cachear", "persistir")
+
+    def __init__(self, nome: str, func: Callable, entradas: Sequence[str] = (),
+                 params: Sequence[str] = (), versao: str = "1", cachear: bool = True,
+                 persistir: bool = True):
+        self.nome = nome
+        self.func = func
+        self.entradas = tuple(entradas)
+        self.params = tuple(params)
+        self.versao = versao
+        self.cachear = cachear
+        self.persistir = persistir
+
+
+class GrafoEstagios:
+    """
+    Grafo declarativo de estágios (adicionados em ordem topológica).
+
+    A chave de cada nó combina nome, versão, os parâmetros que ele consome e
+    as chaves das suas entradas. Mudar um parâmetro muda só a chave dos nós
+    que o consomem e dos que estão abaixo deles; os de cima continuam
+    acertando o cache.
+    """
+
+    def __init__(self, estagios: Iterable[Estagio] = ()):
+        self.estagios: Dict[str, Estagio] = {}
+        self._fontes: List[str] = []
+        for e in estagios:
+            self.adicionar(e)
+
+    def adicionar(self, estagio: Estagio) -> None:
+        if estagio.nome in self.estagios or estagio.nome in self._fontes:
+            raise ValueError(f"estágio duplicado ou já usado como fonte: {estagio.nome}")
+        for entrada in estagio.entradas:
+            # entradas sem estágio são fontes: precisam ser fornecidas na execução
+            if entrada not in self.estagios and entrada not in self._fontes:
+                self._fontes.append(entrada)
+        self.estagios[estagio.nome] = estagio
+
+    @property
+    def fontes(self) -> Tuple[str, ...]:
+        """Nós que não têm estágio (fornecidos em cada execução)."""
+        return tuple(self._fontes)
+
+    def abaixo(self, nome: str) -> List[str]:
+        """Nós afetados por uma mudança em 'nome' (ele incluso), em ordem."""
+        afetados = {nome}
+        for e in self.estagios.values():
+            if any(x in afetados for x in e.entradas):
+                afetados.add(e.nome)
+        return [n for n in self.estagios if n in afetados]
+
+    def executar(self,
+                 fontes: Dict[str, Tuple[Optional[str], Any]],
+                 params: Optional[Dict[str, Any]] = None,
+                 cache: Optional[CacheResultados] = None) -> "Execucao":
+        return Execucao(self, fontes, params, cache)
+
+
+# =================================================================
+# BLOCO 2: CHAVES
+# =================================================================
+
+def _normalizar(valor: Any) -> Any:
+    """Forma estável e serializável de um parâmetro (funções pelo nome qualificado)."""
+    if callable(valor):
+        return f"{getattr(valor, '__module__', '')}.{getattr(valor, '__qualname__', repr(valor))}"
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    return valor
+
+
+def chave_estagio(estagio: Estagio, params: Dict[str, Any], chaves_entradas: Sequence[str]) -> str:
+    payload = json.dumps(
+        {"n": estagio.nome, "v": estagio.versao, "e": list(chaves_entradas),
+         "p": {p: _normalizar(params[p]) for p in estagio.params if p in params}},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# =================================================================
+# BLOCO 3: EXECUÇÃO PREGUIÇOSA
+# =================================================================
+
+class Execucao:
+    """
+    Uma execução do grafo: valores calculados sob demanda e memorizados.
+
+    Pedir um nó avalia só o necessário: se ele está no cache, nem as suas
+    entradas são calculadas (ex.: a imagem nem é decodificada).
+
+    fontes: {nome: (chave, valor)}; valor pode ser uma função sem argumentos
+    (avaliada só se for preciso). Qualquer nó pode ser fornecido como fonte,
+    o que permite retomar o grafo do meio (ex.: a partir da binária).
+    Chave None desliga o cache desse nó e de tudo abaixo dele.
+    """
+
+    def __init__(self, grafo: GrafoEstagios, fontes: Dict[str, Tuple[Optional[str], Any]],
+                 params: Optional[Dict[str, Any]], cache: Optional[CacheResultados]):
+        self.grafo = grafo
+        self.fontes = dict(fontes)
+        self.params = {k: v for k, v in (params or {}).items() if v is not None}
+        self.cache = cache
+        self.tempos: Dict[str, float] = {}
+        self.recalculados: List[str] = []
+        self._chaves: Dict[str, Optional[str]] = {}
+        self._valores: Dict[str, Any] = {}
+
+    def chave(self, nome: str) -> Optional[str]:
+        if nome not in self._chaves:
+            if nome in self.fontes:
+                self._chaves[nome] = self.fontes[nome][0]
+            else:
+                estagio = self._estagio(nome)
+                entradas = [self.chave(e) for e in estagio.entradas]
+                self._chaves[nome] = None if any(c is None for c in entradas) \
+                    else chave_estagio(estagio, self.params, entradas)
+        return self._chaves[nome]
+
+    def _estagio(self, nome: str) -> Estagio:
+        try:
+            return self.grafo.estagios[nome]
+        except KeyError:
+            raise KeyError(f"'{nome}' não é estágio do grafo nem fonte fornecida") from None
+
+    def valor(self, nome: str) -> Any:
+        if nome in self._valores:
+            return self._valores[nome]
+        if nome in self.fontes:
+            v = self.fontes[nome][1]
+            v = v() if callable(v) else v
+            self._valores[nome] = v
+            return v
+
+        estagio = self._estagio(nome)
+        kwargs = {p: self.params[p] for p in estagio.params if p in self.params}
+
+        def _calcular():
+            args = [self.valor(e) for e in estagio.entradas]
+            t0 = time.perf_counter()
+            out = estagio.func(*args, **kwargs)
+            self.tempos[nome] = time.perf_counter() - t0
+            self.recalculados.append(nome)
+            return out
+
+        if self.cache is not None and estagio.cachear:
+            v = self.cache.obter_ou_calcular(nome, self.chave(nome), _calcular, persistir=estagio.persistir)
+        else:
+            v = _calcular()
+        self._valores[nome] = v
+        return v
+
+    def valores(self, nomes: Iterable[str]) -> Dict[str, Any]:
+        return {n: self.valor(n) for n in nomes}
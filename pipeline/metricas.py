@@ -0,0 +1,209 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+LATENCIA_MIN_S = 1e-4       # 0,1 ms: abaixo disso cai na primeira faixa
+LATENCIA_MAX_S = 10.0       # acima disso cai na última faixa
+FAIXAS_POR_DECADA = 20      # faixas log: erro relativo máximo ~12% por percentil
+JANELA_TAXA_S = 2.0         # janela das taxas (FPS)
+MAX_EVENTOS_TAXA = 1024     # teto de marcações guardadas por taxa
+
+
+class HistogramaLatencia:
+    """
+    Histograma de tamanho fixo com faixas logarítmicas.
+
+    Registrar é O(1) e não guarda amostras, então pode ficar ligado
+    indefinidamente; os percentis saem das fronteiras das faixas
+    (interpolação geométrica dentro da faixa).
+    """
+
+    def __init__(self, minimo_s: float = LATENCIA_MIN_S, maximo_s: float = LATENCIA_MAX_S,
+                 faixas_por_decada: int = FAIXAS_POR_DECADA):
+        self._log_min = math.log10(minimo_s)
+        self._passo = 1.0 / faixas_por_decada
+        n = int(math.ceil((math.log10(maximo_s) - self._log_min) * faixas_por_decada))
+        self._contagens = np.zeros(n, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.n = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def _faixa(self, segundos: float) -> int:
+        if segundos <= 0:
+            return 0
+        i = int((math.log10(segundos) - self._log_min) / self._passo)
+        return min(max(i, 0), len(self._contagens) - 1)
+
+    def registrar(self, segundos: float) -> None:
+        i = self._faixa(segundos)
+        with self._lock:
+            self._contagens[i] += 1
+            self.n += 1
+            self.soma += segundos
+            self.maximo = max(self.maximo, segundos)
+
+    def percentis(self, ps=(50, 95, 99)) -> List[float]:
+        """Percentis em segundos (NaN se vazio)."""
+        with self._lock:
+            contagens = self._contagens.copy()
+            n = self.n
+            maximo = self.maximo
+        if n == 0:
+            return [float("nan")] * len(ps)
+        acumulado = np.cumsum(contagens)
+        saida = []
+        for p in ps:
+            alvo = p / 100.0 * n
+            i = int(np.searchsorted(acumulado, alvo))
+            i = min(i, len(contagens) - 1)
+            antes = acumulado[i - 1] if i > 0 else 0
+            frac = (alvo - antes) / contagens[i] if contagens[i] else 1.0
+            # interpolação dentro do balde pode passar do maior valor registrado
+            saida.append(min(10 ** (self._log_min + (i + frac) * self._passo), maximo))
+        return saida
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._contagens[:] = 0
+            self.n = 0
+            self.soma = 0.0
+            self.maximo = 0.0
+
+
+class MedidorTaxa:
+    """Eventos por segundo numa janela deslizante (ex.: FPS de captura)."""
+
+    def __init__(self, janela_s: float = JANELA_TAXA_S):
+        self.janela_s = janela_s
+        self._eventos = deque(maxlen=MAX_EVENTOS_TAXA)
+        self._lock = threading.Lock()
+
+    def marcar(self, t: Optional[float] = None) -> None:
+        with self._lock:
+            self._eventos.append(time.perf_counter() if t is None else t)
+
+    def taxa(self, agora: Optional[float] = None) -> float:
+        agora = time.perf_counter() if agora is None else agora
+        with self._lock:
+            while self._eventos and self._eventos[0] < agora - self.janela_s:
+                self._eventos.popleft()
+            n = len(self._eventos)
+            if n < 2:
+                return 0.0
+            return (n - 1) / max(self._eventos[-1] - self._eventos[0], 1e-9)
+
+
+class Metricas:
+    """
+    Registro de desempenho compartilhado pelos laços de captura, desenho e
+    análise. Todas as operações são thread-safe e baratas; instantaneo()
+    monta o retrato para o HUD/integradores.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencias: Dict[str, HistogramaLatencia] = {}
+        self._taxas: Dict[str, MedidorTaxa] = {}
+        self._contadores: Dict[str, int] = {}
+        self._filas: Dict[str, Callable[[], int]] = {}
+
+    def _obter(self, tabela: Dict, nome: str, fabrica):
+        item = tabela.get(nome)
+        if item is None:
+            with self._lock:
+                item = tabela.setdefault(nome, fabrica())
+        return item
+
+    def registrar(self, nome: str, segundos: float) -> None:
+        """Registra uma latência (segundos)."""
+        self._obter(self._latencias, nome, HistogramaLatencia).registrar(segundos)
+
+    @contextmanager
+    def medir(self, nome: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nome, time.perf_counter() - t0)
+
+    def marcar(self, nome: str, t: Optional[float] = None) -> None:
+        """Marca um evento de uma taxa (ex.: quadro capturado)."""
+        self._obter(self._taxas, nome, MedidorTaxa).marcar(t)
+
+    def contar(self, nome: str, n: int = 1) -> None:
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + n
+
+    def registrar_fila(self, nome: str, profundidade: Callable[[], int]) -> None:
+        """Fila consultada só na hora do retrato (profundidade() → int)."""
+        with self._lock:
+            self._filas[nome] = profundidade
+
+    def remover_fila(self, nome: str) -> None:
+        with self._lock:
+            self._filas.pop(nome, None)
+
+    def zerar(self) -> None:
+        with self._lock:
+            self._latencias.clear()
+            self._taxas.clear()
+            self._contadores.clear()
+
+    def instantaneo(self) -> Dict:
+        """
+        Retrato atual:
+            {'taxas': {nome: eventos/s},
+             'latencias': {nome: {'n', 'media', 'max', 'p50', 'p95', 'p99'}} (segundos),
+             'contadores': {nome: int}, 'filas': {nome: int}}
+        """
+        with self._lock:
+            latencias = dict(self._latencias)
+            taxas = dict(self._taxas)
+            contadores = dict(self._contadores)
+            filas = dict(self._filas)
+        saida = {"taxas": {k: m.taxa() for k, m in taxas.items()},
+                 "latencias": {}, "contadores": contadores, "filas": {}}
+        for k, h in latencias.items():
+            p50, p95, p99 = h.percentis((50, 95, 99))
+            saida["latencias"][k] = {"n": h.n, "media": h.soma / h.n if h.n else float("nan"),
+                                     "max": h.maximo, "p50": p50, "p95": p95, "p99": p99}
+        for k, f in filas.items():
+            try:
+                saida["filas"][k] = int(f())
+            except Exception:
+                saida["filas"][k] = -1
+        return saida
+
+
+def formatar_hud(inst: Dict) -> str:
+    """Texto compacto do retrato, uma grandeza por linha (ms para latências)."""
+    linhas = [f"{k}: {v:.1f} fps" for k, v in sorted(inst["taxas"].items())]
+    for k, lat in sorted(inst["latencias"].items()):
+        linhas.append(f"{k}: p50 {lat['p50'] * 1e3:.1f} / p95 {lat['p95'] * 1e3:.1f} / "
+                      f"p99 {lat['p99'] * 1e3:.1f} ms (n={lat['n']})")
+    if inst["filas"]:
+        linhas.append("filas: " + ", ".join(f"{k}={v}" for k, v in sorted(inst["filas"].items())))
+    linhas += [f"{k}: {v}" for k, v in sorted(inst["contadores"].items())]
+    return "\n".join(linhas)
+
+
+_metricas: Optional[Metricas] = None
+_metricas_lock = threading.Lock()
+
+
+def obter_metricas() -> Metricas:
+    """Registro de métricas compartilhado pelo processo."""
+    global _metricas
+    with _metricas_lock:
+        if _metricas is None:
+            _metricas = Metricas()
+        return _metricas
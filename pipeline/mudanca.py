@@ -0,0 +1,126 @@
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+TAMANHO_ASSINATURA = (64, 48)   # (largura, altura) da assinatura reduzida
+LIMIAR_MUDANCA = 3.0            # níveis de cinza (0-255) na assinatura
+FORCAR_A_CADA_S = 10.0          # reanalisa mesmo sem mudança após esse tempo (None = nunca)
+
+
+def assinatura_quadro(img: np.ndarray, roi: Optional[Sequence[int]] = None,
+                      tamanho=TAMANHO_ASSINATURA) -> np.ndarray:
+    """
+    Assinatura barata do quadro: cinza reduzido por média de área.
+
+    Cada pixel da assinatura é a média de um bloco, então o ruído do sensor
+    cai com a raiz da área do bloco e a comparação fica estável.
+    """
+    if roi is not None:
+        x1, y1, x2, y2 = [int(v) for v in roi]
+        img = img[y1:y2, x1:x2]
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    return cv2.resize(gray, tamanho, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+class DetectorMudanca:
+    """
+    Decide se um quadro difere do último quadro analisado.
+
+    A comparação é contra o último quadro *analisado* (não o anterior), de
+    modo que uma deriva lenta acumula até passar do limiar. A métrica é a
+    maior diferença absoluta da assinatura, sensível a mudanças locais (a
+    linha de contato andando) e não só à média.
+    """
+
+    def __init__(self, limiar: float = LIMIAR_MUDANCA, roi: Optional[Sequence[int]] = None,
+                 tamanho=TAMANHO_ASSINATURA, forcar_a_cada_s: Optional[float] = FORCAR_A_CADA_S):
+        """
+        Args:
+            limiar: diferença máxima (níveis de cinza) tolerada na assinatura
+            roi: [x1, y1, x2, y2] restringe a comparação à faixa da gota
+            tamanho: (largura, altura) da assinatura
+            forcar_a_cada_s: intervalo máximo sem reanálise
+        """
+        self.limiar = float(limiar)
+        self.roi = list(roi) if roi is not None else None
+        self.tamanho = tuple(tamanho)
+        self.forcar_a_cada_s = forcar_a_cada_s
+        self._referencia: Optional[np.ndarray] = None
+        self._t_referencia = 0.0
+        self._candidato: Optional[Tuple[np.ndarray, float]] = None
+        self.ultima_diferenca = float("inf")
+        self.n_mudou = 0
+        self.n_igual = 0
+
+    def definir_roi(self, roi: Optional[Sequence[int]]) -> None:
+        """Troca a região comparada (invalida a referência)."""
+        self.roi = list(roi) if roi is not None else None
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self._referencia = None
+        self._candidato = None
+
+    def mudou(self, img: np.ndarray, t: Optional[float] = None, atualizar: bool = True) -> bool:
+        """
+        True se o quadro deve ser analisado. Com atualizar=True (padrão), um
+        quadro que mudou passa a ser a nova referência; com atualizar=False
+        ele só vira referência em confirmar() (ex.: depois de analisado).
+        """
+        t = time.perf_counter() if t is None else t
+        assin = assinatura_quadro(img, self.roi, self.tamanho)
+        if self._referencia is None or self._referencia.shape != assin.shape:
+            self.ultima_diferenca = float("inf")
+            resultado = True
+        else:
+            self.ultima_diferenca = float(np.max(cv2.absdiff(assin, self._referencia)))
+            resultado = self.ultima_diferenca > self.limiar
+            if not resultado and self.forcar_a_cada_s is not None:
+                resultado = t - self._t_referencia >= self.forcar_a_cada_s
+        if resultado:
+            self.n_mudou += 1
+            self._candidato = (assin, t)
+            if atualizar:
+                self.confirmar()
+        else:
+            self.n_igual += 1
+        return resultado
+
+    def confirmar(self) -> None:
+        """Promove a referência o último quadro que mudou(atualizar=False) aprovou."""
+        if self._candidato is not None:
+            self._referencia, self._t_referencia = self._candidato
+            self._candidato = None
+
+
+class AnaliseComReuso:
+    """
+    Envolve uma função de análise: quadros sem mudança reaproveitam o último
+    resultado (marcado com 'reutilizado': True) em vez de rodar o pipeline.
+    """
+
+    def __init__(self, analisar: Callable[..., Dict[str, Any]], detector: Optional[DetectorMudanca] = None):
+        self.analisar = analisar
+        self.detector = detector or DetectorMudanca()
+        self._ultimo: Optional[Dict[str, Any]] = None
+
+    def __call__(self, img: np.ndarray, *args, t: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        if self._ultimo is not None and not self.detector.mudou(img, t, atualizar=False):
+            return dict(self._ultimo, reutilizado=True)
+        if self._ultimo is None:
+            self.detector.mudou(img, t, atualizar=False)  # primeiro quadro: candidato a referência
+        res = self.analisar(img, *args, **kwargs)
+        # o quadro só vira referência depois de analisado: se a análise
+        # levantar exceção, o próximo quadro ainda difere da referência
+        # antiga e é reanalisado, em vez de herdar o resultado anterior
+        self.detector.confirmar()
+        self._ultimo = res
+        return dict(res, reutilizado=False)
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {"analisados": self.detector.n_mudou, "reutilizados": self.detector.n_igual}
@@ -0,0 +1,309 @@
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from pipeline.metricas import obter_metricas
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+SLOTS_POR_TRABALHADOR = 3    # quadros em voo por processo (um analisando, outros na fila)
+TIMEOUT_RESULTADO_S = 0.2
+
+
+class AnelCompartilhado:
+    """
+    Anel de N quadros (slots) num bloco multiprocessing.shared_memory.
+
+    Criador e trabalhadores enxergam o mesmo bloco: um slot é acessado
+    pelo índice como uma visão NumPy, sem cópia nem pickle.
+    """
+
+    def __init__(self, n_slots: int, shape: Sequence[int], dtype=np.uint8, nome: Optional[str] = None):
+        self.n_slots = int(n_slots)
+        self.shape = tuple(int(v) for v in shape)
+        self.dtype = np.dtype(dtype)
+        self.bytes_slot = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.criador = nome is None
+        if self.criador:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.n_slots * self.bytes_slot)
+        else:
+            try:
+                # só o criador remove o bloco (Python 3.13+; antes disso o
+                # resource_tracker do processo anexado pode avisar na saída)
+                self.shm = shared_memory.SharedMemory(name=nome, track=False)
+            except TypeError:
+                self.shm = shared_memory.SharedMemory(name=nome)
+        self._anel = np.ndarray((self.n_slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def nome(self) -> str:
+        return self.shm.name
+
+    def vista(self, slot: int) -> np.ndarray:
+        return self._anel[slot]
+
+    def fechar(self) -> None:
+        """Solta as visões e o mapeamento; o criador também remove o bloco."""
+        self._anel = None
+        self.shm.close()
+        if self.criador:
+            self.shm.unlink()
+
+
+def _trabalhador(nome_shm: str, n_slots: int, shape, dtype, tarefas, resultados, ocupantes,
+                 funcao: Optional[Callable]) -> None:
+    """Laço de um processo: analisa slots pelo índice até receber None."""
+    from pipeline.analise import analisar_imagem
+
+    funcao = funcao or analisar_imagem
+    anel = AnelCompartilhado(n_slots, shape, dtype, nome=nome_shm)
+    try:
+        while True:
+            tarefa = tarefas.get()
+            if tarefa is None:
+                return
+            seq, slot, roi, pre_params = tarefa
+            # escrita direta na memória compartilhada (uma mensagem na fila se
+            # perderia com o processo): o coletor sabe quem está com o slot
+            ocupantes[slot] = os.getpid()
+            t0 = time.perf_counter()
+            try:
+                # visão direta do slot: o quadro não é copiado nem modificado
+                res = funcao(anel.vista(slot), roi=roi, pre_params=pre_params)
+            except Exception as e:
+                res = {"erro": str(e)}
+            res["pid"] = os.getpid()
+            res["t_analise"] = time.perf_counter() - t0
+            resultados.put((seq, slot, res))
+    finally:
+        anel.fechar()
+
+
+class PipelineMultiprocesso:
+    """
+    Análise ao vivo distribuída em processos, com quadros em memória compartilhada.
+
+    O processo de captura copia cada quadro num slot livre do anel e envia
+    só (seq, slot, roi, pre_params) aos trabalhadores; o slot volta a ficar
+    livre quando o resultado chega. Os resultados são reordenados pelo
+    número de sequência antes da entrega, então saem na ordem de captura
+    mesmo com processos terminando fora de ordem.
+
+    Sem slot livre (análise mais lenta que a câmera) o quadro é descartado
+    e contado em 'descartados', em vez de acumular atraso.
+
+    Se um processo morre no meio de uma análise (crash do OpenCV, OOM), o
+    quadro que estava com ele é entregue como {"erro": "trabalhador
+    encerrado"} e a entrega segue; sem nenhum processo vivo, todos os
+    pendentes saem assim.
+    """
+
+    def __init__(self, shape: Sequence[int], n_workers: Optional[int] = None, n_slots: Optional[int] = None,
+                 roi=None, pre_params: Optional[Dict[str, Any]] = None, funcao: Optional[Callable] = None,
+                 callback: Optional[Callable[[int, float, Dict], None]] = None):
+        """
+        Args:
+            shape: formato dos quadros (ex.: (480, 640, 3))
+            n_workers: processos trabalhadores (padrão: núcleos - 1)
+            n_slots: tamanho do anel (padrão: SLOTS_POR_TRABALHADOR × n_workers)
+            roi, pre_params: repassados a cada análise (podem mudar com definir_roi)
+            funcao: função de análise (padrão: pipeline.analise.analisar_imagem);
+                precisa ser importável pelos processos (nível de módulo)
+            callback: callback(seq, t, resultado) na ordem de captura, chamado
+                na thread coletora; sem callback use resultados()
+        """
+        self.n_workers = n_workers or max(1, (os.cpu_count() or 2) - 1)
+        n_slots = n_slots or SLOTS_POR_TRABALHADOR * self.n_workers
+        self.anel = AnelCompartilhado(n_slots, shape)
+        self.roi = roi
+        self.pre_params = pre_params
+        self.callback = callback
+        ctx = mp.get_context("spawn")  # mesmo comportamento em Windows/Linux; não herda o Tk
+        self._tarefas = ctx.Queue()
+        self._resultados = ctx.Queue()
+        self._ocupantes = ctx.RawArray("q", n_slots)   # slot → pid do processo que o analisa (0 = ninguém)
+        self._livres: "queue.Queue[int]" = queue.Queue()
+        for i in range(n_slots):
+            self._livres.put(i)
+        self._processos = [ctx.Process(target=_trabalhador, name=f"analise-mp-{i}", daemon=True,
+                                       args=(self.anel.nome, n_slots, self.anel.shape, self.anel.dtype,
+                                             self._tarefas, self._resultados, self._ocupantes, funcao))
+                           for i in range(self.n_workers)]
+        self._saida: "queue.Queue" = queue.Queue()
+        self._pendentes: Dict[int, Tuple[float, float, int]] = {}   # seq → (t captura, t envio, slot)
+        self._lock = threading.Lock()
+        self._proximo_seq = 0
+        self._proximo_entregue = 0
+        self._parar = threading.Event()
+        self._coletor = threading.Thread(target=self._coletar, name="coletor-mp", daemon=True)
+        self.descartados = 0
+        self.entregues = 0
+        for p in self._processos:
+            p.start()
+        self._coletor.start()
+        obter_metricas().registrar_fila("slots_ocupados", lambda: n_slots - self._livres.qsize())
+
+    # ---------------- CAPTURA ----------------
+    def definir_roi(self, roi, pre_params: Optional[Dict[str, Any]] = None) -> None:
+        """Vale para os quadros enviados daqui em diante."""
+        self.roi = roi
+        if pre_params is not None:
+            self.pre_params = pre_params
+
+    def enviar(self, quadro: np.ndarray, t: Optional[float] = None) -> Optional[int]:
+        """
+        Copia o quadro para um slot livre e agenda a análise.
+
+        Returns:
+            número de sequência, ou None se não havia slot livre (descartado)
+        """
+        t = time.perf_counter() if t is None else t
+        try:
+            slot = self._livres.get_nowait()
+        except queue.Empty:
+            self.descartados += 1
+            obter_metricas().contar("quadros_descartados_mp")
+            return None
+        np.copyto(self.anel.vista(slot), quadro)
+        with self._lock:
+            seq = self._proximo_seq
+            self._proximo_seq += 1
+            self._pendentes[seq] = (t, time.perf_counter(), slot)
+        self._tarefas.put((seq, slot, self.roi, self.pre_params))
+        return seq
+
+    # ---------------- COLETA E REORDENAÇÃO ----------------
+    def _coletar(self) -> None:
+        adiantados: Dict[int, Dict] = {}
+        while not self._parar.is_set() or self._pendentes:
+            try:
+                msg = self._resultados.get(timeout=TIMEOUT_RESULTADO_S)
+            except queue.Empty:
+                self._verificar_processos(adiantados)
+                if self._parar.is_set() and not any(p.is_alive() for p in self._processos):
+                    return
+                continue
+            self._receber(msg, adiantados)
+            self._verificar_processos(adiantados)
+            self._entregar(adiantados)
+
+    def _receber(self, msg, adiantados: Dict[int, Dict]) -> None:
+        seq, slot, res = msg
+        with self._lock:
+            resolvido = seq not in self._pendentes or seq in adiantados
+        if resolvido:
+            return  # já entregue como erro (processo dado como morto): o slot já voltou
+        self._liberar(slot)
+        adiantados[seq] = res
+
+    def _liberar(self, slot: int) -> None:
+        self._ocupantes[slot] = 0
+        self._livres.put(slot)  # o resultado não referencia o slot: já pode ser reescrito
+
+    def _verificar_processos(self, adiantados: Dict[int, Dict]) -> None:
+        """Quadros de processos mortos (ou todos, sem processo vivo) viram erro e liberam o slot."""
+        mortos = {p.pid for p in self._processos if p.exitcode is not None}
+        if not mortos:
+            return
+        # o que o processo enviou antes de morrer já está no pipe: lê tudo antes de dar como perdido
+        try:
+            while True:
+                self._receber(self._resultados.get_nowait(), adiantados)
+        except queue.Empty:
+            pass
+        todos = len(mortos) == len(self._processos)
+        with self._lock:
+            perdidos = [(s, slot) for s, (_, _, slot) in self._pendentes.items()
+                        if s not in adiantados and (todos or self._ocupantes[slot] in mortos)]
+        for s, slot in perdidos:
+            adiantados[s] = {"erro": "trabalhador encerrado"}
+            self._liberar(slot)
+            obter_metricas().contar("quadros_perdidos_mp")
+        self._entregar(adiantados)
+
+    def _entregar(self, adiantados: Dict[int, Dict]) -> None:
+        """Entrega, em ordem de captura, os resultados consecutivos já disponíveis."""
+        while self._proximo_entregue in adiantados:
+            s = self._proximo_entregue
+            res = adiantados.pop(s)
+            with self._lock:
+                t, t_envio, _ = self._pendentes.pop(s)
+            obter_metricas().registrar("analise_mp", time.perf_counter() - t_envio)
+            self._proximo_entregue += 1
+            self.entregues += 1
+            if self.callback is not None:
+                self.callback(s, t, res)
+            else:
+                self._saida.put((s, t, res))
+
+    def resultados(self, timeout: Optional[float] = None) -> Iterator[Tuple[int, float, Dict]]:
+        """Resultados já disponíveis, em ordem (sem callback); espera até timeout pelo primeiro."""
+        try:
+            yield self._saida.get(timeout=timeout)
+            while True:
+                yield self._saida.get_nowait()
+        except queue.Empty:
+            return
+
+    # ---------------- CICLO DE VIDA ----------------
+    def fechar(self) -> None:
+        """Espera as análises pendentes, encerra os processos e libera a memória."""
+        for _ in self._processos:
+            self._tarefas.put(None)
+        for p in self._processos:
+            p.join()
+        self._parar.set()
+        self._coletor.join()
+        obter_metricas().remover_fila("slots_ocupados")
+        self.anel.fechar()
+
+    def __enter__(self) -> "PipelineMultiprocesso":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+if __name__ == "__main__":
+    import cv2
+
+    ap = argparse.ArgumentParser(description="Análise ao vivo de uma câmera em vários processos")
+    ap.add_argument("--camera", type=int, default=0)
+    ap.add_argument("--roi", type=int, nargs=4, metavar=("X1", "Y1", "X2", "Y2"))
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--duracao", type=float, default=10.0, help="segundos de captura")
+    ap.add_argument("--saida", default="multiprocesso.csv")
+    a = ap.parse_args()
+
+    cap = cv2.VideoCapture(a.camera)
+    ok, quadro = cap.read()
+    if not ok:
+        raise SystemExit(f"Não foi possível ler a câmera {a.camera}")
+    with open(a.saida, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["seq", "t", "angulo_esq", "angulo_dir", "angulo_medio", "erro"])
+        t0 = time.perf_counter()
+
+        def _gravar(seq, t, res):
+            escritor.writerow([seq, f"{t - t0:.6f}", res.get("angulo_esq"), res.get("angulo_dir"),
+                               res.get("angulo_medio"), res.get("erro", "")])
+
+        with PipelineMultiprocesso(quadro.shape, a.workers, roi=a.roi, callback=_gravar) as pipe:
+            n = 0
+            while time.perf_counter() - t0 < a.duracao:
+                ok, quadro = cap.read()
+                if ok:
+                    pipe.enviar(quadro)
+                    n += 1
+    cap.release()
+    print(f"[MULTIPROCESSO] {n} quadros lidos, {pipe.entregues} analisados, "
+          f"{pipe.descartados} descartados ({pipe.n_workers} processos) → {a.saida}")
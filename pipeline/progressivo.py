@@ -0,0 +1,101 @@
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from pipeline.analise import GRAFO_ANALISE
+from pipeline.cache import CacheResultados
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+ESCALA_PREVIA = 0.35       # fração do lado do recorte usada enquanto o controle se move
+LADO_MIN_PREVIA = 160      # px: abaixo disso a gota some na redução e a prévia não serve
+# Parâmetros medidos em pixels: acompanham a escala da prévia
+PARAMS_EM_PIXELS = ("fechamento_px", "window_height")
+
+
+def escala_previa(shape, escala: float = ESCALA_PREVIA, lado_min: int = LADO_MIN_PREVIA) -> float:
+    """Fator de redução da prévia (1.0 = recorte pequeno demais para reduzir)."""
+    menor = min(shape[:2])
+    if menor <= 0:
+        return 1.0
+    return float(min(1.0, max(escala, lado_min / menor)))
+
+
+def _reduzir_params(params: Dict[str, Any], s: float) -> Dict[str, Any]:
+    out = dict(params)
+    for nome in PARAMS_EM_PIXELS:
+        if out.get(nome) is not None:
+            out[nome] = int(round(out[nome] * s)) if nome == "fechamento_px" else out[nome] * s
+    return out
+
+
+def _ampliar(res: Dict[str, Any], s: float) -> Dict[str, Any]:
+    """Leva contorno, baseline e contatos da prévia de volta às coordenadas do recorte."""
+    out = dict(res)
+    if out.get("gota_pts") is not None:
+        out["gota_pts"] = np.asarray(out["gota_pts"], dtype=np.float64) / s
+    if out.get("baseline_y") is not None:
+        out["baseline_y"] = float(out["baseline_y"]) / s
+    for lado in ("p_esq", "p_dir"):
+        if out.get(lado) is not None:
+            out[lado] = [float(v) / s for v in out[lado]]
+    if out.get("line_params") is not None:
+        vx, vy, x0, y0 = out["line_params"]
+        out["line_params"] = (float(vx), float(vy), float(x0) / s, float(y0) / s)
+    return out
+
+
+def avaliar(recorte: np.ndarray,
+            params: Dict[str, Any],
+            escala: float = 1.0,
+            chave: Optional[str] = None,
+            cache: Optional[CacheResultados] = None,
+            token=None) -> Dict[str, Any]:
+    """
+    Executa o grafo de análise a partir do recorte, opcionalmente reduzido.
+
+    Com escala < 1 o recorte é reduzido (INTER_AREA), os parâmetros em
+    pixels acompanham a redução e o resultado volta às coordenadas do
+    recorte original; os ângulos não dependem da escala, então a prévia
+    já mostra valores próximos dos finais. Prévias não usam o cache.
+
+    Args:
+        recorte: recorte BGR da ROI, em resolução cheia
+        params: parâmetros do grafo ('pre_params', 'fechamento_px', 'window_height'...)
+        escala: fator de redução (1.0 = resolução cheia)
+        chave: chave do recorte no cache (ex.chave("recorte")); só vale em escala 1
+        cache: CacheResultados; em escala 1 refazer um ajuste já visto é imediato
+        token: TokenCancelamento de ExecutorAnalise; verificado entre os estágios
+
+    Returns:
+        Dicionário com 'gota_pts', 'segmentacao', 'escala' e, se houver
+        contorno, o resultado de 'contato' (baseline_y, line_params, p_esq,
+        p_dir, method, contact_method) mais os ângulos. Em escala 1 inclui
+        também 'pre' (binária e imagem corrigida) e 'chave_binaria'.
+    """
+    verificar = token.verificar if token is not None else (lambda: None)
+    previa = escala < 1.0
+    if previa:
+        h, w = recorte.shape[:2]
+        tamanho = (max(1, int(round(w * escala))), max(1, int(round(h * escala))))
+        recorte = cv2.resize(recorte, tamanho, interpolation=cv2.INTER_AREA)
+        params = _reduzir_params(params, escala)
+        chave, cache = None, None
+    ex = GRAFO_ANALISE.executar({"recorte": (chave, recorte)}, params, cache)
+
+    pre = ex.valor("pre")
+    verificar()
+    gota_pts = ex.valor("contorno")
+    verificar()
+    res: Dict[str, Any] = {"gota_pts": gota_pts, "segmentacao": ex.valor("segmentacao"), "escala": escala}
+    if not previa:
+        res.update({"pre": pre, "chave_binaria": ex.chave("binaria")})
+    if gota_pts is None:
+        return res
+    res.update(ex.valor("contato"))
+    verificar()
+    res.update(ex.valor("angulos"))
+    res["tempos"] = ex.tempos
+    return _ampliar(res, escala) if previa else res
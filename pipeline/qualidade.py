@@ -0,0 +1,147 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# =================================================================
+# PESOS E REFERÊNCIAS DA NOTA DE QUALIDADE DO CONTORNO
+# =================================================================
+PESOS_QUALIDADE = {
+    "fechamento": 0.25,
+    "suavidade": 0.25,
+    "simetria": 0.25,
+    "residuo": 0.25,
+}
+PASSO_MAX_CONTIGUO = 2.0     # passos maiores que isso (px) são lacunas no contorno
+FAIXA_BASE_FRAC = 0.25       # faixa inferior do contorno (fração da altura) onde fica a linha de base
+INCLINACAO_MAX_BASE = 0.2    # |dy/dx| máximo de um salto ao longo da base (substrato inclinado ~11°)
+RESIDUO_REF_PX = 1.0         # RMS do ajuste (px) que reduz a nota de resíduo a 1/e
+JANELA_AJUSTE_PX = 50        # mesma janela de calcular_angulo_polinomial
+MARGEM_BORDA_PX = 12         # pontos a menos disso da borda contam como "tocando"
+
+
+def _fechamento(pts: np.ndarray) -> float:
+    """
+    1 - fração do perímetro composta por lacunas (saltos entre pontos consecutivos).
+
+    Saltos quase horizontais com as duas pontas na faixa inferior não são
+    lacunas: são o trecho ao longo da linha de base, aberto quando a máscara
+    de borda corta o substrato escuro (encontrar_contorno_gota).
+    """
+    prox = np.roll(pts, -1, axis=0)
+    delta = prox - pts
+    d = np.hypot(*delta.T)
+    total = float(d.sum())
+    if total <= 0:
+        return 0.0
+    y = pts[:, 1]
+    y_lim = float(y.max()) - FAIXA_BASE_FRAC * float(y.max() - y.min())
+    na_base = (y >= y_lim) & (prox[:, 1] >= y_lim) & \
+        (np.abs(delta[:, 1]) <= INCLINACAO_MAX_BASE * np.abs(delta[:, 0]))
+    lacunas = (d > PASSO_MAX_CONTIGUO) & ~na_base
+    return 1.0 - float(d[lacunas].sum()) / total
+
+
+def _suavidade(pts: np.ndarray) -> float:
+    """
+    Razão entre a curvatura total ideal (2π, curva fechada convexa) e a
+    curvatura absoluta total medida. Contornos serrilhados giram muito mais.
+    """
+    passo = max(2, len(pts) // 100)
+    amostra = pts[::passo]
+    if len(amostra) < 4:
+        return 0.0
+    v = np.roll(amostra, -1, axis=0) - amostra
+    ang = np.arctan2(v[:, 1], v[:, 0])
+    giro = np.abs(np.angle(np.exp(1j * (np.roll(ang, -1) - ang))))
+    total = float(giro.sum())
+    if total <= 0:
+        return 0.0
+    return min(1.0, 2.0 * math.pi / total)
+
+
+def _simetria(pts: np.ndarray) -> float:
+    """1 - mediana da diferença relativa entre as semilarguras esquerda e direita por linha."""
+    x = pts[:, 0].astype(np.float64)
+    y = np.round(pts[:, 1]).astype(np.int64)
+    xc = float(np.mean(x))
+    y0 = int(y.min())
+    n = int(y.max()) - y0 + 1
+    x_min = np.full(n, np.inf)
+    x_max = np.full(n, -np.inf)
+    np.minimum.at(x_min, y - y0, x)
+    np.maximum.at(x_max, y - y0, x)
+    validas = (x_min < xc) & (x_max > xc)
+    if not np.any(validas):
+        return 0.0
+    wl = xc - x_min[validas]
+    wr = x_max[validas] - xc
+    return float(1.0 - np.median(np.abs(wl - wr) / (wl + wr)))
+
+
+def _residuo_ajuste(pts: np.ndarray) -> Tuple[float, float]:
+    """RMS (px) do ajuste x = a·y² + b·y + c em cada lado, na janela acima da base."""
+    y_base = float(np.max(pts[:, 1]))
+    janela = pts[(pts[:, 1] < y_base) & (pts[:, 1] > y_base - JANELA_AJUSTE_PX)]
+    xc = float(np.mean(pts[:, 0]))
+    rms = []
+    for lado in (janela[janela[:, 0] < xc], janela[janela[:, 0] > xc]):
+        if len(lado) < 5:
+            rms.append(float("inf"))
+            continue
+        ys = lado[:, 1].astype(np.float64)
+        xs = lado[:, 0].astype(np.float64)
+        A = np.vander(ys - y_base, 3)
+        coef, *_ = np.linalg.lstsq(A, xs, rcond=None)
+        rms.append(float(np.sqrt(np.mean((A @ coef - xs) ** 2))))
+    return rms[0], rms[1]
+
+
+def pontuar_contorno(gota_pts: Optional[np.ndarray],
+                     shape: Optional[Tuple[int, int]] = None,
+                     pesos: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Nota de qualidade (0-1) de um contorno de gota.
+
+    Args:
+        gota_pts: Array Nx2 com pontos do contorno (x, y)
+        shape: (h, w) da imagem binária; habilita as notas de área e borda
+        pesos: pesos das componentes (padrão PESOS_QUALIDADE)
+
+    Returns:
+        Dicionário com 'score' e cada componente: fechamento, suavidade,
+        simetria, residuo (e area/borda se shape for informado)
+    """
+    if gota_pts is None or len(gota_pts) < 10:
+        return {"score": 0.0}
+    pts = np.asarray(gota_pts, dtype=np.float64).reshape(-1, 2)
+    pesos = dict(pesos or PESOS_QUALIDADE)
+
+    rms_esq, rms_dir = _residuo_ajuste(pts)
+    comp = {
+        "fechamento": _fechamento(pts),
+        "suavidade": _suavidade(pts),
+        "simetria": _simetria(pts),
+        "residuo": math.exp(-max(rms_esq, rms_dir) / RESIDUO_REF_PX),
+    }
+
+    if shape is not None:
+        h, w = shape[:2]
+        x, y = pts[:, 0], pts[:, 1]
+        # área pela fórmula do laço (shoelace), relativa à imagem
+        area = 0.5 * abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+        frac = area / float(h * w)
+        comp["area"] = 0.0 if frac < 0.005 or frac > 0.9 else 1.0
+        # o fundo é ignorado: a base da gota fica naturalmente perto da borda inferior do ROI
+        perto = (x < MARGEM_BORDA_PX) | (x > w - MARGEM_BORDA_PX) | (y < MARGEM_BORDA_PX)
+        comp["borda"] = 1.0 - float(np.mean(perto))
+        pesos.setdefault("area", 0.0)
+        pesos.setdefault("borda", 0.0)
+
+    soma_pesos = sum(pesos.get(k, 0.0) for k in comp)
+    score = sum(pesos.get(k, 0.0) * v for k, v in comp.items()) / soma_pesos if soma_pesos > 0 else 0.0
+    # a área funciona como portão: contorno de tamanho implausível zera a nota
+    if comp.get("area", 1.0) == 0.0:
+        score = 0.0
+    comp["score"] = float(score)
+    return comp
@@ -0,0 +1,136 @@
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from processamento_imagem import filtros, contorno
+from processamento_imagem.preprocess import preprocess_image_for_contact_angle
+from pipeline.qualidade import pontuar_contorno
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+# Calibrado em gotas sintéticas de 20-120° (ruído, gradiente de iluminação,
+# reflexo, desfoque, baixo contraste): segmentações corretas pelo Otsu ficam
+# entre 0.83 e 0.91
+LIMIAR_ACEITE = 0.80          # nota mínima para parar no nível atual da cascata
+MARGEM_SUPERACAO = 0.10       # um nível posterior só substitui o anterior se superar a nota por isso
+# Componentes de pontuar_contorno usadas na cascata: área (portão), fechamento,
+# contato com a borda e simetria pesam mais; suavidade/resíduo desempatam
+PESOS_CASCATA = {
+    "fechamento": 0.3,
+    "borda": 0.25,
+    "simetria": 0.25,
+    "suavidade": 0.1,
+    "residuo": 0.1,
+    "area": 0.0,
+}
+KERNEL_BORDAS = 5             # fechamento que liga as bordas do Canny num contorno contínuo
+
+
+# =================================================================
+# BLOCO 1: SEGMENTADORES (do mais barato ao mais caro)
+# =================================================================
+
+def _segmentar_otsu(cropped: np.ndarray, pre_params=None) -> Dict[str, Any]:
+    """Otsu global com blur e fechamento (filtros.py): ~1 ms, resolve imagens limpas."""
+    _, bin_img = filtros.aplicar_pre_processamento(cropped)
+    return {"binary": bin_img, "corrected_bgr": cropped, "debug_imgs": None}
+
+
+def _segmentar_preprocess(cropped: np.ndarray, pre_params=None) -> Dict[str, Any]:
+    """Pipeline completo de preprocess.py (iluminação, CLAHE, limiar adaptativo...)."""
+    pre = preprocess_image_for_contact_angle(cropped, **(pre_params or {}))
+    return {"binary": pre.get("binary"), "corrected_bgr": pre.get("corrected_bgr", cropped),
+            "debug_imgs": pre.get("debug_imgs")}
+
+
+def _segmentar_bordas(cropped: np.ndarray, pre_params=None) -> Dict[str, Any]:
+    """
+    Silhueta a partir das bordas (Canny com limiares pela mediana), para
+    quando o contraste de intensidade não separa gota e fundo. Antes era o
+    fallback implícito de encontrar_contorno_gota.
+    """
+    gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY) if cropped.ndim == 3 else cropped
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    med = float(np.median(blur))
+    bordas = cv2.Canny(blur, int(max(0, 0.66 * med)), int(min(255, 1.33 * med)))
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (KERNEL_BORDAS, KERNEL_BORDAS))
+    bordas = cv2.morphologyEx(bordas, cv2.MORPH_CLOSE, kernel, iterations=2)
+    conts, _ = cv2.findContours(bordas, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    bin_img = np.zeros_like(gray)
+    if conts:
+        cv2.drawContours(bin_img, conts, -1, 255, cv2.FILLED)
+    return {"binary": bin_img, "corrected_bgr": cropped, "debug_imgs": None}
+
+
+def niveis_cascata(pre_params: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Callable]]:
+    """
+    Ordem da cascata. Com parâmetros de perfil (pipeline/autotune.py), o
+    preprocess ajustado para a câmera vem primeiro.
+    """
+    niveis: List[Tuple[str, Callable]] = [("otsu", _segmentar_otsu), ("bordas", _segmentar_bordas)]
+    niveis.insert(0 if pre_params is not None else 1, ("preprocess", _segmentar_preprocess))
+    return niveis
+
+
+# =================================================================
+# BLOCO 2: CASCATA
+# =================================================================
+
+def segmentar_cascata(cropped: np.ndarray,
+                      pre_params: Optional[Dict[str, Any]] = None,
+                      limiar: float = LIMIAR_ACEITE,
+                      pesos: Optional[Dict[str, float]] = None,
+                      margem: float = MARGEM_SUPERACAO) -> Dict[str, Any]:
+    """
+    Segmenta a gota subindo de nível só quando o resultado é ruim.
+
+    Cada nível gera a binária, extrai o contorno e o pontua
+    (pipeline.qualidade.pontuar_contorno com o shape da binária). A cascata
+    para no primeiro nível com nota >= limiar. Um nível posterior só toma o
+    lugar do escolhido se superar a sua nota por 'margem': diferenças
+    pequenas de nota não justificam trocar o Otsu, cujos contatos são os de
+    referência. Exceções contam como nota 0.
+
+    Returns:
+        Dicionário com 'binary', 'corrected_bgr', 'debug_imgs', 'metodo'
+        (nível escolhido), 'qualidade' e 'tentativas' (nível, nota, tempo)
+    """
+    pesos = pesos or PESOS_CASCATA
+    melhor: Optional[Tuple[float, str, Dict[str, Any]]] = None
+    tentativas: List[Dict[str, Any]] = []
+    for nome, segmentar in niveis_cascata(pre_params):
+        t0 = time.perf_counter()
+        try:
+            pre = segmentar(cropped, pre_params)
+            binaria = pre.get("binary")
+            pts = None if binaria is None else contorno.encontrar_contorno_gota(binaria, permitir_canny=False)
+            nota = 0.0 if pts is None else pontuar_contorno(pts, shape=binaria.shape, pesos=pesos)["score"]
+        except Exception as e:
+            tentativas.append({"metodo": nome, "qualidade": 0.0, "tempo": time.perf_counter() - t0,
+                               "erro": str(e)})
+            continue
+        tentativas.append({"metodo": nome, "qualidade": nota, "tempo": time.perf_counter() - t0})
+        if binaria is not None and (melhor is None or nota > melhor[0] + margem):
+            melhor = (nota, nome, pre)
+        if nota >= limiar:
+            break
+    if melhor is None:
+        raise RuntimeError("nenhum segmentador produziu uma imagem binária: " +
+                           "; ".join(t.get("erro", t["metodo"]) for t in tentativas))
+    nota, nome, pre = melhor
+    return {"binary": pre["binary"], "corrected_bgr": pre.get("corrected_bgr", cropped),
+            "debug_imgs": pre.get("debug_imgs"), "metodo": nome, "qualidade": float(nota),
+            "tentativas": tentativas}
+
+
+def usou_fallback(segmentacao: Optional[Dict[str, Any]]) -> bool:
+    """
+    True quando a cascata não ficou no seu primeiro nível (a nota dele não
+    bastou). Aceita o resultado de segmentar_cascata ou o resumo do nó
+    'segmentacao'; serve de critério de amostragem ao EscritorDebug.
+    """
+    tentativas = (segmentacao or {}).get("tentativas") or []
+    return bool(tentativas) and segmentacao.get("metodo") != tentativas[0]["metodo"]
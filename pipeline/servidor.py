@@ -0,0 +1,457 @@
+import argparse
+import asyncio
+import base64
+import inspect
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+import numpy as np
+
+from pipeline.analise import ROI_AUTO, analisar_imagem
+from pipeline.cache import obter_cache_padrao
+from pipeline.metricas import obter_metricas
+from processamento_imagem.preprocess import preprocess_image_for_contact_angle
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8765
+HOSTS_LOCAIS = ("127.0.0.1", "localhost", "::1")
+MAX_LOTE_PADRAO = 4           # requisições por item de trabalho enviado ao pool
+JANELA_LOTE_MS = 5.0          # espera máxima para completar um lote
+MAX_CORPO_BYTES = 64 * 1024 ** 2
+MAX_CABECALHO_BYTES = 64 * 1024
+TIMEOUT_CONEXAO_S = 30.0
+
+# 'params' vão para preprocess_image_for_contact_angle: só os argumentos dela são aceitos
+_PADROES_PARAMS = {nome: p.default for nome, p in
+                   inspect.signature(preprocess_image_for_contact_angle).parameters.items()
+                   if nome != "img_bgr"}
+
+_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ErroRequisicao(Exception):
+    """Erro do cliente: vira uma resposta HTTP com o status indicado."""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# =================================================================
+# BLOCO 1: TRABALHADORES (processos aquecidos)
+# =================================================================
+
+def _inicializar_trabalhador() -> None:
+    """
+    Roda uma vez em cada processo do pool: paga as importações, a
+    inicialização do OpenCV/NumPy e o cache antes da primeira requisição.
+    """
+    obter_cache_padrao()
+    img = np.full((120, 160, 3), 230, dtype=np.uint8)
+    cv2.ellipse(img, (80, 90), (40, 30), 0, 180, 360, (40, 40, 40), -1)
+    try:
+        analisar_imagem(img)
+    except Exception:
+        pass
+
+
+def _pid_trabalhador(espera_s: float = 0.05) -> int:
+    time.sleep(espera_s)  # segura o processo para que os demais também sejam criados
+    return os.getpid()
+
+
+def _processar_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    if item.get("caminho") is not None:
+        img = cv2.imread(item["caminho"])
+        if img is None:
+            return {"erro": f"não foi possível ler a imagem: {item['caminho']}"}
+    else:
+        buf = np.frombuffer(item["imagem"], dtype=np.uint8)
+        img = cv2.imdecode(buf, cv2.IMREAD_COLOR) if buf.size else None
+        if img is None:
+            return {"erro": "não foi possível decodificar a imagem enviada"}
+    t_dec = time.perf_counter() - t0
+
+    res = analisar_imagem(img, roi=item.get("roi"), pre_params=item.get("params"),
+                          cache=obter_cache_padrao(), incerteza=bool(item.get("incerteza")))
+    res["tempos"]["decodificacao"] = t_dec
+    if not item.get("incluir_contorno"):
+        res.pop("gota_pts", None)
+    res["pid"] = os.getpid()
+    return res
+
+
+def _processar_lote(itens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Item de trabalho do pool: várias requisições numa única ida ao processo."""
+    saida = []
+    for item in itens:
+        try:
+            saida.append(_processar_item(item))
+        except Exception as e:
+            saida.append({"erro": f"{type(e).__name__}: {e}"})
+    return saida
+
+
+# =================================================================
+# BLOCO 2: CONVERSÃO PARA JSON
+# =================================================================
+
+def _para_json(obj: Any) -> Any:
+    """NumPy → tipos nativos; NaN/inf → null (JSON estrito)."""
+    if isinstance(obj, dict):
+        return {str(k): _para_json(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_para_json(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _para_json(obj.tolist())
+    if isinstance(obj, np.generic):
+        return _para_json(obj.item())
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+
+def _validar_params(params: Any) -> Optional[Dict[str, Any]]:
+    """
+    Recusa chaves e tipos que o pré-processamento não aceita. Sem isso o
+    erro acontece dentro do nível 'preprocess' da cascata, que o trata como
+    nota 0 e responde com outro nível: ângulos de parâmetros não pedidos.
+    """
+    if params is None:
+        return None
+    if not isinstance(params, dict):
+        raise ErroRequisicao(400, "params deve ser um objeto JSON")
+    desconhecidos = sorted(set(params) - set(_PADROES_PARAMS))
+    if desconhecidos:
+        raise ErroRequisicao(400, f"params desconhecidos: {', '.join(desconhecidos)} "
+                                  f"(aceitos: {', '.join(_PADROES_PARAMS)})")
+    for nome, valor in params.items():
+        padrao = _PADROES_PARAMS[nome]
+        if valor is None and padrao is None:
+            continue
+        if isinstance(padrao, bool):
+            ok = isinstance(valor, bool)
+        elif nome == "clahe_grid":
+            ok = isinstance(valor, list) and len(valor) == 2 and \
+                all(isinstance(v, int) and not isinstance(v, bool) and v > 0 for v in valor)
+        else:
+            ok = isinstance(valor, (int, float)) and not isinstance(valor, bool) and math.isfinite(valor)
+        if not ok:
+            raise ErroRequisicao(400, f"params.{nome}: valor inválido ({valor!r})")
+    return params
+
+
+def _item_de_json(d: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(d, dict):
+        raise ErroRequisicao(400, "cada item deve ser um objeto JSON")
+    item = {"roi": d.get("roi"), "params": d.get("params"),
+            "incerteza": bool(d.get("incerteza", False)),
+            "incluir_contorno": bool(d.get("incluir_contorno", False))}
+    if d.get("caminho"):
+        item["caminho"] = str(d["caminho"])
+    elif d.get("imagem_base64"):
+        try:
+            item["imagem"] = base64.b64decode(d["imagem_base64"], validate=True)
+        except Exception:
+            raise ErroRequisicao(400, "imagem_base64 inválida")
+    else:
+        raise ErroRequisicao(400, "informe 'caminho' ou 'imagem_base64'")
+    roi = item["roi"]
+    if roi is not None and roi != ROI_AUTO and (not isinstance(roi, list) or len(roi) != 4):
+        raise ErroRequisicao(400, 'roi deve ser [x1, y1, x2, y2] ou "auto"')
+    item["params"] = _validar_params(item["params"])
+    return item
+
+
+def _item_de_query(corpo: bytes, query: Dict[str, List[str]]) -> Dict[str, Any]:
+    """Corpo = bytes da imagem; ROI/parâmetros na query string."""
+    item: Dict[str, Any] = {"imagem": corpo, "roi": None, "params": None,
+                            "incerteza": query.get("incerteza", ["0"])[0] in ("1", "true"),
+                            "incluir_contorno": query.get("incluir_contorno", ["0"])[0] in ("1", "true")}
+    try:
+        if query.get("roi", [""])[0] == ROI_AUTO:
+            item["roi"] = ROI_AUTO
+        elif "roi" in query:
+            item["roi"] = [int(v) for v in query["roi"][0].split(",")]
+            if len(item["roi"]) != 4:
+                raise ValueError
+        if "params" in query:
+            item["params"] = json.loads(query["params"][0])
+    except ValueError:
+        raise ErroRequisicao(400, "roi=x1,y1,x2,y2 (ou roi=auto) e params=<JSON> na query string")
+    item["params"] = _validar_params(item["params"])
+    return item
+
+
+# =================================================================
+# BLOCO 3: SERVIDOR
+# =================================================================
+
+class ServidorAnalise:
+    """
+    Serviço HTTP local (asyncio) para análise de ângulo de contato.
+
+    Rotas:
+        GET  /saude      estado do serviço e dos trabalhadores
+        GET  /metricas   latências (p50/p95/p99), taxas e filas do processo
+        POST /analisar   uma imagem: JSON {caminho | imagem_base64, roi ("auto" ok),
+                         params, incerteza, incluir_contorno} ou os bytes
+                         da imagem no corpo com roi/params na query string
+        POST /lote       JSON {"itens": [...]} com o mesmo formato
+
+    Requisições que chegam juntas são agrupadas (até max_lote, esperando no
+    máximo janela_ms) num único item de trabalho do pool de processos.
+    Os processos são criados e aquecidos na partida.
+    """
+
+    def __init__(self,
+                 host: str = HOST_PADRAO,
+                 porta: int = PORTA_PADRAO,
+                 n_workers: Optional[int] = None,
+                 max_lote: int = MAX_LOTE_PADRAO,
+                 janela_ms: float = JANELA_LOTE_MS):
+        if host not in HOSTS_LOCAIS:
+            raise ValueError("o serviço aceita apenas conexões locais (127.0.0.1/localhost/::1)")
+        self.host = host
+        self.porta = int(porta)
+        self.n_workers = n_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_lote = max(1, int(max_lote))
+        self.janela_s = max(0.0, float(janela_ms)) / 1000.0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._fila: Optional[asyncio.Queue] = None
+        self._vagas: Optional[asyncio.Semaphore] = None
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._agrupador: Optional[asyncio.Task] = None
+        self.pids: List[int] = []
+        self.n_requisicoes = 0
+        self.n_lotes = 0
+
+    # ---------------- CICLO DE VIDA ----------------
+    async def iniciar(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_inicializar_trabalhador)
+        # força a criação de todos os processos agora (e não na primeira requisição)
+        pids = await asyncio.gather(*[loop.run_in_executor(self._pool, _pid_trabalhador)
+                                      for _ in range(self.n_workers)])
+        self.pids = sorted(set(pids))
+        self._fila = asyncio.Queue()
+        obter_metricas().registrar_fila("servidor", self._fila.qsize)
+        # até dois lotes por trabalhador em voo: o próximo já espera no pool
+        self._vagas = asyncio.Semaphore(2 * self.n_workers)
+        self._agrupador = asyncio.create_task(self._agrupar())
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta,
+                                                    limit=MAX_CABECALHO_BYTES)
+
+    async def fechar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if self._agrupador is not None:
+            self._agrupador.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def servir_para_sempre(self) -> None:
+        await self.iniciar()
+        print(f"[SERVIDOR] http://{self.host}:{self.porta} — {len(self.pids)} trabalhadores prontos")
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.fechar()
+
+    # ---------------- AGRUPAMENTO ----------------
+    async def analisar(self, itens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enfileira os itens e aguarda os resultados (na mesma ordem)."""
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        futuros = []
+        for item in itens:
+            fut = loop.create_future()
+            await self._fila.put((item, fut))
+            futuros.append(fut)
+        resultados = await asyncio.gather(*futuros)
+        total = time.perf_counter() - t0
+        metricas = obter_metricas()
+        for res in resultados:
+            metricas.registrar("servidor", total)
+            metricas.marcar("requisicoes_servidor")
+            res.setdefault("tempos", {})["servidor_total"] = total
+        return resultados
+
+    async def _agrupar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            prazo = loop.time() + self.janela_s
+            while len(lote) < self.max_lote:
+                try:
+                    lote.append(self._fila.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            await self._vagas.acquire()
+            self.n_lotes += 1
+            fut = loop.run_in_executor(self._pool, _processar_lote, [item for item, _ in lote])
+            fut.add_done_callback(lambda f, lote=lote: self._entregar(lote, f))
+
+    def _entregar(self, lote: List[Tuple[Dict, asyncio.Future]], fut: asyncio.Future) -> None:
+        self._vagas.release()
+        erro = fut.exception() if not fut.cancelled() else asyncio.CancelledError()
+        for i, (_, destino) in enumerate(lote):
+            if destino.done():
+                continue
+            if erro is not None:
+                destino.set_result({"erro": f"falha no trabalhador: {type(erro).__name__}: {erro}"})
+            else:
+                destino.set_result(fut.result()[i])
+
+    # ---------------- HTTP ----------------
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            manter = True
+            while manter:
+                try:
+                    requisicao = await asyncio.wait_for(self._ler_requisicao(reader), TIMEOUT_CONEXAO_S)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if requisicao is None:
+                    break
+                metodo, alvo, cabecalhos, corpo = requisicao
+                manter = cabecalhos.get("connection", "").lower() != "close"
+                try:
+                    status, dados = await self._rotear(metodo, alvo, cabecalhos, corpo)
+                except ErroRequisicao as e:
+                    status, dados = e.status, {"erro": str(e)}
+                except Exception as e:
+                    status, dados = 500, {"erro": f"{type(e).__name__}: {e}"}
+                self._responder(writer, status, dados, manter)
+                await writer.drain()
+        except ErroRequisicao as e:
+            self._responder(writer, e.status, {"erro": str(e)}, False)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _ler_requisicao(self, reader: asyncio.StreamReader):
+        try:
+            bruto = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise ErroRequisicao(413, "cabeçalho muito grande")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None  # conexão fechada entre requisições
+            raise
+        linhas = bruto.decode("latin-1").split("\r\n")
+        try:
+            metodo, alvo, _ = linhas[0].split(" ", 2)
+        except ValueError:
+            raise ErroRequisicao(400, "linha de requisição inválida")
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if ":" in linha:
+                k, v = linha.split(":", 1)
+                cabecalhos[k.strip().lower()] = v.strip()
+        try:
+            n = int(cabecalhos.get("content-length", "0"))
+        except ValueError:
+            raise ErroRequisicao(400, "Content-Length inválido")
+        if n > MAX_CORPO_BYTES:
+            raise ErroRequisicao(413, "corpo muito grande")
+        corpo = await reader.readexactly(n) if n > 0 else b""
+        return metodo.upper(), alvo, cabecalhos, corpo
+
+    async def _rotear(self, metodo: str, alvo: str, cabecalhos: Dict[str, str], corpo: bytes):
+        url = urlsplit(alvo)
+        rota = url.path.rstrip("/") or "/"
+        if rota == "/saude":
+            if metodo != "GET":
+                raise ErroRequisicao(405, "use GET")
+            return 200, {"status": "ok", "trabalhadores": self.pids, "requisicoes": self.n_requisicoes,
+                         "lotes": self.n_lotes, "na_fila": self._fila.qsize()}
+        if rota == "/metricas":
+            if metodo != "GET":
+                raise ErroRequisicao(405, "use GET")
+            return 200, obter_metricas().instantaneo()
+        if rota not in ("/analisar", "/lote"):
+            raise ErroRequisicao(404, f"rota desconhecida: {rota}")
+        if metodo != "POST":
+            raise ErroRequisicao(405, "use POST")
+
+        tipo = cabecalhos.get("content-type", "").split(";")[0].strip().lower()
+        if tipo == "application/json":
+            try:
+                dados = json.loads(corpo.decode("utf-8"))
+            except ValueError:
+                raise ErroRequisicao(400, "JSON inválido")
+            if rota == "/lote":
+                brutos = dados.get("itens") if isinstance(dados, dict) else dados
+                if not isinstance(brutos, list) or not brutos:
+                    raise ErroRequisicao(400, "informe 'itens': [...]")
+                itens = [_item_de_json(d) for d in brutos]
+            else:
+                itens = [_item_de_json(dados)]
+        elif rota == "/analisar":
+            if not corpo:
+                raise ErroRequisicao(400, "corpo vazio")
+            itens = [_item_de_query(corpo, parse_qs(url.query))]
+        else:
+            raise ErroRequisicao(400, "/lote aceita apenas application/json")
+
+        self.n_requisicoes += len(itens)
+        resultados = await self.analisar(itens)
+        if rota == "/lote":
+            return 200, {"resultados": resultados}
+        return 200, resultados[0]
+
+    @staticmethod
+    def _responder(writer: asyncio.StreamWriter, status: int, dados: Any, manter: bool) -> None:
+        corpo = json.dumps(_para_json(dados), ensure_ascii=False).encode("utf-8")
+        cabecalho = (f"HTTP/1.1 {status} {_STATUS.get(status, '')}\r\n"
+                     "Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(corpo)}\r\n"
+                     f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+        writer.write(cabecalho.encode("latin-1") + corpo)
+
+
+def servir(host: str = HOST_PADRAO, porta: int = PORTA_PADRAO, n_workers: Optional[int] = None,
+           max_lote: int = MAX_LOTE_PADRAO, janela_ms: float = JANELA_LOTE_MS) -> None:
+    """Sobe o serviço e bloqueia até Ctrl+C."""
+    servidor = ServidorAnalise(host, porta, n_workers, max_lote, janela_ms)
+    try:
+        asyncio.run(servidor.servir_para_sempre())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serviço HTTP local de análise de ângulo de contato")
+    ap.add_argument("--host", default=HOST_PADRAO, choices=HOSTS_LOCAIS)
+    ap.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    ap.add_argument("--workers", type=int, default=None, help="processos de análise")
+    ap.add_argument("--lote", type=int, default=MAX_LOTE_PADRAO, help="requisições por item de trabalho")
+    ap.add_argument("--janela-ms", type=float, default=JANELA_LOTE_MS, help="espera máxima para formar um lote")
+    a = ap.parse_args()
+    servir(a.host, a.porta, a.workers, a.lote, a.janela_ms)
@@ -0,0 +1,244 @@
+import argparse
+import csv
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from processamento_imagem.contorno_compacto import LoteContornos
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+# Uma pasta por execução; todos os arquivos binários são só de acréscimo
+ARQ_PONTOS = "pontos.bin"      # float32/float64 (M×2), todos os contornos em sequência
+ARQ_OFFSETS = "offsets.bin"    # int64: fim de cada contorno no buffer (o início do primeiro é 0)
+ARQ_QUADROS = "quadros.bin"    # int64: número do quadro de cada contorno (crescente)
+ARQ_TEMPOS = "tempos.bin"      # float64: instante de cada contorno (NaN se desconhecido)
+ARQ_META = "meta.json"
+
+
+def _mapear(caminho: str, dtype, colunas: int = 1) -> np.ndarray:
+    """np.memmap somente leitura do arquivo inteiro (vazio → array vazio)."""
+    dtype = np.dtype(dtype)
+    n = os.path.getsize(caminho) // (dtype.itemsize * colunas) if os.path.exists(caminho) else 0
+    forma = (n,) if colunas == 1 else (n, colunas)
+    if n == 0:
+        return np.empty(forma, dtype=dtype)
+    return np.memmap(caminho, dtype=dtype, mode="r", shape=forma)
+
+
+class GravadorContornos:
+    """
+    Grava os contornos de uma execução longa (vídeo, rajada, sessão) em disco.
+
+    Formato irregular: um buffer plano de pontos mais o índice de offsets,
+    como em LoteContornos, em arquivos separados e só de acréscimo. Os
+    offsets são gravados depois dos pontos, então o número de entradas
+    válidas é sempre o de offsets gravados; uma execução interrompida
+    perde no máximo o último contorno.
+    """
+
+    def __init__(self, pasta: str, dtype=np.float32, metadados: Optional[Dict[str, Any]] = None):
+        os.makedirs(pasta, exist_ok=True)
+        self.pasta = pasta
+        meta_path = os.path.join(pasta, ARQ_META)
+        if os.path.exists(meta_path):
+            # retomada: continua do ponto em que a gravação anterior parou
+            leitor = ArquivoContornos(pasta)
+            self.dtype = leitor.dtype
+            self._n = len(leitor)
+            self._fim = int(leitor.offsets[-1])
+            self._ultimo_quadro = int(leitor.quadros[-1]) if self._n else -1
+            leitor.fechar()
+            self._truncar()
+        else:
+            self.dtype = np.dtype(dtype)
+            self._n, self._fim, self._ultimo_quadro = 0, 0, -1
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"versao": 1, "dtype": self.dtype.str, **(metadados or {})}, f, ensure_ascii=False)
+        self._arquivos = {nome: open(os.path.join(pasta, nome), "ab")
+                          for nome in (ARQ_PONTOS, ARQ_OFFSETS, ARQ_QUADROS, ARQ_TEMPOS)}
+
+    def _truncar(self) -> None:
+        """Descarta bytes de uma entrada incompleta deixada por uma interrupção."""
+        tamanhos = {ARQ_PONTOS: self._fim * 2 * self.dtype.itemsize,
+                    ARQ_OFFSETS: self._n * 8, ARQ_QUADROS: self._n * 8, ARQ_TEMPOS: self._n * 8}
+        for nome, tamanho in tamanhos.items():
+            caminho = os.path.join(self.pasta, nome)
+            if os.path.exists(caminho) and os.path.getsize(caminho) > tamanho:
+                with open(caminho, "r+b") as f:
+                    f.truncate(tamanho)
+
+    def append(self, contorno, quadro: Optional[int] = None, t: float = float("nan")) -> int:
+        """
+        Acrescenta o contorno de um quadro (None/vazio grava uma entrada vazia).
+
+        quadro: número do quadro (padrão: sequencial); precisa ser crescente
+        """
+        quadro = self._ultimo_quadro + 1 if quadro is None else int(quadro)
+        if quadro <= self._ultimo_quadro:
+            raise ValueError(f"quadro {quadro} fora de ordem (último: {self._ultimo_quadro})")
+        pts = np.empty((0, 2), dtype=self.dtype) if contorno is None else \
+            np.ascontiguousarray(np.asarray(contorno, dtype=self.dtype).reshape(-1, 2))
+        self._arquivos[ARQ_PONTOS].write(pts.tobytes())
+        self._fim += len(pts)
+        self._arquivos[ARQ_OFFSETS].write(np.int64(self._fim).tobytes())
+        self._arquivos[ARQ_QUADROS].write(np.int64(quadro).tobytes())
+        self._arquivos[ARQ_TEMPOS].write(np.float64(t).tobytes())
+        self._ultimo_quadro = quadro
+        self._n += 1
+        return self._n - 1
+
+    def estender(self, lote: LoteContornos, quadros: Optional[Sequence[int]] = None,
+                 tempos: Optional[Sequence[float]] = None) -> None:
+        """Acrescenta um LoteContornos inteiro com uma escrita por arquivo."""
+        n = len(lote)
+        if n == 0:
+            return
+        quadros = np.arange(self._ultimo_quadro + 1, self._ultimo_quadro + 1 + n, dtype=np.int64) \
+            if quadros is None else np.asarray(quadros, dtype=np.int64)
+        if quadros[0] <= self._ultimo_quadro or np.any(np.diff(quadros) <= 0):
+            raise ValueError("números de quadro devem ser crescentes")
+        tempos = np.full(n, np.nan) if tempos is None else np.asarray(tempos, dtype=np.float64)
+        self._arquivos[ARQ_PONTOS].write(np.ascontiguousarray(lote.pontos, dtype=self.dtype).tobytes())
+        self._arquivos[ARQ_OFFSETS].write((lote.offsets[1:] + self._fim).astype(np.int64).tobytes())
+        self._arquivos[ARQ_QUADROS].write(quadros.tobytes())
+        self._arquivos[ARQ_TEMPOS].write(tempos.tobytes())
+        self._fim += int(lote.offsets[-1])
+        self._ultimo_quadro = int(quadros[-1])
+        self._n += n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def flush(self) -> None:
+        # pontos antes dos offsets: um offset em disco sempre aponta para pontos já gravados
+        for nome in (ARQ_PONTOS, ARQ_QUADROS, ARQ_TEMPOS, ARQ_OFFSETS):
+            self._arquivos[nome].flush()
+
+    def fechar(self) -> None:
+        self.flush()
+        for f in self._arquivos.values():
+            f.close()
+
+    def __enter__(self) -> "GravadorContornos":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+class ArquivoContornos:
+    """
+    Leitura mapeada em memória de uma pasta gravada por GravadorContornos.
+
+    arquivo[i] é uma visão (sem cópia) do i-ésimo contorno; por_quadro(q)
+    acessa pelo número do quadro; ler_varios() junta muitos contornos num
+    LoteContornos com uma única indexação vetorizada.
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        with open(os.path.join(pasta, ARQ_META), "r", encoding="utf-8") as f:
+            self.metadados = json.load(f)
+        self.dtype = np.dtype(self.metadados.get("dtype", "<f4"))
+        offsets = _mapear(os.path.join(pasta, ARQ_OFFSETS), np.int64)
+        quadros = _mapear(os.path.join(pasta, ARQ_QUADROS), np.int64)
+        tempos = _mapear(os.path.join(pasta, ARQ_TEMPOS), np.float64)
+        pontos = _mapear(os.path.join(pasta, ARQ_PONTOS), self.dtype, colunas=2)
+        # entradas completas: todos os arquivos chegaram até elas
+        n = min(len(offsets), len(quadros), len(tempos))
+        while n and offsets[n - 1] > len(pontos):
+            n -= 1
+        self.offsets = np.concatenate([[0], offsets[:n]]).astype(np.int64)
+        self.quadros = quadros[:n]
+        self.tempos = tempos[:n]
+        self.pontos = pontos[:int(self.offsets[-1])]
+
+    def __len__(self) -> int:
+        return len(self.quadros)
+
+    @property
+    def tamanhos(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return self.pontos[self.offsets[i]:self.offsets[i + 1]]
+
+    def indice_quadro(self, quadro: int) -> int:
+        """Posição do contorno do quadro (KeyError se o quadro não foi gravado)."""
+        i = int(np.searchsorted(self.quadros, quadro))
+        if i >= len(self) or self.quadros[i] != quadro:
+            raise KeyError(quadro)
+        return i
+
+    def por_quadro(self, quadro: int) -> np.ndarray:
+        return self[self.indice_quadro(quadro)]
+
+    def ler_varios(self, indices: Optional[Sequence[int]] = None) -> LoteContornos:
+        """
+        Contornos selecionados (padrão: todos) num LoteContornos em memória.
+
+        As posições de todos os pontos saem de um np.repeat sobre os
+        offsets, e a cópia do mapa é uma única indexação avançada.
+        """
+        if indices is None:
+            return LoteContornos.de_buffers(np.array(self.pontos), self.offsets)
+        idx = np.asarray(indices, dtype=np.int64)
+        inicios = self.offsets[idx]
+        tamanhos = self.offsets[idx + 1] - inicios
+        novos_offsets = np.concatenate([[0], np.cumsum(tamanhos)]).astype(np.int64)
+        posicoes = np.repeat(inicios - novos_offsets[:-1], tamanhos) + np.arange(novos_offsets[-1])
+        return LoteContornos.de_buffers(self.pontos[posicoes], novos_offsets)
+
+    def mapear(self, func: Callable[[np.ndarray], Any], inicio: int = 0,
+               fim: Optional[int] = None) -> Iterator[Tuple[int, float, Any]]:
+        """(quadro, t, func(contorno)) para cada entrada, sem decodificar imagem alguma."""
+        fim = len(self) if fim is None else min(fim, len(self))
+        for i in range(inicio, fim):
+            yield int(self.quadros[i]), float(self.tempos[i]), func(self[i])
+
+    def fechar(self) -> None:
+        # memmaps fecham quando não há mais referências
+        self.pontos = self.offsets = self.quadros = self.tempos = None
+
+    def __enter__(self) -> "ArquivoContornos":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Reajusta baseline e ângulos de contornos guardados")
+    ap.add_argument("pasta", help="pasta gravada por GravadorContornos")
+    ap.add_argument("--saida", default="reajuste.csv")
+    ap.add_argument("--window-height", type=float, default=None)
+    a = ap.parse_args()
+
+    from pipeline.analise import analisar_contorno
+
+    def _ajustar(pts):
+        if len(pts) == 0:
+            return {"erro": "sem_contorno"}
+        try:
+            return analisar_contorno(np.asarray(pts, dtype=np.float64), window_height=a.window_height)
+        except Exception as e:
+            return {"erro": str(e)}
+
+    with ArquivoContornos(a.pasta) as arq, open(a.saida, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["quadro", "t", "baseline_y", "angulo_esq", "angulo_dir", "angulo_medio", "erro"])
+        n = 0
+        for quadro, t, res in arq.mapear(_ajustar):
+            escritor.writerow([quadro, t, res.get("baseline_y"), res.get("angulo_esq"), res.get("angulo_dir"),
+                               res.get("angulo_medio"), res.get("erro", "")])
+            n += 1
+    print(f"[CONTORNOS] {n} contornos reajustados → {a.saida}")
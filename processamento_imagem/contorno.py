@@ -1,12 +1,16 @@
 import cv2
 import numpy as np
 
-def encontrar_contorno_gota(imagem_binaria):
+def encontrar_contorno_gota(imagem_binaria, permitir_canny=True):
     """
     Encontra o maior contorno da gota com máscara de segurança nas bordas.
     
     A máscara de 5px força fisicamente a separação da gota do frame da imagem,
     garantindo que nenhum contorno toque nas bordas (especialmente o fundo).
+
+    permitir_canny=False desliga o fallback por Canny quando a binária não tem
+    contornos (a cascata de pipeline/segmentacao.py trata bordas como um nível
+    próprio, com nota de qualidade).
     """
     # Garante que a imagem seja 8-bit single channel
     if len(imagem_binaria.shape) == 3:
@@ -29,7 +33,7 @@ def encontrar_contorno_gota(imagem_binaria):
     conts, _ = cv2.findContours(processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
 
     # Fallback se a binarização falhou mas há bordas visíveis
-    if not conts:
+    if not conts and permitir_canny:
         edges = cv2.Canny(img, 30, 100)
         # Aplicar a máscara também no Canny para consistência (mesma 10px de espessura)
         cv2.rectangle(edges, (0, 0), (w - 1, h - 1), 0, thickness=10)
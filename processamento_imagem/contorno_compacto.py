@@ -0,0 +1,262 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+PASSO_ARCO_PADRAO = 1.0      # px de comprimento de arco entre amostras
+LIMIAR_LACUNA_PX = 2.0       # passos maiores são lacunas (ex.: pontos de borda removidos)
+
+
+def reamostrar_arco(pts: np.ndarray, passo_px: float = PASSO_ARCO_PADRAO,
+                    fechado: bool = True, limiar_lacuna: float = LIMIAR_LACUNA_PX) -> np.ndarray:
+    """
+    Reamostra o contorno com espaçamento uniforme de comprimento de arco.
+
+    Trechos separados por lacunas (saltos > limiar_lacuna) são reamostrados
+    independentemente, para não inventar pontos sobre a lacuna — por exemplo
+    no fundo, onde encontrar_contorno_gota remove pontos da borda.
+
+    Args:
+        pts: Array Nx2 (x, y)
+        passo_px: distância aproximada entre amostras (px)
+        fechado: considera o segmento último → primeiro ponto
+        limiar_lacuna: maior passo considerado contínuo
+
+    Returns:
+        Array Mx2 float32 contíguo
+    """
+    p = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    if len(p) < 2 or passo_px <= 0:
+        return np.ascontiguousarray(p, dtype=np.float32)
+
+    fecha = fechado and np.hypot(*(p[0] - p[-1])) <= limiar_lacuna
+    if fecha:
+        p = np.vstack([p, p[:1]])
+
+    d = np.hypot(*np.diff(p, axis=0).T)
+    manter = np.concatenate([[True], d > 0])   # remove passos nulos (xp estritamente crescente)
+    p, d = p[manter], d[manter[1:]]
+
+    quebras = np.nonzero(d > limiar_lacuna)[0] + 1
+    saida: List[np.ndarray] = []
+    for trecho in np.split(p, quebras):
+        if len(trecho) < 2:
+            saida.append(trecho)
+            continue
+        s = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(trecho, axis=0).T))])
+        n = max(2, int(s[-1] // passo_px) + 1)
+        alvo = np.linspace(0.0, s[-1], n)
+        saida.append(np.column_stack([np.interp(alvo, s, trecho[:, 0]),
+                                      np.interp(alvo, s, trecho[:, 1])]))
+    out = np.concatenate(saida)
+    if fecha and len(out) > 1:
+        out = out[:-1]  # último ponto repete o primeiro
+    return np.ascontiguousarray(out, dtype=np.float32)
+
+
+# =================================================================
+# BLOCO 1: CONTORNO COMPACTO
+# =================================================================
+
+class ContornoCompacto:
+    """
+    Contorno da gota em um array contíguo (float32, ou int16 quando os
+    pontos são inteiros), com limites e divisão por lado pré-calculados.
+
+    Indexação, len() e np.asarray() delegam ao array de pontos, de modo que
+    o objeto pode ser passado às funções de linha_base e angulo_contato no
+    lugar do array Nx2 original.
+    """
+
+    __slots__ = ("pts", "x_min", "x_max", "y_min", "y_max", "x_centro", "_lados", "_indice")
+
+    def __init__(self, pts: np.ndarray):
+        self.pts = pts
+        if len(pts):
+            self.x_min, self.y_min = (float(v) for v in pts.min(axis=0))
+            self.x_max, self.y_max = (float(v) for v in pts.max(axis=0))
+            self.x_centro = float(pts[:, 0].mean(dtype=np.float64))
+        else:
+            self.x_min = self.x_max = self.y_min = self.y_max = self.x_centro = 0.0
+        self._lados: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._indice = None
+
+    @classmethod
+    def de_pontos(cls, pts: np.ndarray, passo_px: Optional[float] = PASSO_ARCO_PADRAO,
+                  fechado: bool = True) -> "ContornoCompacto":
+        """
+        Cria a partir de um array Nx2 (ex.: saída de encontrar_contorno_gota).
+
+        passo_px=None mantém os pontos originais (int16 se couberem).
+        """
+        p = np.asarray(pts).reshape(-1, 2)
+        if passo_px is None:
+            info = np.iinfo(np.int16)
+            if np.issubdtype(p.dtype, np.integer) and (len(p) == 0 or (p.min() >= info.min and p.max() <= info.max)):
+                return cls(np.ascontiguousarray(p, dtype=np.int16))
+            return cls(np.ascontiguousarray(p, dtype=np.float32))
+        return cls(reamostrar_arco(p, passo_px, fechado))
+
+    # --- interoperabilidade com arrays Nx2 ---
+    def __len__(self) -> int:
+        return len(self.pts)
+
+    def __getitem__(self, idx):
+        return self.pts[idx]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.pts if dtype is None else self.pts.astype(dtype)
+
+    def __iter__(self):
+        return iter(self.pts)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.pts.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.pts.nbytes
+
+    @property
+    def altura(self) -> float:
+        return self.y_max - self.y_min
+
+    @property
+    def largura(self) -> float:
+        return self.x_max - self.x_min
+
+    def lados(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(esquerda, direita) divididos em x_centro; calculados uma única vez."""
+        if self._lados is None:
+            esq = self.pts[:, 0] < self.x_centro
+            self._lados = (np.ascontiguousarray(self.pts[esq]), np.ascontiguousarray(self.pts[~esq]))
+        return self._lados
+
+    def indice(self):
+        """IndiceContorno (pontos ordenados por y) deste contorno, criado sob demanda."""
+        if self._indice is None:
+            from processamento_imagem.indice_contorno import IndiceContorno
+            self._indice = IndiceContorno(self.pts)
+        return self._indice
+
+
+def compactar_contorno(pts: Optional[np.ndarray], passo_px: Optional[float] = PASSO_ARCO_PADRAO) -> Optional[ContornoCompacto]:
+    """Atalho tolerante a None para ContornoCompacto.de_pontos."""
+    if pts is None:
+        return None
+    if isinstance(pts, ContornoCompacto):
+        return pts
+    return ContornoCompacto.de_pontos(pts, passo_px)
+
+
+# =================================================================
+# BLOCO 2: LOTE IRREGULAR (muitos contornos num único buffer)
+# =================================================================
+
+def _limites_segmentos(pontos: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """(x_min, y_min, x_max, y_max) de cada segmento, com reduceat (segmentos vazios = 0)."""
+    limites = np.zeros((len(offsets) - 1, 4), dtype=np.float32)
+    cheios = offsets[:-1] < offsets[1:]
+    inicios = offsets[:-1][cheios]
+    if inicios.size:
+        for k, (func, col) in enumerate(((np.minimum, 0), (np.minimum, 1), (np.maximum, 0), (np.maximum, 1))):
+            limites[cheios, k] = func.reduceat(pontos[:, col], inicios)
+    return limites
+
+
+class LoteContornos:
+    """
+    Coleção de contornos de tamanhos diferentes num buffer plano Mx2 mais
+    um índice de offsets (len n+1). O contorno i é pontos[offsets[i]:offsets[i+1]]
+    (uma view, sem cópia). Os limites de cada contorno ficam em 'limites' (n×4:
+    x_min, y_min, x_max, y_max).
+    """
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self._pendentes: List[np.ndarray] = []
+        self._pontos = np.empty((0, 2), dtype=self.dtype)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._limites = np.empty((0, 4), dtype=np.float32)
+
+    @classmethod
+    def de_lista(cls, contornos: Iterable, dtype=np.float32) -> "LoteContornos":
+        lote = cls(dtype)
+        for c in contornos:
+            lote.append(c)
+        lote.compactar()
+        return lote
+
+    @classmethod
+    def de_buffers(cls, pontos: np.ndarray, offsets: np.ndarray) -> "LoteContornos":
+        """Lote sobre um buffer plano e offsets já prontos (sem copiar os pontos)."""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        pontos = np.asarray(pontos).reshape(-1, 2)[:int(offsets[-1])]
+        lote = cls(pontos.dtype)
+        lote._pontos = pontos
+        lote._offsets = offsets
+        lote._limites = _limites_segmentos(pontos, offsets)
+        return lote
+
+    def append(self, contorno) -> int:
+        """Adiciona um contorno (array Nx2 ou ContornoCompacto); retorna seu índice."""
+        p = np.asarray(contorno, dtype=self.dtype).reshape(-1, 2)
+        self._pendentes.append(p)
+        return len(self) - 1
+
+    def compactar(self) -> None:
+        """Consolida os contornos pendentes no buffer plano (uma concatenação só)."""
+        if not self._pendentes:
+            return
+        tamanhos = np.fromiter((len(p) for p in self._pendentes), dtype=np.int64, count=len(self._pendentes))
+        novos_offsets = self._offsets[-1] + np.cumsum(tamanhos)
+        limites = np.array([
+            (p[:, 0].min(), p[:, 1].min(), p[:, 0].max(), p[:, 1].max()) if len(p) else (0, 0, 0, 0)
+            for p in self._pendentes
+        ], dtype=np.float32).reshape(-1, 4)
+        self._pontos = np.concatenate([self._pontos] + self._pendentes)
+        self._offsets = np.concatenate([self._offsets, novos_offsets])
+        self._limites = np.concatenate([self._limites, limites])
+        self._pendentes = []
+
+    @property
+    def pontos(self) -> np.ndarray:
+        self.compactar()
+        return self._pontos
+
+    @property
+    def offsets(self) -> np.ndarray:
+        self.compactar()
+        return self._offsets
+
+    @property
+    def limites(self) -> np.ndarray:
+        self.compactar()
+        return self._limites
+
+    @property
+    def tamanhos(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.pontos.nbytes + self.offsets.nbytes + self.limites.nbytes
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1 + len(self._pendentes)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        self.compactar()
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return self._pontos[self._offsets[i]:self._offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
@@ -0,0 +1,160 @@
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+COMPRESSAO_PNG_PADRAO = 1     # 0-9: 1 é bem mais rápido que o padrão do OpenCV (3)
+MAX_FILA_PADRAO = 64          # artefatos aguardando escrita antes de começar a descartar
+_FIM = object()               # sentinela de encerramento das threads
+
+
+class EscritorDebug:
+    """
+    Escrita assíncrona das imagens de debug (mesmo conteúdo de save_debug_imgs).
+
+    As imagens vão para uma fila limitada esvaziada por threads escritoras.
+    Com a fila cheia o artefato é descartado (contabilizado em 'descartados')
+    em vez de bloquear a análise. A amostragem por execução reduz o volume:
+    um a cada N quadros e/ou apenas quando a análise caiu num caminho de fallback.
+
+    As imagens enviadas não devem ser modificadas depois (não são copiadas).
+    """
+
+    def __init__(self,
+                 out_dir: str,
+                 formato: str = "png",
+                 compressao_png: int = COMPRESSAO_PNG_PADRAO,
+                 a_cada: int = 1,
+                 apenas_fallback: bool = False,
+                 max_fila: int = MAX_FILA_PADRAO,
+                 n_threads: int = 1):
+        """
+        Args:
+            out_dir: pasta de saída (criada se não existir)
+            formato: "png" ou "npy" (array bruto, sem compressão)
+            compressao_png: nível 0-9 (IMWRITE_PNG_COMPRESSION)
+            a_cada: grava apenas um a cada N envios
+            apenas_fallback: grava apenas envios marcados como fallback
+            max_fila: tamanho da fila (artefatos = dicionários inteiros)
+            n_threads: threads escritoras
+        """
+        if formato not in ("png", "npy"):
+            raise ValueError("formato deve ser 'png' ou 'npy'")
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.formato = formato
+        self.params_png = [cv2.IMWRITE_PNG_COMPRESSION, int(np.clip(compressao_png, 0, 9))]
+        self.a_cada = max(1, int(a_cada))
+        self.apenas_fallback = apenas_fallback
+        self._fila: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_fila)))
+        self._lock = threading.Lock()
+        self._n_envios = 0
+        self.aceitos = 0
+        self.descartados = 0
+        self.ignorados = 0
+        self.escritos = 0
+        self.erros = 0
+        self._threads = [
+            threading.Thread(target=self._trabalhar, name=f"escritor-debug-{i}", daemon=True)
+            for i in range(max(1, int(n_threads)))
+        ]
+        for th in self._threads:
+            th.start()
+
+    # ---------------- PRODUTOR ----------------
+    def enviar(self, debug_dict: Optional[Dict[str, Any]], prefix: str = "dbg", fallback: bool = False) -> bool:
+        """
+        Enfileira as imagens de um quadro sem bloquear.
+
+        Returns:
+            True se aceito; False se filtrado pela amostragem ou descartado (fila cheia)
+        """
+        if not debug_dict:
+            return False
+        with self._lock:
+            n = self._n_envios
+            self._n_envios += 1
+        if (self.apenas_fallback and not fallback) or n % self.a_cada != 0:
+            with self._lock:
+                self.ignorados += 1
+            return False
+        try:
+            self._fila.put_nowait((dict(debug_dict), prefix))
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+            return False
+        with self._lock:
+            self.aceitos += 1
+        return True
+
+    # ---------------- CONSUMIDOR ----------------
+    def _trabalhar(self) -> None:
+        while True:
+            item = self._fila.get()
+            try:
+                if item is _FIM:
+                    return
+                self._escrever(*item)
+            finally:
+                self._fila.task_done()
+
+    def _escrever(self, debug_dict: Dict[str, Any], prefix: str) -> None:
+        for k, img in debug_dict.items():
+            if img is None:
+                continue
+            try:
+                if self.formato == "npy":
+                    np.save(os.path.join(self.out_dir, f"{prefix}_{k}.npy"), np.asarray(img))
+                    ok = True
+                else:
+                    # garante uint8
+                    if isinstance(img, np.ndarray) and img.dtype != np.uint8:
+                        img = np.clip(img, 0, 255).astype(np.uint8)
+                    ok = cv2.imwrite(os.path.join(self.out_dir, f"{prefix}_{k}.png"), img, self.params_png)
+            except Exception:
+                ok = False
+            with self._lock:
+                if ok:
+                    self.escritos += 1
+                else:
+                    self.erros += 1
+
+    # ---------------- CONTROLE ----------------
+    @property
+    def pendentes(self) -> int:
+        return self._fila.qsize()
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"aceitos": self.aceitos, "descartados": self.descartados, "ignorados": self.ignorados,
+                    "escritos": self.escritos, "erros": self.erros, "pendentes": self.pendentes}
+
+    def fechar(self, esperar: bool = True) -> None:
+        """Encerra as threads; com esperar=True grava o que ainda está na fila."""
+        if not esperar:
+            # esvazia a fila: o que não foi escrito é descartado
+            try:
+                while True:
+                    self._fila.get_nowait()
+                    self._fila.task_done()
+                    with self._lock:
+                        self.descartados += 1
+            except queue.Empty:
+                pass
+        for _ in self._threads:
+            self._fila.put(_FIM)
+        for th in self._threads:
+            th.join()
+
+    def __enter__(self) -> "EscritorDebug":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
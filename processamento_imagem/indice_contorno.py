@@ -0,0 +1,126 @@
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# =================================================================
+# ÍNDICE ESPACIAL POR Y (faixas horizontais via busca binária)
+# =================================================================
+MAX_INDICES_CACHE = 64   # índices mantidos para arrays "crus" (identidade do array)
+
+
+class IndiceContorno:
+    """
+    Pontos do contorno ordenados por y, também separados por lado.
+
+    Consultas de faixa (y_lo < y < y_hi, com extremos inclusivos ou não)
+    viram duas buscas binárias e retornam views, em vez de máscaras
+    booleanas sobre o contorno inteiro a cada chamada.
+
+    O lado segue a convenção da extrapolação: 'esq' = x < média de x,
+    'dir' = x >= média de x.
+    """
+
+    __slots__ = ("n", "x_media", "x_min", "x_max", "y_min", "y_max", "_pts", "_ys")
+
+    def __init__(self, gota_pts: np.ndarray):
+        pts = np.asarray(gota_pts).reshape(-1, 2)
+        self.n = len(pts)
+        if self.n == 0:
+            raise ValueError("Contorno vazio")
+        self.x_media = float(np.mean(pts[:, 0], dtype=np.float64))
+        self.x_min, self.y_min = (float(v) for v in pts.min(axis=0))
+        self.x_max, self.y_max = (float(v) for v in pts.max(axis=0))
+
+        ordem = np.argsort(pts[:, 1], kind="stable")
+        ordenado = np.ascontiguousarray(pts[ordem])
+        esq = ordenado[:, 0] < self.x_media
+        self._pts: Dict[Optional[str], np.ndarray] = {
+            None: ordenado,
+            "esq": np.ascontiguousarray(ordenado[esq]),
+            "dir": np.ascontiguousarray(ordenado[~esq]),
+        }
+        # colunas y contíguas: searchsorted sobre view com stride copiaria a cada busca
+        self._ys = {k: np.ascontiguousarray(v[:, 1]) for k, v in self._pts.items()}
+
+    def faixa(self,
+              y_lo: Optional[float] = None,
+              y_hi: Optional[float] = None,
+              lado: Optional[str] = None,
+              incl_lo: bool = True,
+              incl_hi: bool = True) -> np.ndarray:
+        """
+        Pontos com y entre y_lo e y_hi (ordenados por y).
+
+        Args:
+            y_lo, y_hi: limites (None = sem limite)
+            lado: None (todos), 'esq' ou 'dir'
+            incl_lo, incl_hi: extremos inclusivos (<=) ou exclusivos (<)
+
+        Returns:
+            View Kx2 do array ordenado (não modificar)
+        """
+        ys = self._ys[lado]
+        i0 = 0 if y_lo is None else int(np.searchsorted(ys, y_lo, side="left" if incl_lo else "right"))
+        i1 = len(ys) if y_hi is None else int(np.searchsorted(ys, y_hi, side="right" if incl_hi else "left"))
+        return self._pts[lado][i0:max(i0, i1)]
+
+    def contar(self, y_lo=None, y_hi=None, lado=None, incl_lo=True, incl_hi=True) -> int:
+        """Número de pontos na faixa, sem materializar a view."""
+        return len(self.faixa(y_lo, y_hi, lado, incl_lo, incl_hi))
+
+    @property
+    def pontos(self) -> np.ndarray:
+        return self._pts[None]
+
+    def __len__(self) -> int:
+        return self.n
+
+
+# Cache por identidade para arrays numpy comuns: a mesma gota_pts passada a
+# várias funções (ou a cada evento de arraste) reaproveita o mesmo índice.
+_cache: Dict[int, Tuple[weakref.ref, Tuple, IndiceContorno]] = {}
+_cache_lock = threading.RLock()  # reentrante: o callback do weakref pode rodar durante o GC
+
+
+def _assinatura(arr: np.ndarray) -> Tuple:
+    return (arr.__array_interface__["data"][0], arr.shape, arr.strides, arr.dtype.str)
+
+
+def obter_indice(gota_pts) -> IndiceContorno:
+    """
+    Índice do contorno, construído uma única vez por contorno.
+
+    Aceita IndiceContorno, ContornoCompacto (guarda o próprio índice) ou um
+    array Nx2. Para arrays, o índice fica associado ao objeto enquanto ele
+    existir; contornos não devem ser modificados in-place após indexados.
+    """
+    if isinstance(gota_pts, IndiceContorno):
+        return gota_pts
+    indice_de = getattr(gota_pts, "indice", None)
+    if callable(indice_de):
+        return indice_de()
+    if not isinstance(gota_pts, np.ndarray):
+        return IndiceContorno(gota_pts)
+
+    chave = id(gota_pts)
+    assinatura = _assinatura(gota_pts)
+    with _cache_lock:
+        item = _cache.get(chave)
+        if item is not None and item[0]() is gota_pts and item[1] == assinatura:
+            return item[2]
+
+    indice = IndiceContorno(gota_pts)
+
+    def _descartar(_ref, chave=chave):
+        with _cache_lock:
+            atual = _cache.get(chave)
+            if atual is not None and atual[0] is _ref:
+                del _cache[chave]
+
+    with _cache_lock:
+        if len(_cache) >= MAX_INDICES_CACHE:
+            _cache.pop(next(iter(_cache)))
+        _cache[chave] = (weakref.ref(gota_pts, _descartar), assinatura, indice)
+    return indice
@@ -1,19 +1,62 @@
 
 import os
-from typing import Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Optional, Tuple
 
 import cv2
 import numpy as np
 
+# Execução em tiles: acima deste tamanho (px) o modo em tiles é usado por padrão
+LARGE_IMAGE_PX = 16_000_000
+TILE_PX_DEFAULT = 1024
+MORPH_HALO_PX = 4  # abertura + fechamento 3x3: 1 px por erosão/dilatação
+# Fundo no modo em tiles (ou com estimate_background(reduzido=True)): kernels
+# maiores que isto são aplicados numa cópia reduzida da imagem (o fundo é um
+# passa-baixa muito largo; a redução por média de blocos quase não o altera)
+BG_K_REDUZIDO = 31
 
-def estimate_background(img_gray, bg_ksize=None):
+
+def _fator_fundo(bg_k: int) -> int:
+    """Fator inteiro de redução da imagem usada para estimar o fundo (1 = resolução cheia)."""
+    return max(1, bg_k // BG_K_REDUZIDO)
+
+
+def _fundo_do_reduzido(pequena: np.ndarray, bg_k: int, f: int, h: int, w: int,
+                       dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """Suaviza a imagem reduzida com o sigma equivalente a bg_k e amplia para h x w."""
+    sigma = 0.3 * ((bg_k - 1) * 0.5 - 1) + 0.8  # sigma do OpenCV para ksize=bg_k
+    bg = cv2.GaussianBlur(pequena, (0, 0), sigma / f)
+    hf, wf = bg.shape[0] * f, bg.shape[1] * f
+    if dst is None:
+        dst = np.empty((h, w), dtype=bg.dtype)
+    # ampliação pelo fator exato (alinhada aos blocos); as últimas < f
+    # linhas/colunas, fora dos blocos inteiros, repetem a borda
+    dst[:hf, :wf] = cv2.resize(bg, (wf, hf), interpolation=cv2.INTER_LINEAR)
+    dst[hf:, :wf] = dst[hf - 1:hf, :wf]
+    dst[:, wf:] = dst[:, wf - 1:wf]
+    return dst
+
+
+def estimate_background(img_gray, bg_ksize=None, reduzido=False):
+    """
+    Fundo por GaussianBlur de kernel largo.
+
+    reduzido=True estima o fundo numa cópia reduzida por blocos (kernels
+    maiores que BG_K_REDUZIDO); aproxima o GaussianBlur exato em ±2 níveis
+    de cinza, a uma fração do custo.
+    """
     h, w = img_gray.shape[:2]
     if bg_ksize is None:
         k = max(51, (min(h, w) // 6) | 1)  # odd and scale with image
     else:
         k = bg_ksize if bg_ksize % 2 == 1 else bg_ksize + 1
-    bg = cv2.GaussianBlur(img_gray, (k, k), 0)
-    return bg
+    f = _fator_fundo(k) if reduzido else 1
+    if f == 1 or min(h, w) < f:
+        return cv2.GaussianBlur(img_gray, (k, k), 0)
+    # média de blocos f x f (INTER_AREA com fator inteiro), como no modo em tiles
+    hr, wr = h // f, w // f
+    pequena = cv2.resize(img_gray[:hr * f, :wr * f], (wr, hr), interpolation=cv2.INTER_AREA)
+    return _fundo_do_reduzido(pequena, k, f, h, w)
 
 
 def correct_illumination_divide(img_gray, bg):
@@ -24,6 +67,187 @@ def correct_illumination_divide(img_gray, bg):
     return corrected
 
 
+def _resolve_sizes(h: int, w: int, bg_ksize, clahe_grid, adapt_blocksize) -> Tuple[int, Tuple[int, int], int]:
+    """Kernel do fundo, grade do CLAHE e bloco do limiar para uma imagem h x w."""
+    if bg_ksize is None:
+        bg_k = max(51, (min(h, w) // 6) | 1)
+    else:
+        bg_k = bg_ksize if bg_ksize % 2 == 1 else bg_ksize + 1
+
+    if clahe_grid is None:
+        # heurística: número de tiles proporcional ao menor lado
+        tile = max(1, int(min(h, w) / 50))
+        tg = (min(8, tile), min(8, tile))
+    else:
+        tg = (max(1, int(clahe_grid[0])), max(1, int(clahe_grid[1])))
+
+    if adapt_blocksize is None:
+        # block proportional to image size (odd)
+        adapt_blocksize = max(31, (min(h, w) // 30) | 1)
+    blockSize = adapt_blocksize if adapt_blocksize % 2 == 1 else adapt_blocksize + 1
+    # protege blockSize para não ser maior que a dimensão da imagem
+    max_allowed = max(3, min(h, w) - (1 if (min(h, w) % 2 == 0) else 0))
+    if blockSize >= min(h, w):
+        blockSize = max_allowed if max_allowed % 2 == 1 else max_allowed - 1
+    return bg_k, tg, blockSize
+
+
+def _morph_cleanup(binary: np.ndarray) -> np.ndarray:
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
+    return cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, iterations=1)
+
+
+# ----------------------------------------------------------------------
+# Modo em tiles (imagens muito grandes)
+# ----------------------------------------------------------------------
+# Cada etapa local roda sobre tiles com uma borda extra (halo) do tamanho
+# do alcance dos seus kernels; só o miolo de cada tile é escrito no buffer
+# de saída. Nas bordas da imagem o tile termina junto com ela, então o
+# tratamento de borda do OpenCV é o mesmo do modo direto. O CLAHE não é
+# local (grade sobre a imagem toda) e roda em duas passadas: histogramas/LUTs
+# por célula da grade e, depois, a interpolação bilinear das LUTs por tile.
+# O fundo (kernel de ~min(h, w)/6) sai da imagem reduzida por blocos, montada
+# tile a tile, em vez de um halo de bg_k/2 em volta de cada tile.
+# Pico de memória: os buffers uint8 de saída + alguns tiles por thread.
+
+def _tiles(h: int, w: int, tile: int) -> Iterator[Tuple[int, int, int, int]]:
+    for y0 in range(0, h, tile):
+        for x0 in range(0, w, tile):
+            yield y0, min(y0 + tile, h), x0, min(x0 + tile, w)
+
+
+def _with_halo(y0: int, y1: int, x0: int, x1: int, halo: int, h: int, w: int):
+    """Janela expandida (recortada na imagem) e o miolo relativo a ela."""
+    ey0, ey1 = max(0, y0 - halo), min(h, y1 + halo)
+    ex0, ex1 = max(0, x0 - halo), min(w, x1 + halo)
+    return (slice(ey0, ey1), slice(ex0, ex1)), (slice(y0 - ey0, y1 - ey0), slice(x0 - ex0, x1 - ex0))
+
+
+def _reflect101(idx: np.ndarray, n: int) -> np.ndarray:
+    return np.where(idx >= n, 2 * (n - 1) - idx, idx)
+
+
+def _clahe_luts(img: np.ndarray, clip: float, tg: Tuple[int, int], pool: ThreadPoolExecutor):
+    """LUTs por célula da grade, como cv2.CLAHE (mesmo padding e recorte do histograma)."""
+    h, w = img.shape
+    tiles_x, tiles_y = tg
+    if h % tiles_y == 0 and w % tiles_x == 0:
+        th, tw = h // tiles_y, w // tiles_x
+    else:
+        # o OpenCV estende com BORDER_REFLECT_101 até um múltiplo da grade
+        th = (h + tiles_y - h % tiles_y) // tiles_y
+        tw = (w + tiles_x - w % tiles_x) // tiles_x
+    area = th * tw
+    clip_limit = max(int(clip * area / 256), 1) if clip > 0 else 0
+    lut_scale = np.float32(255.0 / area)
+
+    def _cell(ij):
+        i, j = ij
+        rows = _reflect101(np.arange(i * th, (i + 1) * th), h)
+        cols = _reflect101(np.arange(j * tw, (j + 1) * tw), w)
+        if rows[-1] == (i + 1) * th - 1 and cols[-1] == (j + 1) * tw - 1:
+            cell = img[i * th:(i + 1) * th, j * tw:(j + 1) * tw]
+        else:
+            cell = img[np.ix_(rows, cols)]
+        hist = np.bincount(cell.ravel(), minlength=256).astype(np.int64)
+        if clip_limit > 0:
+            excess = hist - clip_limit
+            clipped = int(excess[excess > 0].sum())
+            np.minimum(hist, clip_limit, out=hist)
+            batch, residual = divmod(clipped, 256)
+            hist += batch
+            if residual:
+                step = max(256 // residual, 1)
+                hist[np.arange(0, 256, step)[:residual]] += 1
+        lut = np.rint(np.cumsum(hist).astype(np.float32) * lut_scale)
+        return np.clip(lut, 0, 255).astype(np.float32)
+
+    cells = [(i, j) for i in range(tiles_y) for j in range(tiles_x)]
+    luts = np.stack(list(pool.map(_cell, cells))).reshape(tiles_y, tiles_x, 256)
+    return luts, th, tw
+
+
+def _clahe_interp(img: np.ndarray, out: np.ndarray, luts: np.ndarray, th: int, tw: int,
+                  y0: int, y1: int, x0: int, x1: int) -> None:
+    """Interpolação bilinear das LUTs vizinhas (ponto a ponto: não precisa de halo)."""
+    tiles_y, tiles_x = luts.shape[:2]
+
+    def _eixo(a, b, tam, n):
+        f = np.arange(a, b, dtype=np.float32) * np.float32(1.0 / tam) - np.float32(0.5)
+        i1 = np.floor(f).astype(np.intp)
+        frac = (f - i1).astype(np.float32)
+        return np.maximum(i1, 0), np.minimum(i1 + 1, n - 1), frac
+
+    ty1, ty2, ya = _eixo(y0, y1, th, tiles_y)
+    tx1, tx2, xa = _eixo(x0, x1, tw, tiles_x)
+    v = img[y0:y1, x0:x1]
+    ty1, ty2, ya = ty1[:, None], ty2[:, None], ya[:, None]
+    topo = luts[ty1, tx1, v] * (1 - xa) + luts[ty1, tx2, v] * xa
+    base = luts[ty2, tx1, v] * (1 - xa) + luts[ty2, tx2, v] * xa
+    res = topo * (1 - ya) + base * ya
+    out[y0:y1, x0:x1] = np.clip(np.rint(res), 0, 255).astype(np.uint8)
+
+
+def _preprocess_tiled(img_bgr, gauss_k, bg_k, clahe_clip, tg, blockSize, adapt_C,
+                      do_morph_cleanup, tile_px, n_threads):
+    h, w = img_bgr.shape[:2]
+    f = _fator_fundo(bg_k)
+    if min(h, w) < f:
+        f = 1
+    # tiles alinhados aos blocos f x f da redução do fundo
+    tiles = list(_tiles(h, w, -(-max(64, tile_px) // f) * f))
+    enhanced = np.empty((h, w), dtype=np.uint8)   # 'corrected' e depois 'enhanced' (in-place)
+    binary = np.empty((h, w), dtype=np.uint8)     # fundo ampliado e depois a binária
+    halo_bg = gauss_k // 2 + (bg_k // 2 if f == 1 else 0)
+    halo_thr = blockSize // 2 + (MORPH_HALO_PX if do_morph_cleanup else 0)
+    hr, wr = h // f, w // f
+    pequena = np.empty((hr, wr), dtype=np.uint8)
+
+    def _gray(t):
+        ext, core = _with_halo(*t, halo_bg, h, w)
+        gray = cv2.cvtColor(img_bgr[ext], cv2.COLOR_BGR2GRAY)
+        if gauss_k:
+            gray = cv2.GaussianBlur(gray, (gauss_k, gauss_k), 0)
+        return gray, core
+
+    def _pass_reduzir(t):
+        y1, x1 = min(t[1], hr * f), min(t[3], wr * f)
+        if y1 <= t[0] or x1 <= t[2]:
+            return
+        gray, core = _gray(t)
+        bloco = gray[core][:y1 - t[0], :x1 - t[2]]
+        pequena[t[0] // f:y1 // f, t[2] // f:x1 // f] = cv2.resize(
+            bloco, ((x1 - t[2]) // f, (y1 - t[0]) // f), interpolation=cv2.INTER_AREA)
+
+    def _pass_corrected(t):
+        gray, core = _gray(t)
+        if f == 1:
+            bg = estimate_background(gray, bg_k)[core]
+        else:
+            bg = binary[t[0]:t[1], t[2]:t[3]]
+        enhanced[t[0]:t[1], t[2]:t[3]] = correct_illumination_divide(gray[core], bg)
+
+    def _pass_binary(t):
+        ext, core = _with_halo(*t, halo_thr, h, w)
+        b = cv2.adaptiveThreshold(enhanced[ext], 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                  cv2.THRESH_BINARY_INV, blockSize, adapt_C)
+        if do_morph_cleanup:
+            b = _morph_cleanup(b)
+        binary[t[0]:t[1], t[2]:t[3]] = b[core]
+
+    with ThreadPoolExecutor(max_workers=n_threads or os.cpu_count()) as pool:
+        if f > 1:
+            # fundo na imagem reduzida: sem halo de bg_k/2 em volta de cada tile
+            list(pool.map(_pass_reduzir, tiles))
+            _fundo_do_reduzido(pequena, bg_k, f, h, w, dst=binary)
+        list(pool.map(_pass_corrected, tiles))
+        luts, th, tw = _clahe_luts(enhanced, clahe_clip, tg, pool)
+        list(pool.map(lambda t: _clahe_interp(enhanced, enhanced, luts, th, tw, *t), tiles))
+        list(pool.map(_pass_binary, tiles))
+    return enhanced, binary
+
+
 def preprocess_image_for_contact_angle(img_bgr,
                                        nm_gauss=3,
                                        bg_ksize=None,
@@ -31,48 +255,62 @@ def preprocess_image_for_contact_angle(img_bgr,
                                        clahe_grid: Optional[Tuple[int, int]] = None,
                                        adapt_blocksize=None,
                                        adapt_C=2,
-                                       do_morph_cleanup=True):
-   
+                                       do_morph_cleanup=True,
+                                       tile_px: Optional[int] = None,
+                                       n_threads: Optional[int] = None):
+    """
+    Pré-processamento para ângulo de contato: cinza + suavização, correção
+    de iluminação por divisão do fundo, CLAHE, limiar adaptativo e limpeza
+    morfológica.
+
+    tile_px: lado (px) dos tiles no modo em tiles; 0 desliga e None liga
+        automaticamente acima de LARGE_IMAGE_PX. Os tamanhos dos kernels são
+        sempre calculados sobre a imagem inteira, e o resultado é o mesmo do
+        modo direto (a menos de arredondamento ±1 no CLAHE) quando o kernel do
+        fundo cabe em BG_K_REDUZIDO; acima disso o fundo sai de uma cópia
+        reduzida e difere do modo direto em poucos níveis de cinza.
+    n_threads: threads do modo em tiles (None = número de CPUs)
+    """
     # --- Validação de entrada ---
     if not isinstance(img_bgr, np.ndarray):
         raise TypeError("img_bgr deve ser um numpy.ndarray")
     if img_bgr.ndim != 3 or img_bgr.shape[2] not in (3, 4):
         raise ValueError("img_bgr deve ser uma imagem BGR com 3 canais")
 
+    h, w = img_bgr.shape[:2]
+    gauss_k = 0
+    if nm_gauss and nm_gauss > 0:
+        gauss_k = nm_gauss if nm_gauss % 2 == 1 else nm_gauss + 1
+    bg_k, tg, blockSize = _resolve_sizes(h, w, bg_ksize, clahe_grid, adapt_blocksize)
+
+    if tile_px is None:
+        tile_px = TILE_PX_DEFAULT if h * w > LARGE_IMAGE_PX else 0
+    if tile_px and tile_px > 0:
+        # modo em tiles: sem cópias float32 da imagem inteira; debug só com
+        # as saídas (gray/bg/corrected não existem em tamanho cheio)
+        enhanced, binary = _preprocess_tiled(img_bgr, gauss_k, bg_k, clahe_clip, tg, blockSize,
+                                             adapt_C, do_morph_cleanup, int(tile_px), n_threads)
+        return {
+            "enhanced_gray": enhanced,
+            "binary": binary,
+            "corrected_bgr": cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR),
+            "debug_imgs": {"enhanced": enhanced, "binary": binary}
+        }
+
     # 1) gray + denoise
     gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-    if nm_gauss and nm_gauss > 0:
-        k = nm_gauss if nm_gauss % 2 == 1 else nm_gauss + 1
-        gray = cv2.GaussianBlur(gray, (k, k), 0)
+    if gauss_k:
+        gray = cv2.GaussianBlur(gray, (gauss_k, gauss_k), 0)
 
     # 2) estimate background and correct illumination
-    h, w = gray.shape[:2]
-    if bg_ksize is None:
-        bg_k = max(51, (min(h, w) // 6) | 1)
-    else:
-        bg_k = bg_ksize if bg_ksize % 2 == 1 else bg_ksize + 1
     bg = estimate_background(gray, bg_k)
     corrected = correct_illumination_divide(gray, bg)
 
     # 3) CLAHE (tile grid escala com a imagem quando não informado)
-    if clahe_grid is None:
-        # heurística: número de tiles proporcional ao menor lado
-        tile = max(1, int(min(h, w) / 50))
-        tg = (min(8, tile), min(8, tile))
-    else:
-        tg = (max(1, int(clahe_grid[0])), max(1, int(clahe_grid[1])))
     clahe = cv2.createCLAHE(clipLimit=clahe_clip, tileGridSize=tg)
     enhanced = clahe.apply(corrected)
 
     # 4) adaptive threshold
-    if adapt_blocksize is None:
-        # block proportional to image size (odd)
-        adapt_blocksize = max(31, (min(h, w) // 30) | 1)
-    blockSize = adapt_blocksize if adapt_blocksize % 2 == 1 else adapt_blocksize + 1
-    # protege blockSize para não ser maior que a dimensão da imagem
-    max_allowed = max(3, min(h, w) - (1 if (min(h, w) % 2 == 0) else 0))
-    if blockSize >= min(h, w):
-        blockSize = max_allowed if max_allowed % 2 == 1 else max_allowed - 1
     binary = cv2.adaptiveThreshold(enhanced, 255,
                                    cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
                                    cv2.THRESH_BINARY_INV,
@@ -80,9 +318,7 @@ def preprocess_image_for_contact_angle(img_bgr,
 
     # 5) morphological cleanup (configurável; parâmetros fixos são um bom default)
     if do_morph_cleanup:
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
-        binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel, iterations=1)
+        binary = _morph_cleanup(binary)
 
     corrected_bgr = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
 
@@ -106,8 +342,10 @@ def preprocess_image_for_contact_angle(img_bgr,
     }
 
 
-def save_debug_imgs(debug_dict: Dict[str, Any], out_dir: str, prefix: str = "dbg") -> Dict[str, str]:
-   
+def save_debug_imgs(debug_dict: Dict[str, Any], out_dir: str, prefix: str = "dbg",
+                    compressao_png: Optional[int] = None) -> Dict[str, str]:
+    # síncrono; para lotes/vídeo use processamento_imagem.escritor_debug.EscritorDebug
+    params = [cv2.IMWRITE_PNG_COMPRESSION, int(compressao_png)] if compressao_png is not None else []
     os.makedirs(out_dir, exist_ok=True)
     saved: Dict[str, str] = {}
     
@@ -124,7 +362,7 @@ def save_debug_imgs(debug_dict: Dict[str, Any], out_dir: str, prefix: str = "dbg
         path = os.path.join(out_dir, f"{prefix}_{k}.png")
         
         try:
-            ok = cv2.imwrite(path, img_to_save)
+            ok = cv2.imwrite(path, img_to_save, params)
             if ok:
                 saved[k] = path
         except Exception:
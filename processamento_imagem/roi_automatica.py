@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+LARGURA_REDUZIDA = 160        # largura (px) do quadro reduzido onde a busca é feita
+FRACAO_SUBSTRATO = 0.8        # linha "de substrato": fração mínima de pixels escuros
+AREA_MIN_FRAC = 0.002         # componentes menores que isso (fração do quadro) são ruído
+MARGEM_FRAC = 0.25            # folga da ROI em relação ao tamanho da gota
+MARGEM_SUBSTRATO_FRAC = 0.15  # quanto do substrato (fração da altura da gota) entra na ROI
+
+
+def _binarizar_reduzida(img_bgr: np.ndarray, largura: int):
+    h, w = img_bgr.shape[:2]
+    escala = min(1.0, largura / float(w))
+    pequena = cv2.resize(img_bgr, (max(1, int(round(w * escala))), max(1, int(round(h * escala)))),
+                         interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(pequena, cv2.COLOR_BGR2GRAY) if pequena.ndim == 3 else pequena
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+    _, binaria = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # objeto = escuro sobre fundo claro (sombra da gota); se as bordas laterais
+    # e o topo forem majoritariamente "objeto", a polaridade está invertida
+    borda = np.concatenate([binaria[0, :], binaria[:, 0], binaria[:, -1]])
+    if borda.mean() > 0.5:
+        binaria = 1 - binaria
+    return binaria, escala
+
+
+def _linha_substrato(binaria: np.ndarray) -> int:
+    """Topo da faixa inferior de linhas quase todas escuras (perfil de projeção por linha)."""
+    h = binaria.shape[0]
+    perfil = binaria.mean(axis=1)
+    cheias = perfil >= FRACAO_SUBSTRATO
+    if not cheias[h // 3:].any():
+        return h  # sem substrato visível: gota pendente/sem base na imagem
+    y = h - 1
+    # pula eventual fundo claro abaixo do substrato e percorre a faixa escura
+    while y > 0 and not cheias[y]:
+        y -= 1
+    while y > 0 and cheias[y - 1]:
+        y -= 1
+    return y
+
+
+def detectar_roi_info(img_bgr: np.ndarray, largura_reduzida: int = LARGURA_REDUZIDA,
+                      margem: float = MARGEM_FRAC) -> Optional[Dict]:
+    """
+    Localiza a gota e o substrato num quadro reduzido.
+
+    1) Otsu na imagem reduzida (~160 px de largura)
+    2) perfil de projeção por linha → topo do substrato
+    3) componentes conexos acima do substrato → a gota é o maior componente
+       apoiado no substrato (ou o maior de todos, se nenhum encostar)
+
+    Returns:
+        {'roi': [x1, y1, x2, y2] (resolução original, com folga),
+         'substrato_y', 'caixa_gota'} ou None se nada for encontrado
+    """
+    if img_bgr is None or img_bgr.size == 0:
+        return None
+    H, W = img_bgr.shape[:2]
+    binaria, escala = _binarizar_reduzida(img_bgr, largura_reduzida)
+    h, w = binaria.shape
+    y_sub = _linha_substrato(binaria)
+
+    acima = np.ascontiguousarray(binaria[:y_sub], dtype=np.uint8)
+    if acima.size == 0:
+        return None
+    n, _, stats, _ = cv2.connectedComponentsWithStats(acima, connectivity=8)
+    if n <= 1:
+        return None
+    x, y, cw, ch, area = (stats[1:, i] for i in range(5))
+    validos = area >= max(4, AREA_MIN_FRAC * h * w)
+    # a gota não atravessa o quadro de lado a lado
+    validos &= cw < 0.95 * w
+    if not validos.any():
+        return None
+    apoiados = validos & (y + ch >= y_sub - 1)
+    candidatos = apoiados if apoiados.any() else validos
+    i = int(np.argmax(np.where(candidatos, area, -1)))
+    gx, gy, gw, gh = int(x[i]), int(y[i]), int(cw[i]), int(ch[i])
+
+    # folga proporcional ao tamanho da gota; embaixo inclui parte do substrato
+    pad_x = margem * gw
+    pad_y = margem * gh
+    x1 = (gx - pad_x) / escala
+    x2 = (gx + gw + pad_x) / escala
+    y1 = (gy - pad_y) / escala
+    base = y_sub if y_sub < h else gy + gh
+    y2 = (base + max(MARGEM_SUBSTRATO_FRAC * gh, 2.0)) / escala
+    roi = [int(np.clip(np.floor(x1), 0, W - 1)), int(np.clip(np.floor(y1), 0, H - 1)),
+           int(np.clip(np.ceil(x2), 1, W)), int(np.clip(np.ceil(y2), 1, H))]
+    if roi[2] - roi[0] < 2 or roi[3] - roi[1] < 2:
+        return None
+    return {"roi": roi,
+            "substrato_y": (y_sub / escala) if y_sub < h else None,
+            "caixa_gota": [gx / escala, gy / escala, (gx + gw) / escala, (gy + gh) / escala]}
+
+
+def detectar_roi(img_bgr: np.ndarray, largura_reduzida: int = LARGURA_REDUZIDA,
+                 margem: float = MARGEM_FRAC) -> Optional[List[int]]:
+    """ROI [x1, y1, x2, y2] automática da gota (None se não encontrada)."""
+    info = detectar_roi_info(img_bgr, largura_reduzida, margem)
+    return None if info is None else info["roi"]
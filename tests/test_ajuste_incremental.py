@@ -0,0 +1,45 @@
+import pytest
+
+from Cal_angulo import ajuste_incremental
+from Cal_angulo.ajuste_incremental import AjusteIncremental
+from Cal_angulo.angulo_contato import calcular_angulo_polinomial
+from pipeline.analise import analisar_imagem
+from tests.test_segmentacao import gota_sentada
+
+JANELA = 35.0  # diferente de WINDOW_HEIGHT: o ajuste tem que respeitar a do construtor
+
+
+@pytest.fixture(scope="module")
+def gota():
+    res = analisar_imagem(gota_sentada(70)[0])
+    return res["gota_pts"], res["p_esq"], res["p_dir"], res["baseline_y"]
+
+
+def test_incremental_acompanha_o_ajuste_completo(gota):
+    pts, p_esq, p_dir, base = gota
+    ajuste = AjusteIncremental(pts, JANELA)
+    for dy in (0, -1, -3, -2, 2, 5, -8, 0.5, -20, 1):
+        y = base + dy
+        for lado in ("esq", "dir"):
+            esperado = calcular_angulo_polinomial(pts, p_esq, p_dir, y, lado, JANELA)
+            assert ajuste.angulo(p_esq, p_dir, y, lado) == pytest.approx(esperado, abs=1e-6)
+
+
+def test_fallback_usa_a_janela_do_construtor(gota, monkeypatch):
+    pts, p_esq, p_dir, base = gota
+    chamadas = []
+
+    def _registrar(*args):
+        chamadas.append(args)
+        return calcular_angulo_polinomial(*args)
+
+    monkeypatch.setattr(ajuste_incremental, "calcular_angulo_polinomial", _registrar)
+    ajuste = AjusteIncremental(pts, JANELA)
+    # contato direito arrastado até quase o esquerdo: o centro dos contatos
+    # corta o lado esquerdo da janela, a divisão do índice não vale e o
+    # cálculo cai no ajuste completo
+    p_dir_dentro = [p_esq[0] + 6.0, p_dir[1]]
+    for dy in (0, -2, -5):
+        esperado = calcular_angulo_polinomial(pts, p_esq, p_dir_dentro, base + dy, "esq", JANELA)
+        assert ajuste.angulo(p_esq, p_dir_dentro, base + dy, "esq") == pytest.approx(esperado, abs=1e-6)
+    assert chamadas and all(c[-1] == JANELA for c in chamadas)
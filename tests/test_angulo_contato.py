@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pytest
+
+from Cal_angulo.angulo_contato import (N_BOOTSTRAP, _ajustar_reamostragens, calcular_angulo_com_incerteza,
+                                       calcular_angulo_polinomial)
+
+Y_BASE = 400.0
+BASE_PX = 300.0
+
+
+def calota(angulo_graus: float, n: int = 4000, ruido: float = 0.3):
+    """Contorno analítico de uma calota esférica (pontos subpixel com ruído)."""
+    t = math.radians(angulo_graus)
+    raio = BASE_PX / 2 / math.sin(t)
+    xc, yc = 320.0, Y_BASE + raio * math.cos(t)
+    phi = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    pts = np.stack([xc + raio * np.cos(phi), yc + raio * np.sin(phi)], axis=1)
+    pts = pts[pts[:, 1] <= Y_BASE]
+    pts = pts + np.random.default_rng(int(angulo_graus)).normal(0, ruido, pts.shape)
+    return pts, (xc - BASE_PX / 2, Y_BASE), (xc + BASE_PX / 2, Y_BASE)
+
+
+def test_ajuste_em_lote_igual_ao_polyfit():
+    rng = np.random.default_rng(0)
+    u = rng.uniform(-20, 0, 60)
+    xs = 0.01 * u ** 2 - 0.8 * u + 5 + rng.normal(0, 0.2, u.size)
+    W = rng.multinomial(u.size, np.full(u.size, 1.0 / u.size), size=4).astype(np.float64)
+    W[:, u < -15] = 0.0  # janela mais baixa que o superconjunto
+    coefs, validos = _ajustar_reamostragens(xs, u, W)
+    assert validos.all()
+    for b in range(len(W)):
+        idx = np.repeat(np.arange(u.size), W[b].astype(int))
+        np.testing.assert_allclose(coefs[b], np.polyfit(u[idx], xs[idx], 2), rtol=1e-8, atol=1e-8)
+
+
+def test_reamostragem_degenerada_fica_de_fora():
+    u = np.linspace(-10, 0, 10)
+    W = np.zeros((2, 10))
+    W[0, :] = 1.0
+    W[1, [2, 7]] = 5.0  # só dois pontos distintos: parábola indeterminada
+    _, validos = _ajustar_reamostragens(u ** 2, u, W)
+    assert validos.tolist() == [True, False]
+
+
+@pytest.mark.parametrize("angulo", [90, 120])
+def test_intervalo_cobre_o_angulo_verdadeiro(angulo):
+    pts, p_esq, p_dir = calota(angulo)
+    for lado in ("esq", "dir"):
+        inc = calcular_angulo_com_incerteza(pts, p_esq, p_dir, Y_BASE, lado, seed=1)
+        assert inc["n_validos"] > 0.9 * N_BOOTSTRAP
+        assert inc["ic_inf"] <= angulo <= inc["ic_sup"]
+        assert inc["angulo"] == calcular_angulo_polinomial(pts, p_esq, p_dir, Y_BASE, lado)
+
+
+@pytest.mark.parametrize("angulo", [60, 90, 120, 150])
+def test_angulo_medido_por_dentro_do_liquido(angulo):
+    # ângulo agudo continua agudo, obtuso continua obtuso (não o suplemento)
+    pts, p_esq, p_dir = calota(angulo)
+    for lado in ("esq", "dir"):
+        assert calcular_angulo_polinomial(pts, p_esq, p_dir, Y_BASE, lado) == pytest.approx(angulo, abs=3)
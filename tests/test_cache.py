@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+
+from pipeline.cache import CacheDisco, CacheMemoria, CacheResultados, tamanho_bytes
+from processamento_imagem.contorno_compacto import ContornoCompacto
+
+
+def test_lru_em_memoria_limitado_por_bytes():
+    mem = CacheMemoria(max_itens=100, max_bytes=3 * 1000)
+    for i in range(4):
+        mem.put(f"k{i}", np.zeros(1000, np.uint8))
+    assert len(mem) == 3
+    assert mem.total_bytes == 3000
+    assert "k0" not in mem._dados  # despejada a mais antiga
+    mem.put("grande", np.zeros(5000, np.uint8))  # maior que o limite inteiro: não entra
+    assert "grande" not in mem._dados and len(mem) == 3
+
+
+def test_estagio_nao_persistido_fica_fora_do_disco(tmp_path):
+    cache = CacheResultados(disco=CacheDisco(str(tmp_path)))
+    cache.obter_ou_calcular("pre", "a", lambda: {"binary": np.ones((8, 8), np.uint8)}, persistir=False)
+    cache.obter_ou_calcular("contorno", "a", lambda: np.ones((10, 2)))
+    assert sorted(os.listdir(tmp_path)) == ["contorno-a.pkl"]
+    assert cache.obter_ou_calcular("pre", "a", lambda: None, persistir=False) is not None
+
+
+def test_tamanho_conta_os_arrays_dentro_de_objetos():
+    pts = np.random.default_rng(0).uniform(0, 500, (20000, 2)).astype(np.float32)
+    contorno = ContornoCompacto(pts)
+    contorno.lados()
+    contorno.indice()
+    # pontos + lados + índice (ordenado, lados e colunas y): bem mais que o objeto vazio
+    assert tamanho_bytes(contorno) > 4 * pts.nbytes
+    # o mesmo array (ou uma view dele) só conta uma vez
+    assert tamanho_bytes({"a": pts, "b": pts[::2], "c": contorno.pts}) < pts.nbytes + 1000
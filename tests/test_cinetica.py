@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pytest
+
+from cinetica.cinetica import FiltroKalman1D, RastreadorCinetica, volume_area_revolucao
+
+Y_BASE = 400.0
+
+
+def calota(angulo_graus: float, base_px: float = 300.0, n: int = 20000):
+    """Contorno denso de uma calota esférica e o raio da esfera."""
+    t = math.radians(angulo_graus)
+    raio = base_px / 2 / math.sin(t)
+    xc, yc = 320.0, Y_BASE + raio * math.cos(t)
+    phi = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    pts = np.stack([xc + raio * np.cos(phi), yc + raio * np.sin(phi)], axis=1)
+    return pts[pts[:, 1] <= Y_BASE], xc, raio
+
+
+@pytest.mark.parametrize("angulo", [40, 90, 130])
+def test_volume_da_calota_esferica(angulo):
+    pts, xc, raio = calota(angulo)
+    h = raio * (1 - math.cos(math.radians(angulo)))
+    analitico = math.pi * h * h * (3 * raio - h) / 3
+    va = volume_area_revolucao(pts, Y_BASE, xc)
+    # raio por linha inteira: gotas baixas (~50 linhas a 40°) ficam ~2% acima
+    assert va["volume"] == pytest.approx(analitico, rel=0.02)
+    assert va["area"] == pytest.approx(2 * math.pi * raio * h, rel=0.01)
+
+
+def _serie(valor, desvio, n=300, seed=0):
+    return valor + np.random.default_rng(seed).normal(0, desvio, n)
+
+
+@pytest.mark.parametrize("valor, desvio", [(70.0, 0.7), (150.0, 1.5), (2.0e6, 2.0e4)])
+def test_kalman_relativo_converge_em_sinal_constante(valor, desvio):
+    # ângulo (°), diâmetro (px) e volume (px³): mesma suavização relativa
+    filtro = FiltroKalman1D(1e-4, 0.01, relativo=True)
+    medidas = _serie(valor, desvio)
+    saida = np.array([filtro.atualizar(i / 30.0, m) for i, m in enumerate(medidas)])
+    suave, taxa = saida[-100:, 0], saida[-100:, 1]
+    assert abs(suave.mean() - valor) < 0.5 * desvio
+    assert suave.std() < 0.3 * desvio
+    assert np.all(np.abs(taxa) < 0.05 * valor)
+
+
+def test_rastreador_suaviza_volume_em_px3():
+    pts, xc, raio = calota(70)
+    rastreador = RastreadorCinetica()
+    brutos, suaves = [], []
+    rng = np.random.default_rng(1)
+    for i in range(300):
+        ruido = pts + rng.normal(0, 0.5, pts.shape)
+        a = rastreador.atualizar(i / 30.0, ruido, Y_BASE, (xc - 150, Y_BASE), (xc + 150, Y_BASE), 70.0, 70.0)
+        brutos.append(a["volume"])
+        suaves.append(a["volume_suave"])
+    brutos, suaves = np.array(brutos[-100:]), np.array(suaves[-100:])
+    assert suaves.std() < 0.5 * brutos.std()
@@ -0,0 +1,60 @@
+import os
+
+import cv2
+
+from pipeline.analise import CHAVES_IMAGENS, analisar_lote
+from pipeline.segmentacao import usou_fallback
+from processamento_imagem.escritor_debug import EscritorDebug
+from tests.test_segmentacao import gota_sentada
+
+
+def test_fallback_e_o_nivel_escolhido_diferente_do_primeiro():
+    tentativas = [{"metodo": "otsu"}, {"metodo": "preprocess"}]
+    assert not usou_fallback({"metodo": "otsu", "tentativas": tentativas})
+    assert usou_fallback({"metodo": "preprocess", "tentativas": tentativas})
+    assert not usou_fallback(None)
+
+
+def test_lote_envia_imagens_ao_escritor(tmp_path):
+    caminhos = []
+    for angulo in (30, 90):
+        caminho = str(tmp_path / f"gota_{angulo}.png")
+        cv2.imwrite(caminho, gota_sentada(angulo)[0])
+        caminhos.append(caminho)
+
+    with EscritorDebug(str(tmp_path / "todos")) as escritor:
+        resultados = dict(analisar_lote(caminhos, escritor_debug=escritor))
+    assert sorted(os.listdir(tmp_path / "todos")) == [
+        "gota_30_binary.png", "gota_30_corrected_bgr.png", "gota_90_binary.png", "gota_90_corrected_bgr.png"]
+    # as imagens vão para o escritor, não ficam acumuladas nos resultados
+    assert all(not set(CHAVES_IMAGENS) & set(res) for res in resultados.values())
+
+    # gotas limpas ficam no Otsu: com apenas_fallback nada é gravado
+    with EscritorDebug(str(tmp_path / "fallback"), apenas_fallback=True) as escritor:
+        list(analisar_lote(caminhos, escritor_debug=escritor))
+    assert escritor.ignorados == 2 and os.listdir(tmp_path / "fallback") == []
+
+
+class _CameraFixa:
+    """Substitui cv2.VideoCapture: devolve sempre o mesmo quadro."""
+
+    def __init__(self, quadro):
+        self.quadro = quadro
+
+    def isOpened(self):
+        return True
+
+    def read(self, destino=None):
+        return True, self.quadro.copy()
+
+
+def test_rajada_envia_so_quadros_analisados(tmp_path):
+    from captura.rajada import CapturaRajada
+
+    rajada = CapturaRajada(_CameraFixa(gota_sentada(40)[0]), duracao_s=0.3, fps=10)
+    rajada._laco()
+    with EscritorDebug(str(tmp_path)) as escritor:
+        resultados = rajada.analisar(escritor_debug=escritor)
+    assert [res["reutilizado"] for _, res in resultados] == [False, True, True]
+    assert all(not set(CHAVES_IMAGENS) & set(res) for _, res in resultados)
+    assert sorted(os.listdir(tmp_path)) == ["quadro_000000_binary.png", "quadro_000000_corrected_bgr.png"]
@@ -0,0 +1,27 @@
+import csv
+import io
+
+import numpy as np
+
+from cinetica.linha_contato import AVANCANDO, DetectorLinhaContato
+
+
+def test_avanco_detectado_e_gravado_no_csv():
+    rng = np.random.default_rng(1)
+    saida = io.StringIO()
+    det = DetectorLinhaContato(saida_csv=saida)
+    x_esq, x_dir = 100.0, 300.0
+    for i in range(120):
+        t = i / 30.0
+        if i >= 60:  # a gota começa a crescer: os dois lados andam para fora
+            x_esq -= 1.0
+            x_dir += 1.0
+        res = {"p_esq": [x_esq + rng.normal(0, 0.05), 200.0], "p_dir": [x_dir + rng.normal(0, 0.05), 200.0],
+               "angulo_esq": 80.0, "angulo_dir": 80.0}
+        det.atualizar_resultado(t, res)
+    avancos = [e for e in det.eventos if e["tipo"] == AVANCANDO]
+    assert {e["lado"] for e in avancos} == {"esq", "dir"}
+    assert all(55 <= e["quadro_inicio"] <= 62 for e in avancos)
+    linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+    assert len(linhas) == len(det.eventos)
+    assert {l["tipo"] for l in linhas} >= {AVANCANDO}
@@ -0,0 +1,9 @@
+from pipeline.metricas import HistogramaLatencia
+
+
+def test_percentis_nao_passam_do_maximo_registrado():
+    hist = HistogramaLatencia()
+    for v in [0.0484] * 20 + [0.010] * 80:
+        hist.registrar(v)
+    p50, p95, p99 = hist.percentis((50, 95, 99))
+    assert p50 <= p95 <= p99 <= hist.maximo == 0.0484
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from pipeline.mudanca import AnaliseComReuso, DetectorMudanca
+
+
+def _quadro(nivel):
+    return np.full((48, 64, 3), nivel, np.uint8)
+
+
+def test_falha_na_analise_nao_deixa_resultado_antigo_ser_reutilizado():
+    chamadas = []
+
+    def analisar(img):
+        chamadas.append(int(img[0, 0, 0]))
+        if img[0, 0, 0] == 200 and chamadas.count(200) == 1:
+            raise RuntimeError("falha transitória")
+        return {"nivel": int(img[0, 0, 0])}
+
+    reuso = AnaliseComReuso(analisar, DetectorMudanca(forcar_a_cada_s=None))
+    assert reuso(_quadro(10), t=0.0)["nivel"] == 10
+    with pytest.raises(RuntimeError):
+        reuso(_quadro(200), t=1.0)
+    # mesmo quadro de novo: continua diferente da referência (10), então é reanalisado
+    res = reuso(_quadro(200), t=2.0)
+    assert res == {"nivel": 200, "reutilizado": False}
+    assert reuso(_quadro(200), t=3.0)["reutilizado"] is True
+    assert chamadas == [10, 200, 200]
@@ -0,0 +1,36 @@
+import os
+import time
+
+import numpy as np
+
+from pipeline.multiprocesso import PipelineMultiprocesso
+
+QUADRO_FATAL = 3
+
+
+def analise_fragil(img, roi=None, pre_params=None):
+    """Análise de teste: o processo morre (como num crash do OpenCV) no quadro QUADRO_FATAL."""
+    valor = int(img[0, 0, 0])
+    if valor == QUADRO_FATAL:
+        os._exit(1)
+    return {"valor": valor}
+
+
+def test_processo_morto_nao_trava_a_entrega():
+    entregues = []
+    with PipelineMultiprocesso((4, 4, 3), n_workers=2, n_slots=8, funcao=analise_fragil,
+                               callback=lambda seq, t, res: entregues.append((seq, res))) as pipe:
+        for v in range(6):
+            assert pipe.enviar(np.full((4, 4, 3), v, np.uint8)) == v
+        # a entrega continua com o processo restante, sem esperar o fechamento
+        limite = time.monotonic() + 30
+        while len(entregues) < 6 and time.monotonic() < limite:
+            time.sleep(0.05)
+        assert len(entregues) == 6
+        assert pipe.enviar(np.full((4, 4, 3), 7, np.uint8)) == 6
+    assert [seq for seq, _ in entregues] == list(range(7))
+    assert entregues[QUADRO_FATAL][1] == {"erro": "trabalhador encerrado"}
+    # resultados que o processo não chegou a enviar também saem como erro
+    assert all(res.get("valor") == seq or res == {"erro": "trabalhador encerrado"} for seq, res in entregues[:6])
+    assert entregues[6][1]["valor"] == 7
+    assert pipe._livres.qsize() == 8
@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+import pytest
+
+from processamento_imagem import contorno
+from processamento_imagem.preprocess import estimate_background, preprocess_image_for_contact_angle
+
+
+def _cena(h, w):
+    """Gota escura sob iluminação em gradiente, com ruído."""
+    yy, xx = np.mgrid[0:h, 0:w]
+    img = 120 + 60 * xx / w + 30 * yy / h
+    img[(xx - w / 2) ** 2 + (yy - 0.6 * h) ** 2 < (min(h, w) / 4) ** 2] = 40
+    img = img + np.random.default_rng(0).normal(0, 3, img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _par(h, w, bg_ksize):
+    bgr = cv2.cvtColor(_cena(h, w), cv2.COLOR_GRAY2BGR)
+    direto = preprocess_image_for_contact_angle(bgr, bg_ksize=bg_ksize, tile_px=0)
+    tiles = preprocess_image_for_contact_angle(bgr, bg_ksize=bg_ksize, tile_px=128, n_threads=3)
+    return direto, tiles
+
+
+def test_tiles_equivalem_ao_modo_direto():
+    # kernel pequeno: fundo em resolução cheia nos dois modos
+    direto, tiles = _par(300, 400, None)
+    diff = np.abs(direto["enhanced_gray"].astype(int) - tiles["enhanced_gray"])
+    assert diff.max() <= 1
+    assert np.mean(direto["binary"] != tiles["binary"]) < 1e-3
+
+
+@pytest.mark.parametrize("h, w, bg_ksize", [
+    (700, 900, None),    # blocos que não dividem h e w
+    (600, 800, 301),
+])
+def test_tiles_com_fundo_reduzido_mantem_a_gota(h, w, bg_ksize):
+    direto, tiles = _par(h, w, bg_ksize)
+    diff = np.abs(direto["enhanced_gray"].astype(int) - tiles["enhanced_gray"])
+    assert diff.mean() < 1
+    a = contorno.encontrar_contorno_gota(direto["binary"], permitir_canny=False)
+    b = contorno.encontrar_contorno_gota(tiles["binary"], permitir_canny=False)
+    # o contorno da gota não se desloca mais que 1 px (Hausdorff)
+    assert a is not None and b is not None
+    dist = np.hypot(*(a[:, None, :] - b[None, :, :]).transpose(2, 0, 1))
+    assert max(dist.min(axis=0).max(), dist.min(axis=1).max()) <= 1.5
+
+
+def test_modo_direto_usa_o_gaussiano_exato():
+    gray = _cena(700, 900)
+    np.testing.assert_array_equal(estimate_background(gray, 151), cv2.GaussianBlur(gray, (151, 151), 0))
+
+
+def test_fundo_reduzido_acompanha_o_gaussiano_cheio():
+    gray = _cena(700, 900)
+    k = 151
+    cheio = cv2.GaussianBlur(gray, (k, k), 0).astype(int)
+    diff = np.abs(estimate_background(gray, k, reduzido=True).astype(int) - cheio)
+    assert diff.mean() < 0.5 and diff.max() <= 2
@@ -0,0 +1,79 @@
+import math
+
+import cv2
+import numpy as np
+import pytest
+
+from pipeline.analise import analisar_imagem
+from pipeline.qualidade import pontuar_contorno
+from pipeline.segmentacao import segmentar_cascata
+from processamento_imagem import contorno
+
+# =================================================================
+# GOTA SINTÉTICA DE GEOMETRIA CONHECIDA
+# =================================================================
+LARGURA, ALTURA = 480, 320
+Y_BASE = 240
+BASE_PX = 240.0
+
+
+def gota_sentada(angulo_graus: float, ruido: float = 2.0):
+    """
+    Calota esférica escura sobre substrato escuro, fundo claro.
+
+    Returns:
+        (imagem BGR, x do contato esquerdo, x do contato direito)
+    """
+    t = math.radians(angulo_graus)
+    raio = BASE_PX / 2 / math.sin(t)
+    xc = LARGURA / 2
+    yc = Y_BASE + raio * math.cos(t)
+    ss = 4  # superamostragem: borda com antisserrilhado, como numa captura
+    yy, xx = np.mgrid[0:ALTURA * ss, 0:LARGURA * ss] / ss
+    gota = ((xx - xc) ** 2 + (yy - yc) ** 2 <= raio * raio) & (yy <= Y_BASE)
+    escuro = (gota | (yy >= Y_BASE)).astype(np.float64)
+    escuro = escuro.reshape(ALTURA, ss, LARGURA, ss).mean(axis=(1, 3))
+    img = 210.0 - 170.0 * escuro + np.random.default_rng(int(angulo_graus)).normal(0, ruido, escuro.shape)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR), xc - BASE_PX / 2, xc + BASE_PX / 2
+
+
+@pytest.mark.parametrize("angulo", [20, 30, 40, 50, 70, 90, 120])
+def test_gota_limpa_fica_no_otsu_com_contatos_corretos(angulo):
+    img, x_esq, x_dir = gota_sentada(angulo)
+    res = analisar_imagem(img)
+    assert res["segmentacao"]["metodo"] == "otsu"
+    assert abs(res["p_esq"][0] - x_esq) < 3
+    assert abs(res["p_dir"][0] - x_dir) < 3
+    assert abs(res["baseline_y"] - Y_BASE) < 3
+
+
+@pytest.mark.parametrize("angulo", [20, 40, 90])
+def test_base_aberta_nao_conta_como_lacuna(angulo):
+    img, _, _ = gota_sentada(angulo)
+    binaria = segmentar_cascata(img)["binary"]
+    pts = contorno.encontrar_contorno_gota(binaria, permitir_canny=False)
+    assert pontuar_contorno(pts)["fechamento"] > 0.99
+
+
+def test_nivel_posterior_precisa_superar_pela_margem(monkeypatch):
+    from pipeline import segmentacao
+
+    img, _, _ = gota_sentada(40)
+    notas = {"a": 0.70, "b": 0.75, "c": 0.95}
+
+    def nivel(nome):
+        return nome, lambda cropped, pre_params=None: {"binary": np.full(img.shape[:2], ord(nome), np.uint8)}
+
+    monkeypatch.setattr(segmentacao, "niveis_cascata", lambda pre_params=None: [nivel(n) for n in "abc"])
+    monkeypatch.setattr(segmentacao.contorno, "encontrar_contorno_gota",
+                        lambda binaria, permitir_canny=True: int(binaria[0, 0]))
+    monkeypatch.setattr(segmentacao, "pontuar_contorno",
+                        lambda pts, shape=None, pesos=None: {"score": notas[chr(pts)]})
+
+    # 'b' não supera 'a' pela margem; 'c' supera e passa do limiar
+    assert segmentacao.segmentar_cascata(img, margem=0.1)["metodo"] == "c"
+    notas["c"] = 0.78
+    res = segmentacao.segmentar_cascata(img, margem=0.1)
+    assert res["metodo"] == "a"
+    assert [t["metodo"] for t in res["tentativas"]] == ["a", "b", "c"]
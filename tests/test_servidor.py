@@ -0,0 +1,36 @@
+import pytest
+
+from pipeline.servidor import ErroRequisicao, _item_de_json, _item_de_query
+
+
+def _json(params):
+    return _item_de_json({"caminho": "gota.png", "params": params})
+
+
+def test_params_validos_passam():
+    params = {"clahe_clip": 3.0, "adapt_C": 4, "clahe_grid": [4, 4], "do_morph_cleanup": False, "bg_ksize": None}
+    assert _json(params)["params"] == params
+    assert _json(None)["params"] is None
+
+
+@pytest.mark.parametrize("params", [
+    {"clahe_limit": 3.0},              # chave com erro de digitação
+    {"window_height": 40},             # parâmetro do grafo, não do pré-processamento
+    {"clahe_clip": "3"},
+    {"adapt_C": True},
+    {"clahe_grid": [4]},
+    {"do_morph_cleanup": 1},
+    {"nm_gauss": None},
+    [1, 2],
+])
+def test_params_invalidos_sao_recusados(params):
+    with pytest.raises(ErroRequisicao) as erro:
+        _json(params)
+    assert erro.value.status == 400
+
+
+def test_query_string_tambem_valida():
+    assert _item_de_query(b"x", {"params": ['{"adapt_C": 3}']})["params"] == {"adapt_C": 3}
+    with pytest.raises(ErroRequisicao) as erro:
+        _item_de_query(b"x", {"params": ['{"adapt_c": 3}']})
+    assert erro.value.status == 400
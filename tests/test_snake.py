@@ -0,0 +1,20 @@
+import pytest
+
+from pipeline.analise import analisar_imagem
+from tests.test_segmentacao import gota_sentada
+
+
+# ângulos baixos: a gota é achatada perto do contato e o polinômio x(y)
+# extrapolado até a baseline fica mal condicionado
+@pytest.mark.parametrize("angulo", [20, 30, 50])
+def test_snake_aproxima_o_angulo_verdadeiro(angulo):
+    img, _, _ = gota_sentada(angulo)
+    extrapolado = analisar_imagem(img)
+    snake = analisar_imagem(img, snake=True)
+    assert snake["snake"]["lados_refinados"] == ["dir", "esq"]
+    for lado in ("esq", "dir"):
+        erro_snake = abs(snake[f"angulo_{lado}"] - angulo)
+        assert erro_snake < 5
+        assert erro_snake < abs(extrapolado[f"angulo_{lado}"] - angulo)
+        # o ângulo informado é a tangente do snake, não o polinômio reajustado
+        assert snake[f"angulo_{lado}"] == snake["snake"][f"angulo_{lado}"]
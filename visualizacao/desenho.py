@@ -85,8 +85,9 @@ def desenhar_tangentes(canvas, p_esq, p_dir, ae, ad, zoom_scale, to_scr):
             x, y = p_esq
             # Converter ângulo para radianos
             angle_rad = math.radians(ae)
+            # à esquerda a tangente sobe para a direita (y da imagem cresce para baixo)
             dx = length * math.cos(angle_rad)
-            dy = length * math.sin(angle_rad)
+            dy = -length * math.sin(angle_rad)
             
             x1, y1 = to_scr(x - dx, y - dy)
             x2, y2 = to_scr(x + dx, y + dy)
@@ -0,0 +1,340 @@
+import argparse
+import glob
+import math
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# =================================================================
+# CONFIGURAÇÕES
+# =================================================================
+# Mesmas cores do canvas (visualizacao/desenho.py), em BGR
+COR_CONTORNO = (255, 255, 0)     # cyan
+COR_BASELINE = (0, 0, 255)       # red
+COR_CONTATO = (0, 255, 255)      # yellow
+COR_TANGENTE = (0, 128, 0)       # green
+COR_TEXTO = (255, 255, 255)
+COR_FUNDO_LEGENDA = (0, 0, 0)
+FONTE_LEGENDA = cv2.FONT_HERSHEY_SIMPLEX
+ESCALA_LEGENDA = 0.6
+MARGEM_LEGENDA_PX = 6
+RAIO_CONTATO_PX = 5
+COMPRIMENTO_TANGENTE_PX = 40     # na imagem de saída, como no canvas
+BITS_SUBPIXEL = 4                # coordenadas em ponto fixo (1/16 px) para o OpenCV
+MAX_FILA_PADRAO = 32
+EXTENSOES_VIDEO = {".mp4": "mp4v", ".avi": "MJPG", ".mkv": "XVID"}
+_FIM = object()
+
+_ESCALA_FIXA = float(1 << BITS_SUBPIXEL)
+
+
+def _para_tela(pts, escala: float, deslocamento: Tuple[float, float]) -> np.ndarray:
+    """Transformação imagem → saída de todos os pontos de uma vez (ponto fixo int32)."""
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    tela = pts * escala + np.asarray(deslocamento, dtype=np.float64)
+    return np.round(tela * _ESCALA_FIXA).astype(np.int32)
+
+
+# =================================================================
+# BLOCO 1: PRIMITIVAS (espelham desenho.desenhar_*)
+# =================================================================
+
+def desenhar_baseline(img: np.ndarray, baseline_y, escala: float = 1.0,
+                      deslocamento: Tuple[float, float] = (0, 0), image_width=None) -> None:
+    """
+    Linha base horizontal (vermelha): ao longo da imagem analisada
+    (image_width, coordenadas de imagem) ou, sem ela, de borda a borda da saída.
+    """
+    if baseline_y is None:
+        return
+    if image_width:
+        x_ini, x_fim = 0.0, float(image_width)
+    else:
+        x_ini, x_fim = -deslocamento[0] / escala, (img.shape[1] - deslocamento[0]) / escala
+    (x1, y), (x2, _) = _para_tela([[x_ini, baseline_y], [x_fim, baseline_y]], escala, deslocamento)
+    cv2.line(img, (int(x1), int(y)), (int(x2), int(y)), COR_BASELINE, 2, cv2.LINE_AA, BITS_SUBPIXEL)
+
+
+def desenhar_contorno(img: np.ndarray, gota_pts, escala: float = 1.0,
+                      deslocamento: Tuple[float, float] = (0, 0)) -> None:
+    """Contorno da gota (cyan) como uma única polilinha."""
+    if gota_pts is None or len(gota_pts) < 2:
+        return
+    pts = _para_tela(gota_pts, escala, deslocamento)
+    cv2.polylines(img, [pts.reshape(-1, 1, 2)], False, COR_CONTORNO, 1, cv2.LINE_AA, BITS_SUBPIXEL)
+
+
+def desenhar_pontos_contato(img: np.ndarray, p_esq, p_dir, escala: float = 1.0,
+                            deslocamento: Tuple[float, float] = (0, 0)) -> None:
+    """Pontos de contato (amarelo com borda preta)."""
+    r = int(RAIO_CONTATO_PX * _ESCALA_FIXA)
+    for p in (p_esq, p_dir):
+        if p is None:
+            continue
+        c = tuple(int(v) for v in _para_tela([p], escala, deslocamento)[0])
+        cv2.circle(img, c, r, COR_CONTATO, -1, cv2.LINE_AA, BITS_SUBPIXEL)
+        cv2.circle(img, c, r, (0, 0, 0), 1, cv2.LINE_AA, BITS_SUBPIXEL)
+
+
+def desenhar_tangentes(img: np.ndarray, p_esq, p_dir, ae, ad, escala: float = 1.0,
+                       deslocamento: Tuple[float, float] = (0, 0)) -> None:
+    """Tangentes nos pontos de contato, com a mesma geometria do canvas."""
+    length = COMPRIMENTO_TANGENTE_PX / escala
+    segmentos = []
+    # à esquerda a tangente sobe para a direita, à direita para a esquerda
+    for p, ang, sinal in ((p_esq, ae, -1.0), (p_dir, ad, 1.0)):
+        if p is None or len(p) != 2 or ang is None or not math.isfinite(ang):
+            continue
+        dx = length * math.cos(math.radians(ang))
+        dy = sinal * length * math.sin(math.radians(ang))
+        segmentos.append([[p[0] - dx, p[1] - dy], [p[0] + dx, p[1] + dy]])
+    if segmentos:
+        pts = _para_tela(np.asarray(segmentos).reshape(-1, 2), escala, deslocamento).reshape(-1, 2, 2)
+        cv2.polylines(img, list(pts), False, COR_TANGENTE, 2, cv2.LINE_AA, BITS_SUBPIXEL)
+
+
+def desenhar_resultado(img: np.ndarray, res: Dict[str, Any], escala: float = 1.0,
+                       deslocamento: Tuple[float, float] = (0, 0), image_width=None,
+                       legenda: bool = True) -> np.ndarray:
+    """
+    Desenha um resultado de pipeline.analise (contorno, baseline, contato,
+    tangentes) sobre img, in-place.
+
+    Os pontos do resultado estão nas coordenadas da ROI analisada:
+    deslocamento = (x1, y1) da ROI leva-os à imagem completa; escala
+    acompanha um redimensionamento da saída.
+    """
+    desenhar_contorno(img, res.get("gota_pts"), escala, deslocamento)
+    desenhar_baseline(img, res.get("baseline_y"), escala, deslocamento, image_width)
+    p_esq, p_dir = res.get("p_esq"), res.get("p_dir")
+    if p_esq is not None and p_dir is not None:
+        desenhar_pontos_contato(img, p_esq, p_dir, escala, deslocamento)
+        desenhar_tangentes(img, p_esq, p_dir, res.get("angulo_esq"), res.get("angulo_dir"),
+                           escala, deslocamento)
+    if legenda:
+        if res.get("erro"):
+            texto = f"erro: {res['erro']}"
+        else:
+            texto = "E {} | D {} | M {}".format(*(_fmt_angulo(res.get(k)) for k in
+                                                   ("angulo_esq", "angulo_dir", "angulo_medio")))
+        desenhar_legenda(img, texto)
+    return img
+
+
+def desenhar_legenda(img: np.ndarray, texto: str, origem: Tuple[int, int] = (10, 10)) -> None:
+    """
+    Texto branco sobre uma caixa preta preenchida, com o tamanho de
+    cv2.getTextSize. Nas fontes Hershey o avanço dos glifos cresce com a
+    espessura, então um contorno grosso por baixo do texto fino se desalinha.
+    """
+    (larg, alt), desc = cv2.getTextSize(texto, FONTE_LEGENDA, ESCALA_LEGENDA, 1)
+    x, y = origem
+    m = MARGEM_LEGENDA_PX
+    cv2.rectangle(img, (x, y), (x + larg + 2 * m, y + alt + desc + 2 * m), COR_FUNDO_LEGENDA, cv2.FILLED)
+    cv2.putText(img, texto, (x + m, y + m + alt), FONTE_LEGENDA, ESCALA_LEGENDA, COR_TEXTO, 1, cv2.LINE_AA)
+
+
+def _fmt_angulo(v) -> str:
+    # as fontes Hershey do OpenCV não têm o símbolo de grau
+    return f"{v:.2f} deg" if v is not None and math.isfinite(v) else "--"
+
+
+# =================================================================
+# BLOCO 2: ESCRITA EM SEGUNDO PLANO
+# =================================================================
+
+class EscritorAnotado:
+    """
+    Desenha e grava quadros anotados numa thread própria.
+
+    destino com extensão de vídeo (.mp4/.avi/.mkv) → cv2.VideoWriter, criado
+    no primeiro quadro (tamanho da saída); caso contrário, uma pasta com um
+    PNG/JPG por quadro. A ordem de chegada é preservada e, para não perder
+    evidência, a fila cheia bloqueia o produtor em vez de descartar.
+
+    Os quadros enviados não devem ser modificados depois (não são copiados
+    no envio; o desenho é feito numa cópia na thread escritora).
+    """
+
+    def __init__(self,
+                 destino: str,
+                 fps: float = 30.0,
+                 a_cada: int = 1,
+                 escala: float = 1.0,
+                 formato: str = "png",
+                 legenda: bool = True,
+                 max_fila: int = MAX_FILA_PADRAO):
+        """
+        Args:
+            destino: arquivo de vídeo ou pasta de imagens
+            fps: taxa do vídeo de saída
+            a_cada: desenha/grava apenas um a cada N quadros enviados
+            escala: fator de redimensionamento da saída
+            formato: "png" ou "jpg" (saída em pasta)
+            legenda: escreve os ângulos no canto superior esquerdo
+            max_fila: quadros aguardando escrita
+        """
+        ext = os.path.splitext(destino)[1].lower()
+        self.video = ext in EXTENSOES_VIDEO
+        if not self.video:
+            if formato not in ("png", "jpg"):
+                raise ValueError("formato deve ser 'png' ou 'jpg'")
+            os.makedirs(destino, exist_ok=True)
+        self.destino = destino
+        self.fourcc = cv2.VideoWriter_fourcc(*EXTENSOES_VIDEO[ext]) if self.video else None
+        self.fps = float(fps)
+        self.a_cada = max(1, int(a_cada))
+        self.escala = float(escala)
+        self.formato = formato
+        self.legenda = legenda
+        self._writer: Optional[cv2.VideoWriter] = None
+        self._fila: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_fila)))
+        self._n_envios = 0
+        self.escritos = 0
+        self.erros = 0
+        self._thread = threading.Thread(target=self._trabalhar, name="escritor-anotado", daemon=True)
+        self._thread.start()
+
+    def enviar(self, quadro: np.ndarray, res: Dict[str, Any], deslocamento: Tuple[float, float] = (0, 0),
+               nome: Optional[str] = None) -> bool:
+        """Enfileira um quadro e seu resultado (False se filtrado pela amostragem)."""
+        n = self._n_envios
+        self._n_envios += 1
+        if n % self.a_cada != 0:
+            return False
+        self._fila.put((quadro, res, deslocamento, nome or f"quadro_{n:06d}"))
+        return True
+
+    def _trabalhar(self) -> None:
+        while True:
+            item = self._fila.get()
+            try:
+                if item is _FIM:
+                    return
+                self._escrever(*item)
+            except Exception as e:
+                self.erros += 1
+                print(f"[ANOTADO] Erro ao gravar quadro: {e}")
+            finally:
+                self._fila.task_done()
+
+    def _escrever(self, quadro: np.ndarray, res: Dict[str, Any], deslocamento, nome: str) -> None:
+        img = cv2.cvtColor(quadro, cv2.COLOR_GRAY2BGR) if quadro.ndim == 2 else quadro
+        if self.escala != 1.0:
+            img = cv2.resize(img, None, fx=self.escala, fy=self.escala,
+                             interpolation=cv2.INTER_AREA if self.escala < 1 else cv2.INTER_LINEAR)
+        elif img is quadro:
+            img = quadro.copy()
+        desl = (deslocamento[0] * self.escala, deslocamento[1] * self.escala)
+        desenhar_resultado(img, res, self.escala, desl, legenda=self.legenda)
+        if self.video:
+            if self._writer is None:
+                h, w = img.shape[:2]
+                self._writer = cv2.VideoWriter(self.destino, self.fourcc, self.fps, (w, h))
+                if not self._writer.isOpened():
+                    raise IOError(f"Não foi possível criar o vídeo: {self.destino}")
+            self._writer.write(img)
+        elif not cv2.imwrite(os.path.join(self.destino, f"{nome}.{self.formato}"), img):
+            raise IOError(f"Não foi possível gravar {nome}")
+        self.escritos += 1
+
+    @property
+    def pendentes(self) -> int:
+        return self._fila.qsize()
+
+    def fechar(self) -> None:
+        """Grava o que ainda está na fila e finaliza o vídeo."""
+        self._fila.put(_FIM)
+        self._thread.join()
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+    def __enter__(self) -> "EscritorAnotado":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+
+# =================================================================
+# BLOCO 3: EXECUÇÃO EM LOTE
+# =================================================================
+
+def _quadros(entradas: Sequence[str]) -> Iterator[Tuple[str, np.ndarray]]:
+    """Quadros de arquivos de imagem, pastas ou vídeos, na ordem dada."""
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            caminhos = sorted(p for ext in ("png", "jpg", "jpeg", "tif", "tiff")
+                              for p in glob.glob(os.path.join(entrada, f"*.{ext}")))
+            yield from _quadros(caminhos)
+            continue
+        img = cv2.imread(entrada)
+        if img is not None:
+            yield os.path.splitext(os.path.basename(entrada))[0], img
+            continue
+        cap = cv2.VideoCapture(entrada)
+        base = os.path.splitext(os.path.basename(entrada))[0]
+        i = 0
+        while True:
+            ok, quadro = cap.read()
+            if not ok:
+                break
+            yield f"{base}_{i:06d}", quadro
+            i += 1
+        cap.release()
+        if i == 0:
+            print(f"[ANOTADO] Entrada ignorada (não é imagem nem vídeo legível): {entrada}")
+
+
+def anotar_lote(entradas: Sequence[str], destino: str, roi=None, pre_params: Optional[Dict] = None,
+                fps: float = 30.0, a_cada: int = 1, escala: float = 1.0) -> Dict[str, int]:
+    """
+    Analisa os quadros e grava as anotações. Quadros fora da amostragem
+    (a_cada) nem chegam a ser analisados; com ROI fixa, quadros de vídeo sem
+    mudança reaproveitam o resultado anterior (pipeline.mudanca).
+
+    roi: [x1, y1, x2, y2], "auto" (detectada por quadro) ou None
+    """
+    from pipeline.analise import ROI_AUTO, analisar_imagem
+    from pipeline.mudanca import AnaliseComReuso, DetectorMudanca
+    from processamento_imagem.roi_automatica import detectar_roi
+
+    analisar = analisar_imagem
+    if roi != ROI_AUTO:
+        analisar = AnaliseComReuso(analisar_imagem, DetectorMudanca(roi=roi, forcar_a_cada_s=None))
+    n = 0
+    with EscritorAnotado(destino, fps=fps, escala=escala) as escritor:
+        for i, (nome, quadro) in enumerate(_quadros(entradas)):
+            if i % max(1, int(a_cada)) != 0:
+                continue
+            roi_q = detectar_roi(quadro) if roi == ROI_AUTO else roi
+            try:
+                res = analisar(quadro, roi=roi_q, pre_params=pre_params)
+            except Exception as e:
+                res = {"erro": str(e)}
+            desloc = (roi_q[0], roi_q[1]) if roi_q is not None else (0, 0)
+            escritor.enviar(quadro, res, desloc, nome)
+            n += 1
+    return {"analisados": n, "escritos": escritor.escritos, "erros": escritor.erros}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Gera imagens/vídeo anotados com contorno, baseline e tangentes")
+    ap.add_argument("entradas", nargs="+", help="imagens, pastas de imagens ou vídeos")
+    ap.add_argument("--saida", required=True, help="vídeo (.mp4/.avi/.mkv) ou pasta de imagens")
+    ap.add_argument("--roi", nargs="+", default=None, help='x1 y1 x2 y2 ou "auto"')
+    ap.add_argument("--a-cada", type=int, default=1, help="anota apenas um a cada N quadros")
+    ap.add_argument("--fps", type=float, default=30.0)
+    ap.add_argument("--escala", type=float, default=1.0)
+    a = ap.parse_args()
+
+    roi = None
+    if a.roi:
+        roi = a.roi[0] if a.roi == ["auto"] else [int(v) for v in a.roi]
+    est = anotar_lote(a.entradas, a.saida, roi, fps=a.fps, a_cada=a.a_cada, escala=a.escala)
+    print(f"[ANOTADO] {est['escritos']} quadros gravados em {a.saida} ({est['erros']} erros)")